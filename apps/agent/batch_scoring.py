@@ -0,0 +1,122 @@
+"""
+Vectorized batch scoring for provisioning plans
+
+Provides:
+- Conversion of many ProvisionPlans into columnar NumPy arrays
+- Risk scores, risk levels and cost estimates for every plan in one pass
+
+Risk is evaluated against the same compiled rule tables as assess_risk, and
+results match assess_risk and calculate_cost_estimate in main.py exactly;
+both use the cost model in cost_model.py, and tests/test_batch_scoring.py
+checks parity against them.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from cost_model import BASE_COST, COMPLIANCE_MULTIPLIER_STEP, DEFAULT_ENVIRONMENT_MULTIPLIER, ENVIRONMENT_MULTIPLIERS
+from rules import AgentRules, get_rules
+
+
+@dataclass(frozen=True)
+class PlanColumns:
+    """Scoring inputs of many plans, one array per rule field"""
+    environment: np.ndarray
+    requested_risk_level: np.ndarray
+    resource_count: np.ndarray
+    budget_limit: np.ndarray
+    compliance_count: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.environment)
+
+    def fields(self) -> Dict[str, np.ndarray]:
+        return dict(self.__dict__)
+
+
+def to_columns(plans: Iterable[Any]) -> PlanColumns:
+    """
+    Columnarize plans
+
+    Args:
+        plans: ProvisionPlan instances, or dicts with the same fields
+
+    Returns:
+        PlanColumns where a missing budget_limit is NaN
+    """
+    environment: List[str] = []
+    requested_risk_level: List[str] = []
+    resource_count: List[int] = []
+    budget_limit: List[float] = []
+    compliance_count: List[int] = []
+    for plan in plans:
+        if isinstance(plan, dict):
+            env, risk_level, resources, budget, compliance = (
+                plan["environment"], plan["risk_level"], plan["resources"], plan.get("budget_limit"),
+                plan.get("compliance_requirements", ())
+            )
+        else:
+            env, risk_level, resources, budget, compliance = (
+                plan.environment, plan.risk_level, plan.resources, plan.budget_limit,
+                plan.compliance_requirements
+            )
+        environment.append(env)
+        requested_risk_level.append(getattr(risk_level, "value", risk_level))
+        resource_count.append(len(resources))
+        budget_limit.append(np.nan if budget is None else budget)
+        compliance_count.append(len(compliance))
+
+    return PlanColumns(
+        environment=np.array(environment, dtype=str),
+        requested_risk_level=np.array(requested_risk_level, dtype=str),
+        resource_count=np.array(resource_count, dtype=np.int64),
+        budget_limit=np.array(budget_limit, dtype=np.float64),
+        compliance_count=np.array(compliance_count, dtype=np.int64),
+    )
+
+
+def _round_like_python(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Round as Python's round() does
+
+    np.round scales by 10**digits and can differ in the last place, so the
+    few distinct values are rounded with round() and broadcast back.
+    """
+    unique, inverse = np.unique(values, return_inverse=True)
+    return np.array([round(value, digits) for value in unique.tolist()], dtype=np.float64)[inverse]
+
+
+def score_plans(columns: PlanColumns, rules: Optional[AgentRules] = None) -> Dict[str, np.ndarray]:
+    """
+    Risk score, risk level and cost estimate for every plan
+
+    Returns:
+        Arrays keyed by score, level, monthly, yearly, environment_multiplier
+        and compliance_multiplier, aligned with the input plans
+    """
+    rules = rules or get_rules()
+
+    # Plans sharing a combination of rule regions share a score
+    inverse, masks = rules.risk.batch_masks(columns.fields(), len(columns))
+    combo_scores = [sum(rule.effect.get("score", 0) for rule in rules.risk.matching(mask)) for mask in masks]
+    score = np.array(combo_scores, dtype=np.int64)[inverse]
+    level = np.array([rules.risk_level(value) for value in combo_scores])[inverse]
+
+    environments, env_inverse = np.unique(columns.environment, return_inverse=True)
+    environment_multiplier = np.array(
+        [ENVIRONMENT_MULTIPLIERS.get(env, DEFAULT_ENVIRONMENT_MULTIPLIER) for env in environments.tolist()], dtype=np.float64
+    )[env_inverse.reshape(-1)]
+    compliance_multiplier = 1.0 + columns.compliance_count * COMPLIANCE_MULTIPLIER_STEP
+    # Same operation order as the scalar path so every float matches bit for bit
+    monthly = (BASE_COST * columns.resource_count) * environment_multiplier * compliance_multiplier
+
+    return {
+        "score": score,
+        "level": level,
+        "monthly": _round_like_python(monthly, 2),
+        "yearly": _round_like_python(monthly * 12, 2),
+        "environment_multiplier": environment_multiplier,
+        "compliance_multiplier": compliance_multiplier,
+    }
@@ -0,0 +1,99 @@
+"""
+Batch plan scoring benchmark
+
+Times the vectorized score_plans pass against calling assess_risk and
+calculate_cost_estimate per plan, and asserts both produce identical
+scores, levels and cost estimates.
+
+Run from apps/agent:
+
+    python benchmarks/bench_batch_scoring.py --plans 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_scoring import score_plans, to_columns  # noqa: E402
+from main import ProvisionPlan, assess_risk, calculate_cost_estimate  # noqa: E402
+
+ENVIRONMENTS = ["dev", "staging", "prod", "qa", "sandbox"]
+# Includes the falsy and boundary budgets the scalar rules branch on
+BUDGETS = [None, 0, 0.0, 500, 999.99, 1000, 1000.01, 25000, -1]
+COMPLIANCE = ["soc2", "gdpr", "hipaa", "pci", "iso27001", "fedramp"]
+
+
+def make_plans(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        ProvisionPlan(
+            project=f"project-{i}",
+            resources={f"r{j}": {} for j in range(rng.randint(0, 15))},
+            risk_level=rng.choice(["low", "medium", "high", "critical"]),
+            environment=rng.choice(ENVIRONMENTS),
+            budget_limit=rng.choice(BUDGETS),
+            compliance_requirements=rng.sample(COMPLIANCE, rng.randint(0, len(COMPLIANCE))),
+        )
+        for i in range(count)
+    ]
+
+
+async def scalar_results(plans: list) -> list:
+    """Reference results from the per-plan functions in main.py"""
+    results = []
+    for plan in plans:
+        risk = await assess_risk(plan)
+        cost = await calculate_cost_estimate(plan)
+        results.append((
+            risk["score"], risk["level"], cost["monthly"], cost["yearly"],
+            cost["breakdown"]["environment_multiplier"], cost["breakdown"]["compliance_multiplier"]
+        ))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plans", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = []
+    for count in args.plans:
+        plans = make_plans(count, args.seed)
+
+        started = time.perf_counter()
+        columns = to_columns(plans)
+        columnarize = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = score_plans(columns)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = asyncio.run(scalar_results(plans))
+        scalar = time.perf_counter() - started
+
+        actual = list(zip(*(batch[key].tolist() for key in (
+            "score", "level", "monthly", "yearly", "environment_multiplier", "compliance_multiplier"
+        ))))
+        mismatches = sum(a != e for a, e in zip(actual, expected))
+        assert mismatches == 0, f"{mismatches} plans differ from the scalar functions"
+
+        results.append({
+            "plans": count,
+            "columnarize_ms": round(columnarize * 1000, 2),
+            "vectorized_ms": round(vectorized * 1000, 2),
+            "scalar_ms": round(scalar * 1000, 2),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Rule evaluator benchmark
+
+Compiles synthetic rule tables of increasing size, checks the indexed
+evaluator against a linear scan of every rule, and times evaluation per
+plan context along with a hot reload of the rules file.
+
+Run from apps/agent:
+
+    python benchmarks/bench_rules.py --rules 10 100 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules import RulesLoader, load_rules  # noqa: E402
+
+ENVIRONMENTS = ["dev", "staging", "prod", "qa", "sandbox"]
+RISK_LEVELS = ["low", "medium", "high", "critical"]
+
+
+def make_rule(rng: random.Random, i: int) -> dict:
+    when = {}
+    if rng.random() < 0.5:
+        when["environment"] = rng.choice(ENVIRONMENTS) if rng.random() < 0.7 else {"in": rng.sample(ENVIRONMENTS, 2)}
+    if rng.random() < 0.3:
+        when["requested_risk_level"] = {"ne": rng.choice(RISK_LEVELS)}
+    if rng.random() < 0.6:
+        low = rng.randint(0, 12)
+        when["resource_count"] = {"gt": low, "lte": low + rng.randint(1, 8)}
+    if rng.random() < 0.4:
+        when["budget_limit"] = {rng.choice(["lt", "gte"]): rng.choice([250, 500, 1000, 5000, 20000])}
+    if rng.random() < 0.4:
+        when["compliance_count"] = {rng.choice(["gt", "lte", "eq"]): rng.randint(0, 5)}
+    return {"id": f"rule-{i}", "when": when, "score": rng.randint(1, 20), "factor": f"Factor {i}"}
+
+
+def make_document(rng: random.Random, count: int) -> dict:
+    return {
+        "risk": {
+            "levels": [{"level": "high", "min_score": 30}, {"level": "low", "min_score": 0}],
+            "rules": [make_rule(rng, i) for i in range(count)],
+        }
+    }
+
+
+def make_contexts(rng: random.Random, count: int) -> list:
+    return [
+        {
+            "environment": rng.choice(ENVIRONMENTS),
+            "requested_risk_level": rng.choice(RISK_LEVELS),
+            "resource_count": rng.randint(0, 25),
+            "budget_limit": rng.choice([None, 0, 100, 500, 999.5, 1000, 4000, 20000, 50000]),
+            "compliance_count": rng.randint(0, 6),
+        }
+        for _ in range(count)
+    ]
+
+
+def linear_scan(rules, context) -> list:
+    """Reference evaluator: test every condition of every rule"""
+    return [
+        rule for rule in rules
+        if all(rule.holds(field, context.get(field)) for field in rule.conditions)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--contexts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    contexts = make_contexts(rng, args.contexts)
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "agent_rules.yaml")
+
+        for count in args.rules:
+            with open(path, "w") as f:
+                yaml.safe_dump(make_document(rng, count), f)
+
+            started = time.perf_counter()
+            ruleset = load_rules(path).risk
+            compile_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            indexed = [ruleset.match(context) for context in contexts]
+            indexed_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            expected = [linear_scan(ruleset.rules, context) for context in contexts]
+            linear_seconds = time.perf_counter() - started
+
+            assert indexed == expected, "Indexed evaluator disagrees with a linear scan"
+
+            # Hot reload: the background check recompiles a changed file
+            loader = RulesLoader(path)
+            before = loader.get()
+            with open(path, "w") as f:
+                yaml.safe_dump(make_document(rng, count), f)
+            os.utime(path, (time.time() + 1, time.time() + 1))
+            started = time.perf_counter()
+            loader.reload()
+            reload_seconds = time.perf_counter() - started
+            assert loader.get() is not before
+
+            results.append({
+                "rules": count,
+                "compile_ms": round(compile_seconds * 1000, 2),
+                "reload_ms": round(reload_seconds * 1000, 2),
+                "indexed_us_per_plan": round(indexed_seconds / len(contexts) * 1e6, 2),
+                "linear_us_per_plan": round(linear_seconds / len(contexts) * 1e6, 2),
+                "avg_matches": round(sum(map(len, indexed)) / len(contexts), 2),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
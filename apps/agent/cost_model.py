@@ -0,0 +1,20 @@
+"""
+Mock cost model for Allstar Forge Agent Service
+
+Provides:
+- Base monthly cost per resource
+- Per-environment and per-compliance-requirement multipliers
+
+Shared by calculate_cost_estimate in main.py and score_plans in
+batch_scoring.py, so the scalar and vectorized estimates cannot drift.
+"""
+
+from typing import Dict
+
+BASE_COST = 100
+
+ENVIRONMENT_MULTIPLIERS: Dict[str, float] = {"dev": 1.0, "staging": 1.5, "prod": 2.0}
+DEFAULT_ENVIRONMENT_MULTIPLIER = 1.0
+
+# Added to a multiplier of 1.0 for each compliance requirement
+COMPLIANCE_MULTIPLIER_STEP = 0.1
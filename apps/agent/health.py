@@ -0,0 +1,117 @@
+"""
+Readiness for Allstar Forge Agent Service
+
+Provides:
+- Readiness from the compiled decision rules, which the rules loader keeps
+  in memory, so probes never perform I/O
+- An optional Temporal check run by one background task per process on a
+  fixed interval, with the last result cached for probes
+- Required vs optional dependencies: a failed required check makes the
+  process unready, a failed optional one only reports it as degraded
+
+Temporal is checked only when TEMPORAL_ADDRESS is set.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+
+import structlog
+
+from rules import rules_loader
+
+logger = structlog.get_logger()
+
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+READINESS_REQUIRED: Set[str] = {
+    name.strip() for name in os.getenv("READINESS_REQUIRED", "rules").split(",") if name.strip()
+}
+TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "")
+
+# A cached Temporal result older than this many intervals means the checker is stuck
+STALE_AFTER_INTERVALS = 3
+
+
+async def check_temporal() -> None:
+    """Temporal frontend accepts TCP connections"""
+    host, _, port = TEMPORAL_ADDRESS.rpartition(":")
+    _, writer = await asyncio.open_connection(host or TEMPORAL_ADDRESS, int(port or 7233))
+    writer.close()
+    await writer.wait_closed()
+
+
+class HealthChecker:
+    """Rules readiness plus a cached background Temporal check"""
+
+    def __init__(self, required: Set[str], temporal: bool = bool(TEMPORAL_ADDRESS)) -> None:
+        self.required = required
+        self.temporal = temporal
+        self.temporal_result: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._checked_at = 0.0
+
+    def start(self) -> None:
+        if self.temporal and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def refresh(self) -> None:
+        """Check Temporal once and cache the result"""
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check_temporal(), HEALTH_CHECK_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            error = f"timed out after {HEALTH_CHECK_TIMEOUT_SECONDS}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        if self.temporal_result is None or (self.temporal_result["status"] == "up") != (error is None):
+            log = logger.info if error is None else logger.warning
+            log("Dependency health changed", dependency="temporal", up=error is None, error=error)
+        self.temporal_result = {
+            "status": "up" if error is None else "down",
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            **({"error": error} if error else {}),
+        }
+        self._checked_at = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cached readiness report; never performs I/O"""
+        checks = {"rules": {"status": "up" if rules_loader.loaded else "down"}}
+        if self.temporal:
+            if self.temporal_result is None:
+                return {"status": "starting", "ready": False, "checks": {}}
+            checks["temporal"] = self.temporal_result
+        stale_after = HEALTH_CHECK_INTERVAL_SECONDS * STALE_AFTER_INTERVALS
+        stale = self.temporal and time.monotonic() - self._checked_at > stale_after
+        down = {name for name, check in checks.items() if check["status"] != "up"}
+        ready = not stale and not (down & self.required)
+        if stale:
+            status = "stale"
+        elif not ready:
+            status = "unavailable"
+        elif down:
+            status = "degraded"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "ready": ready,
+            "checks": {name: {**check, "required": name in self.required} for name, check in checks.items()},
+        }
+
+
+checker = HealthChecker(required=READINESS_REQUIRED)
@@ -9,7 +9,9 @@ Provides intelligent agentic workflows for:
 - Security policy enforcement
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -18,6 +20,11 @@ import structlog
 import asyncio
 from enum import Enum
 
+from batch_scoring import score_plans, to_columns
+from cost_model import BASE_COST, COMPLIANCE_MULTIPLIER_STEP, DEFAULT_ENVIRONMENT_MULTIPLIER, ENVIRONMENT_MULTIPLIERS
+from rules import get_rules, rules_loader
+from health import checker as health_checker
+
 # Configure structured logging
 structlog.configure(
     processors=[
@@ -33,10 +40,22 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background dependency checks and rules reloads off the request path"""
+    rules_loader.start()
+    health_checker.start()
+    yield
+    await health_checker.stop()
+    await rules_loader.stop()
+
+
 app = FastAPI(
     title="Allstar Forge Agent Service",
     description="Intelligent agentic workflows for infrastructure automation",
     version="1.0.0",
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -90,6 +109,20 @@ class ApprovalResponse(BaseModel):
     comments: Optional[str]
 
 
+class BatchScoreRequest(BaseModel):
+    """Request model for scoring many plans at once"""
+    plans: List[ProvisionPlan] = Field(..., min_length=1, max_length=100000)
+
+
+class BatchScoreResult(BaseModel):
+    """Risk and cost estimate of one plan in a batch"""
+    project: str
+    risk_score: int
+    risk_level: str
+    monthly_cost: float
+    yearly_cost: float
+
+
 # In-memory storage for demo purposes (use database in production)
 pending_approvals: Dict[str, Dict[str, Any]] = {}
 provision_plans: Dict[str, Dict[str, Any]] = {}
@@ -168,6 +201,34 @@ async def create_provision_plan(plan: ProvisionPlan) -> ProvisionResponse:
         raise HTTPException(status_code=500, detail="Failed to create provision plan")
 
 
+@app.post("/agent/provision/score", response_model=List[BatchScoreResult])
+async def score_provision_plans(request: BatchScoreRequest) -> List[Dict[str, Any]]:
+    """
+    Score many provisioning plans in one vectorized pass
+
+    Used for bulk re-evaluation of existing projects; results match the
+    per-plan risk assessment and cost estimate of /agent/provision/plan.
+    """
+    results = score_plans(to_columns(request.plans))
+    logger.info("Scored provision plans", count=len(request.plans))
+    return [
+        {
+            "project": plan.project,
+            "risk_score": score,
+            "risk_level": level,
+            "monthly_cost": monthly,
+            "yearly_cost": yearly
+        }
+        for plan, score, level, monthly, yearly in zip(
+            request.plans,
+            results["score"].tolist(),
+            results["level"].tolist(),
+            results["monthly"].tolist(),
+            results["yearly"].tolist()
+        )
+    ]
+
+
 @app.post("/agent/approval", response_model=ApprovalResponse)
 async def process_approval(approval: ApprovalRequest) -> ApprovalResponse:
     """
@@ -242,72 +303,46 @@ async def get_plan_status(plan_id: str) -> Dict[str, Any]:
 
 
 # Helper functions for intelligent decision making
+# Risk, compliance, approval and recommendation rules live in
+# packages/rules/agent_rules.yaml; see rules.py
+
+def plan_context(plan: ProvisionPlan, **derived: Any) -> Dict[str, Any]:
+    """Plan fields as seen by the rule tables, plus derived values such as risk_score"""
+    return {
+        "environment": plan.environment,
+        "requested_risk_level": RiskLevel(plan.risk_level).value,
+        "resource_count": len(plan.resources),
+        "budget_limit": plan.budget_limit,
+        "compliance_count": len(plan.compliance_requirements),
+        **derived
+    }
+
 
 async def assess_risk(plan: ProvisionPlan) -> Dict[str, Any]:
     """Assess risk level of the provisioning request"""
-    risk_factors = []
-    risk_score = 0
-    
-    # Environment risk
-    if plan.environment == "prod":
-        risk_score += 30
-        risk_factors.append("Production environment")
-    elif plan.environment == "staging":
-        risk_score += 10
-        risk_factors.append("Staging environment")
-    
-    # Resource complexity
-    resource_count = len(plan.resources)
-    if resource_count > 10:
-        risk_score += 20
-        risk_factors.append("High resource complexity")
-    elif resource_count > 5:
-        risk_score += 10
-        risk_factors.append("Medium resource complexity")
-    
-    # Cost risk
-    if plan.budget_limit and plan.budget_limit < 1000:
-        risk_score += 15
-        risk_factors.append("Low budget constraint")
-    
-    # Compliance requirements
-    if len(plan.compliance_requirements) > 3:
-        risk_score += 20
-        risk_factors.append("Multiple compliance requirements")
-    
-    # Determine risk level
-    if risk_score >= 50:
-        risk_level = "critical"
-    elif risk_score >= 30:
-        risk_level = "high"
-    elif risk_score >= 15:
-        risk_level = "medium"
-    else:
-        risk_level = "low"
+    rules = get_rules()
+    matched = rules.risk.match(plan_context(plan))
+    risk_score = sum(rule.effect.get("score", 0) for rule in matched)
     
     return {
         "score": risk_score,
-        "level": risk_level,
-        "factors": risk_factors,
-        "recommendations": [
-            "Review resource specifications",
-            "Validate compliance requirements",
-            "Consider staging deployment first"
-        ]
+        "level": rules.risk_level(risk_score),
+        "factors": [rule.effect["factor"] for rule in matched if "factor" in rule.effect],
+        "recommendations": list(rules.risk_recommendations)
     }
 
 
 async def calculate_cost_estimate(plan: ProvisionPlan) -> Dict[str, Any]:
     """Calculate estimated costs for the provisioning request"""
     # Mock cost calculation (integrate with real cost estimation service)
-    base_cost = 100  # Base cost per resource
+    base_cost = BASE_COST  # Base cost per resource
     resource_count = len(plan.resources)
     
     # Environment multiplier
-    env_multiplier = {"dev": 1.0, "staging": 1.5, "prod": 2.0}.get(plan.environment, 1.0)
+    env_multiplier = ENVIRONMENT_MULTIPLIERS.get(plan.environment, DEFAULT_ENVIRONMENT_MULTIPLIER)
     
     # Compliance multiplier
-    compliance_multiplier = 1.0 + (len(plan.compliance_requirements) * 0.1)
+    compliance_multiplier = 1.0 + (len(plan.compliance_requirements) * COMPLIANCE_MULTIPLIER_STEP)
     
     estimated_monthly = base_cost * resource_count * env_multiplier * compliance_multiplier
     estimated_yearly = estimated_monthly * 12
@@ -327,23 +362,15 @@ async def calculate_cost_estimate(plan: ProvisionPlan) -> Dict[str, Any]:
 
 async def check_compliance(plan: ProvisionPlan) -> Dict[str, Any]:
     """Check compliance requirements and status"""
+    standards = get_rules().compliance
     compliance_status = {}
     
     for requirement in plan.compliance_requirements:
-        if requirement.lower() == "soc2":
-            compliance_status["soc2"] = {
-                "status": "compliant",
-                "checks": ["encryption_at_rest", "access_logging", "data_retention"]
-            }
-        elif requirement.lower() == "gdpr":
-            compliance_status["gdpr"] = {
-                "status": "compliant",
-                "checks": ["data_protection", "consent_management", "right_to_erasure"]
-            }
-        elif requirement.lower() == "hipaa":
-            compliance_status["hipaa"] = {
-                "status": "compliant",
-                "checks": ["encryption_in_transit", "access_controls", "audit_logging"]
+        standard = standards.get(requirement.lower())
+        if standard is not None:
+            compliance_status[requirement.lower()] = {
+                "status": standard.get("status", "compliant"),
+                "checks": list(standard.get("checks", []))
             }
     
     return {
@@ -361,23 +388,11 @@ def determine_approval_requirement(
     cost_estimate: Dict[str, Any]
 ) -> bool:
     """Determine if human approval is required"""
-    # Always require approval for high/critical risk
-    if plan.risk_level in ["high", "critical"]:
-        return True
-    
-    # Require approval for high risk score
-    if risk_assessment.get("score", 0) >= 30:
-        return True
-    
-    # Require approval for high cost
-    if cost_estimate.get("monthly", 0) > 1000:
-        return True
-    
-    # Require approval for production environment
-    if plan.environment == "prod":
-        return True
-    
-    return False
+    return get_rules().approval.any(plan_context(
+        plan,
+        risk_score=risk_assessment.get("score", 0),
+        monthly_cost=cost_estimate.get("monthly", 0)
+    ))
 
 
 async def generate_recommendations(
@@ -386,29 +401,12 @@ async def generate_recommendations(
     cost_estimate: Dict[str, Any]
 ) -> List[str]:
     """Generate intelligent recommendations for the provisioning request"""
-    recommendations = []
-    
-    # Risk-based recommendations
-    if risk_assessment.get("score", 0) > 20:
-        recommendations.append("Consider implementing additional monitoring and alerting")
-        recommendations.append("Review security configurations before deployment")
-    
-    # Cost-based recommendations
-    if cost_estimate.get("monthly", 0) > 500:
-        recommendations.append("Consider using spot instances for non-critical workloads")
-        recommendations.append("Implement auto-scaling to optimize costs")
-    
-    # Environment-based recommendations
-    if plan.environment == "prod":
-        recommendations.append("Ensure backup and disaster recovery procedures are in place")
-        recommendations.append("Implement blue-green deployment strategy")
-    
-    # Compliance recommendations
-    if len(plan.compliance_requirements) > 0:
-        recommendations.append("Schedule compliance review after deployment")
-        recommendations.append("Ensure audit logging is enabled for all resources")
-    
-    return recommendations
+    matched = get_rules().recommendations.match(plan_context(
+        plan,
+        risk_score=risk_assessment.get("score", 0),
+        monthly_cost=cost_estimate.get("monthly", 0)
+    ))
+    return [recommendation for rule in matched for recommendation in rule.effect.get("add", [])]
 
 
 def determine_next_steps(approval_required: bool, risk_level: RiskLevel) -> List[str]:
@@ -440,7 +438,7 @@ async def trigger_provisioning_workflow(plan_id: str, plan_data: Dict[str, Any])
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness probe: the process is serving requests; performs no I/O"""
     return {
         "status": "healthy",
         "service": "agent",
@@ -450,3 +448,13 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: cached dependency status from the background checker"""
+    report = health_checker.readiness()
+    return JSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content={**report, "service": "agent", "version": "1.0.0"}
+    )
+
+
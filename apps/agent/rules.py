@@ -0,0 +1,379 @@
+"""
+Declarative decision rules for the agent
+
+Provides:
+- Loading of risk, compliance, approval and recommendation rules from
+  packages/rules/agent_rules.yaml
+- Compilation of each rule set into per-field lookup indexes, so evaluating
+  a plan costs a dict lookup or bisection per field regardless of rule count
+- Vectorized region lookups used by batch scoring
+- Hot reload when the rules file changes, keeping the last good rules if a
+  new version fails to compile. A background task stats and recompiles the
+  file in a worker thread and swaps in the new rules; request handlers only
+  read the current rules
+"""
+
+import asyncio
+import bisect
+import math
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+import yaml
+
+logger = structlog.get_logger()
+
+AGENT_RULES = os.getenv(
+    "AGENT_RULES",
+    str(Path(__file__).resolve().parent.parent.parent / "packages" / "rules" / "agent_rules.yaml")
+)
+RULES_RELOAD_SECONDS = float(os.getenv("RULES_RELOAD_SECONDS", "5"))
+
+# Fields rules may reference, by kind
+CATEGORY_FIELDS = ("environment", "requested_risk_level")
+NUMBER_FIELDS = ("resource_count", "budget_limit", "compliance_count", "risk_score", "monthly_cost")
+
+OPERATORS = {
+    "eq": lambda value, operand: value == operand,
+    "ne": lambda value, operand: value != operand,
+    "in": lambda value, operand: value in operand,
+    "not_in": lambda value, operand: value not in operand,
+    "gt": lambda value, operand: value > operand,
+    "gte": lambda value, operand: value >= operand,
+    "lt": lambda value, operand: value < operand,
+    "lte": lambda value, operand: value <= operand,
+}
+
+
+class RuleError(ValueError):
+    """Raised when a rules file is malformed"""
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One declarative rule: conditions per field and the rule's effect"""
+    id: str
+    conditions: Dict[str, Dict[str, Any]]
+    effect: Dict[str, Any]
+
+    def holds(self, field: str, value: Any) -> bool:
+        """Whether the rule's condition on field accepts value"""
+        condition = self.conditions.get(field)
+        if condition is None:
+            return True
+        if value is None:
+            return False
+        return all(OPERATORS[op](value, operand) for op, operand in condition.items())
+
+
+class _Unlisted:
+    """Stands in for category values that no rule mentions"""
+
+
+class FieldIndex:
+    """
+    Precomputed rule bitmasks for one field
+
+    Category fields map each value mentioned by a rule to the mask of rules
+    it satisfies. Number fields split the number line at every threshold
+    into points and open intervals and store one mask per region, found by
+    bisection. Unset values match only rules without a condition on the field.
+    """
+
+    def __init__(self, field: str, rules: Sequence[Rule]) -> None:
+        self.field = field
+        self.numeric = field in NUMBER_FIELDS
+        constrained = [(i, rule) for i, rule in enumerate(rules) if field in rule.conditions]
+        self.unset_mask = _mask(rules, lambda rule: field not in rule.conditions)
+
+        operands = set()
+        for _, rule in constrained:
+            for operand in rule.conditions[field].values():
+                operands.update(operand if isinstance(operand, (list, tuple)) else [operand])
+
+        def accepting(value: Any) -> int:
+            mask = self.unset_mask
+            for i, rule in constrained:
+                if rule.holds(field, value):
+                    mask |= 1 << i
+            return mask
+
+        if self.numeric:
+            self.thresholds = sorted(float(operand) for operand in operands)
+            self.region_masks = [accepting(value) for value in _region_representatives(self.thresholds)]
+        else:
+            self.values = sorted(operands)
+            self.value_masks = {value: accepting(value) for value in self.values}
+            self.unlisted_mask = accepting(_Unlisted())
+
+    def lookup(self, value: Any) -> int:
+        """Mask of rules whose condition on this field accepts value"""
+        if value is None:
+            return self.unset_mask
+        if not self.numeric:
+            return self.value_masks.get(value, self.unlisted_mask)
+        if isinstance(value, float) and math.isnan(value):
+            return self.unset_mask
+        i = bisect.bisect_left(self.thresholds, value)
+        on_threshold = i < len(self.thresholds) and self.thresholds[i] == value
+        return self.region_masks[2 * i + on_threshold]
+
+    def regions(self, values: np.ndarray) -> Tuple[np.ndarray, List[int]]:
+        """
+        Vectorized lookup
+
+        Returns:
+            A region index per value and the mask of each region index
+        """
+        if self.numeric:
+            values = np.asarray(values, dtype=np.float64)
+            thresholds = np.asarray(self.thresholds, dtype=np.float64)
+            i = np.searchsorted(thresholds, values, side="left")
+            on_threshold = (i < len(thresholds)) & (thresholds[np.minimum(i, len(thresholds) - 1)] == values) \
+                if len(thresholds) else np.zeros(len(values), dtype=bool)
+            region = 2 * i + on_threshold
+            region = np.where(np.isnan(values), len(self.region_masks), region)
+            return region, self.region_masks + [self.unset_mask]
+
+        values = np.asarray(values)
+        region = np.full(len(values), len(self.values), dtype=np.int64)
+        for k, value in enumerate(self.values):
+            region[values == value] = k
+        if values.dtype == object:
+            region[np.equal(values, None)] = len(self.values) + 1
+        return region, [self.value_masks[value] for value in self.values] + [self.unlisted_mask, self.unset_mask]
+
+
+def _mask(rules: Sequence[Rule], predicate) -> int:
+    mask = 0
+    for i, rule in enumerate(rules):
+        if predicate(rule):
+            mask |= 1 << i
+    return mask
+
+
+def _region_representatives(thresholds: List[float]) -> Iterator[float]:
+    """One value inside each region: below, at and between every threshold"""
+    if not thresholds:
+        yield 0.0
+        return
+    yield thresholds[0] - 1
+    for i, threshold in enumerate(thresholds):
+        yield threshold
+        yield (threshold + thresholds[i + 1]) / 2 if i + 1 < len(thresholds) else threshold + 1
+
+
+class RuleSet:
+    """A compiled, ordered list of rules"""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = list(rules)
+        self.all_mask = (1 << len(self.rules)) - 1
+        fields = {field for rule in self.rules for field in rule.conditions}
+        # Most selective fields first so evaluation can stop early
+        self.indexes = sorted(
+            (FieldIndex(field, self.rules) for field in fields),
+            key=lambda index: index.unset_mask.bit_count()
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def mask(self, context: Dict[str, Any]) -> int:
+        """Mask of the rules matching context"""
+        mask = self.all_mask
+        for index in self.indexes:
+            mask &= index.lookup(context.get(index.field))
+            if not mask:
+                break
+        return mask
+
+    def matching(self, mask: int) -> Iterator[Rule]:
+        """Rules in mask, in file order"""
+        while mask:
+            low = mask & -mask
+            yield self.rules[low.bit_length() - 1]
+            mask ^= low
+
+    def match(self, context: Dict[str, Any]) -> List[Rule]:
+        return list(self.matching(self.mask(context)))
+
+    def any(self, context: Dict[str, Any]) -> bool:
+        return self.mask(context) != 0
+
+    def batch_masks(self, columns: Dict[str, np.ndarray], count: int) -> Tuple[np.ndarray, List[int]]:
+        """
+        Match many contexts given as columns
+
+        Contexts are grouped by their combination of field regions, so each
+        distinct combination is resolved once.
+
+        Returns:
+            An index per context into the returned list of distinct masks
+        """
+        if not self.indexes:
+            return np.zeros(count, dtype=np.int64), [self.all_mask]
+        lookups = []
+        for index in self.indexes:
+            if index.field not in columns:
+                raise RuleError(f"Batch columns are missing field {index.field!r}")
+            lookups.append(index.regions(columns[index.field]))
+        # Pack each context's regions into one mixed-radix key
+        keys = np.zeros(count, dtype=np.int64)
+        for region, region_masks in lookups:
+            keys = keys * len(region_masks) + region
+        combos, inverse = np.unique(keys, return_inverse=True)
+        masks = []
+        for key in combos.tolist():
+            mask = self.all_mask
+            for _, region_masks in reversed(lookups):
+                key, region = divmod(key, len(region_masks))
+                mask &= region_masks[region]
+            masks.append(mask)
+        return inverse.reshape(-1), masks
+
+
+@dataclass(frozen=True)
+class AgentRules:
+    """All compiled agent rules from one version of the rules file"""
+    risk: RuleSet
+    risk_levels: Tuple[Tuple[str, float], ...]
+    risk_recommendations: Tuple[str, ...]
+    compliance: Dict[str, Dict[str, Any]]
+    approval: RuleSet
+    recommendations: RuleSet
+
+    def risk_level(self, score: float) -> str:
+        for level, min_score in self.risk_levels:
+            if score >= min_score:
+                return level
+        return self.risk_levels[-1][0]
+
+
+def _parse_rules(section: Dict[str, Any], name: str) -> List[Rule]:
+    rules = []
+    for i, raw in enumerate(section.get("rules") or []):
+        rule_id = str(raw.get("id", f"{name}-{i}"))
+        conditions = {}
+        for field, condition in (raw.get("when") or {}).items():
+            if field not in CATEGORY_FIELDS and field not in NUMBER_FIELDS:
+                raise RuleError(f"Rule {rule_id!r} references unknown field {field!r}")
+            if not isinstance(condition, dict):
+                condition = {"eq": condition}
+            allowed = OPERATORS if field in NUMBER_FIELDS else ("eq", "ne", "in", "not_in")
+            unknown = set(condition) - set(allowed)
+            if unknown:
+                raise RuleError(f"Rule {rule_id!r} uses operators {sorted(unknown)} not supported on {field!r}")
+            conditions[field] = condition
+        effect = {key: value for key, value in raw.items() if key not in ("id", "when")}
+        rules.append(Rule(id=rule_id, conditions=conditions, effect=effect))
+    return rules
+
+
+def compile_rules(raw: Dict[str, Any]) -> AgentRules:
+    """Compile a parsed rules document"""
+    risk = raw.get("risk") or {}
+    levels = sorted(
+        ((str(level["level"]), float(level["min_score"])) for level in risk.get("levels") or []),
+        key=lambda level: level[1],
+        reverse=True
+    )
+    if not levels:
+        raise RuleError("risk.levels must define at least one level")
+
+    return AgentRules(
+        risk=RuleSet(_parse_rules(risk, "risk")),
+        risk_levels=tuple(levels),
+        risk_recommendations=tuple(risk.get("recommendations") or ()),
+        compliance={str(name).lower(): spec for name, spec in (raw.get("compliance") or {}).items()},
+        approval=RuleSet(_parse_rules(raw.get("approval") or {}, "approval")),
+        recommendations=RuleSet(_parse_rules(raw.get("recommendations") or {}, "recommendations")),
+    )
+
+
+def load_rules(path: str = AGENT_RULES) -> AgentRules:
+    with open(path) as f:
+        return compile_rules(yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {})
+
+
+class RulesLoader:
+    """Holds the current rules and recompiles them when the file changes"""
+
+    def __init__(self, path: str = AGENT_RULES, check_interval: float = RULES_RELOAD_SECONDS) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rules: Optional[AgentRules] = None
+        self._mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._rules is not None
+
+    def get(self) -> AgentRules:
+        """Current rules; loads them on first use, never checks the file afterwards"""
+        if self._rules is None:
+            self.reload()
+        return self._rules
+
+    def reload(self) -> None:
+        """Recompile the rules if the file changed since the last check (blocking)"""
+        with self._lock:
+            self._reload_if_changed()
+
+    def start(self) -> None:
+        """Load the rules and check the file every interval in the background; 0 disables reloads"""
+        self.get()
+        if self.check_interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                # stat and compile off the event loop; the swap is one attribute assignment
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error("Rules reload check failed", path=self.path, error=str(e))
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if self._rules is None:
+                raise
+            logger.error("Rules file unavailable, keeping current rules", path=self.path, error=str(e))
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            rules = load_rules(self.path)
+        except (OSError, yaml.YAMLError, RuleError, KeyError, TypeError, ValueError) as e:
+            if self._rules is None:
+                raise
+            logger.error("Failed to reload rules, keeping current rules", path=self.path, error=str(e))
+        else:
+            self._rules = rules
+            logger.info(
+                "Rules loaded", path=self.path, risk=len(rules.risk), approval=len(rules.approval),
+                recommendations=len(rules.recommendations), compliance=len(rules.compliance)
+            )
+        self._mtime = mtime
+
+
+rules_loader = RulesLoader()
+
+
+def get_rules() -> AgentRules:
+    return rules_loader.get()
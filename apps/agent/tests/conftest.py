@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Agent modules import flat from apps/agent, as in its Dockerfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+"""
+Parity of the vectorized score_plans with assess_risk and calculate_cost_estimate
+"""
+
+import asyncio
+import itertools
+import random
+
+import pytest
+
+from batch_scoring import score_plans, to_columns
+from main import ProvisionPlan, assess_risk, calculate_cost_estimate
+
+ENVIRONMENTS = ["dev", "staging", "prod", "qa", ""]
+# Includes the falsy and boundary budgets the risk rules branch on
+BUDGETS = [None, 0, 0.0, 500, 999.99, 1000, 1000.01, 25000, -1]
+COMPLIANCE = ["soc2", "gdpr", "hipaa", "pci", "iso27001", "fedramp"]
+RISK_LEVELS = ["low", "medium", "high", "critical"]
+FIELDS = ("score", "level", "monthly", "yearly", "environment_multiplier", "compliance_multiplier")
+
+
+def plan(index: int, resources: int, risk_level: str, environment: str, budget, compliance) -> ProvisionPlan:
+    return ProvisionPlan(
+        project=f"project-{index}",
+        resources={f"r{i}": {} for i in range(resources)},
+        risk_level=risk_level,
+        environment=environment,
+        budget_limit=budget,
+        compliance_requirements=list(compliance),
+    )
+
+
+def random_plans(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        plan(
+            i, rng.randint(0, 40), rng.choice(RISK_LEVELS), rng.choice(ENVIRONMENTS), rng.choice(BUDGETS),
+            rng.sample(COMPLIANCE, rng.randint(0, len(COMPLIANCE)))
+        )
+        for i in range(count)
+    ]
+
+
+def edge_case_plans() -> list:
+    """Every environment, budget and risk level, with empty, single and large resource sets"""
+    combinations = itertools.product([0, 1, 10, 1000], RISK_LEVELS, ENVIRONMENTS, BUDGETS, [(), COMPLIANCE])
+    return [plan(i, *combination) for i, combination in enumerate(combinations)]
+
+
+async def scalar_results(plans: list) -> list:
+    results = []
+    for item in plans:
+        risk = await assess_risk(item)
+        cost = await calculate_cost_estimate(item)
+        results.append((
+            risk["score"], risk["level"], cost["monthly"], cost["yearly"],
+            cost["breakdown"]["environment_multiplier"], cost["breakdown"]["compliance_multiplier"]
+        ))
+    return results
+
+
+def vectorized_results(plans: list) -> list:
+    batch = score_plans(to_columns(plans))
+    return list(zip(*(batch[key].tolist() for key in FIELDS)))
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_random_plans_match_scalar_functions(seed):
+    plans = random_plans(2000, seed)
+    assert vectorized_results(plans) == asyncio.run(scalar_results(plans))
+
+
+def test_edge_case_plans_match_scalar_functions():
+    plans = edge_case_plans()
+    assert vectorized_results(plans) == asyncio.run(scalar_results(plans))
+
+
+def test_dict_plans_match_model_plans():
+    plans = random_plans(200, 3)
+    dicts = [item.model_dump() for item in plans]
+    assert vectorized_results(dicts) == vectorized_results(plans)
@@ -0,0 +1,279 @@
+"""
+Request admission control for Allstar Forge Platform API
+
+Provides:
+- Token-bucket rate limiting per identity (oidc_auth sub) and route, kept
+  in process or shared across processes and replicas through Redis
+- Per-route rate overrides, e.g. tighter limits for policy validation
+- An adaptive concurrency limit in front of DB-bound routes that shrinks
+  when connection pool wait time climbs and sheds excess requests with 503
+  instead of letting them queue on the pool
+
+Rejected requests get 429 (rate limit) or 503 (overload) with Retry-After.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import structlog
+from fastapi import Depends, HTTPException, Request
+
+from auth import oidc_auth
+from db import DB_POOL_MAX_SIZE, pool_wait
+from health import REDIS_URL
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis_asyncio = None
+
+logger = structlog.get_logger()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# "memory" keeps buckets per process; "redis" shares them through REDIS_URL
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Comma-separated "METHOD /route/template=rps:burst" overrides
+RATE_LIMIT_ROUTES = os.getenv("RATE_LIMIT_ROUTES", "POST /api/v1/policies/validate=10:20")
+# Set by serve.py so in-process buckets split the limit across workers
+API_WORKER_COUNT = max(1, int(os.getenv("API_WORKER_COUNT", "1")))
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", str(max(2, DB_POOL_MAX_SIZE // 2))))
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(DB_POOL_MAX_SIZE * 4)))
+# Pool wait the limiter steers toward, and the wait beyond which it sheds outright
+ADMISSION_TARGET_WAIT_MS = float(os.getenv("ADMISSION_TARGET_WAIT_MS", "20"))
+ADMISSION_SHED_WAIT_MS = float(os.getenv("ADMISSION_SHED_WAIT_MS", "500"))
+
+# In-process buckets kept before idle (already full) ones are dropped, then
+# the least recently used ones
+MAX_MEMORY_BUCKETS = 100_000
+
+
+def parse_route_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse RATE_LIMIT_ROUTES into {"METHOD /path": (rps, burst)}"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        route, _, rate = item.rpartition("=")
+        rps, _, burst = rate.partition(":")
+        limits[" ".join(route.split())] = (float(rps), float(burst or rps))
+    return limits
+
+
+class MemoryTokenBuckets:
+    """Token buckets held in this process"""
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        # key -> (tokens, updated_at, full_at), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rps: float, burst: float) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+        tokens = min(burst, tokens + (now - updated) * rps)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rps
+        if key in self._buckets:
+            self._buckets.move_to_end(key)
+        elif len(self._buckets) >= self.max_buckets:
+            self._evict(now)
+        self._buckets[key] = (tokens, now, now + (burst - tokens) / rps)
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        # A bucket that has refilled is indistinguishable from a missing one
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        # Every key is still active; forgetting the stalest only hands it a fresh burst
+        while len(self._buckets) >= self.max_buckets:
+            self._buckets.popitem(last=False)
+
+
+# Refill and take in one round trip; server time keeps replicas consistent
+_REDIS_TAKE = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rps = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rps)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rps
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rps * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisTokenBuckets:
+    """Token buckets shared by every process through Redis"""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "ratelimit:") -> None:
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package")
+        if not url:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._take = self._client.register_script(_REDIS_TAKE)
+        self._failing = False
+
+    async def take(self, key: str, rps: float, burst: float) -> float:
+        try:
+            retry_after = float(await self._take(keys=[self.prefix + key], args=[rps, burst]))
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down with it
+            if not self._failing:
+                logger.warning("Rate limiter backend unavailable, allowing requests", error=str(e))
+                self._failing = True
+            return 0.0
+        if self._failing:
+            logger.info("Rate limiter backend recovered")
+            self._failing = False
+        return retry_after
+
+
+class RateLimiter:
+    """Per identity and route request rates"""
+
+    def __init__(
+        self,
+        buckets,
+        rps: float = RATE_LIMIT_RPS,
+        burst: float = RATE_LIMIT_BURST,
+        routes: Optional[Dict[str, Tuple[float, float]]] = None,
+        share: int = 1
+    ) -> None:
+        self.buckets = buckets
+        self.share = share
+        self.default = (rps, burst)
+        self.routes = routes or {}
+
+    def limits_for(self, route: str) -> Tuple[float, float]:
+        rps, burst = self.routes.get(route, self.default)
+        # Each of share processes enforces its part of the limit
+        return rps / self.share, max(1.0, burst / self.share)
+
+    async def check(self, identity: str, route: str) -> float:
+        rps, burst = self.limits_for(route)
+        return await self.buckets.take(f"{identity}|{route}", rps, burst)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit steered by connection pool wait time (AIMD)
+
+    Every completed request nudges the limit up by 1/limit while pool wait
+    stays under target, and cuts it by 10% (at most once per interval) when
+    wait exceeds it. Requests beyond the limit, or any request while wait is
+    past the shed threshold, are rejected immediately.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = ADMISSION_MIN_CONCURRENCY,
+        max_limit: int = ADMISSION_MAX_CONCURRENCY,
+        target_wait_ms: float = ADMISSION_TARGET_WAIT_MS,
+        shed_wait_ms: float = ADMISSION_SHED_WAIT_MS,
+        decrease_interval_seconds: float = 0.1
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.target_wait = target_wait_ms / 1000
+        self.shed_wait = shed_wait_ms / 1000
+        self.decrease_interval = decrease_interval_seconds
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.shed = 0
+        self._decreased_at = 0.0
+
+    def try_acquire(self) -> Optional[str]:
+        """Admit a request, or return why it is shed"""
+        if pool_wait.current() > self.shed_wait:
+            self.shed += 1
+            return "Database pool saturated"
+        if self.in_flight >= int(self.limit):
+            self.shed += 1
+            return "Too many concurrent requests"
+        self.in_flight += 1
+        return None
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        wait = pool_wait.current()
+        if wait > self.target_wait:
+            now = time.monotonic()
+            if now - self._decreased_at >= self.decrease_interval:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+                self._decreased_at = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "shed": self.shed,
+            "pool_wait_ms": round(pool_wait.current() * 1000, 2),
+        }
+
+
+def _route_key(request: Request) -> str:
+    route = request.scope.get("route")
+    return f"{request.method} {getattr(route, 'path', request.url.path)}"
+
+
+def _buckets():
+    return RedisTokenBuckets() if RATE_LIMIT_BACKEND == "redis" else MemoryTokenBuckets()
+
+
+rate_limiter = RateLimiter(
+    _buckets(),
+    routes=parse_route_limits(RATE_LIMIT_ROUTES),
+    share=API_WORKER_COUNT if RATE_LIMIT_BACKEND == "memory" else 1,
+)
+concurrency_limiter = AdaptiveConcurrencyLimiter()
+
+
+async def rate_limit(request: Request, user=Depends(oidc_auth)) -> None:
+    """Dependency: reject with 429 once the caller exceeds its rate for this route"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    retry_after = await rate_limiter.check(user["sub"], _route_key(request))
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+async def admit():
+    """Dependency: hold a concurrency slot for the endpoint, or shed with 503"""
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    reason = concurrency_limiter.try_acquire()
+    if reason:
+        raise HTTPException(status_code=503, detail=reason, headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        concurrency_limiter.release()
@@ -0,0 +1,554 @@
+"""
+Audit event retention for Allstar Forge Platform
+
+Provides:
+- A retention job that moves sealed audit batches older than
+  AUDIT_RETENTION_DAYS out of Postgres into zstd-compressed Parquet files
+  on local disk or S3-compatible object storage, streaming rows from a
+  cursor into bounded row groups
+- Verification of every batch digest before its rows are deleted, so only
+  intact, chained events leave the database
+- Reads of archived events for the audit query API: the files overlapping a
+  time range are scanned newest first, row groups are skipped by their
+  timestamp statistics and the scan stops once enough rows are found
+- Per-actor, action and resource counts of archived ranges for the audit
+  summary
+- Verification of archived batches from their files for
+  `python audit_chain.py verify`
+
+Archives hold whole sealed batches in chain order, one file per run of
+consecutive batches. Each file is recorded in audit_archives and its batches
+keep their audit_batches records pointing at it, so the hash chain stays
+verifiable across Postgres and the archive.
+
+Usage:
+    python audit_archive.py run                  # archive everything past retention now
+"""
+
+import argparse
+import asyncio
+import functools
+import heapq
+import ipaddress
+import itertools
+import json
+import operator
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+import structlog
+
+from audit_chain import CANONICAL_ROW_SQL, BatchDigests, canonical_row
+from db import close_pool, get_connection
+from jobs import PeriodicJob
+
+logger = structlog.get_logger()
+
+# Local path, file:// or s3:// URI (e.g. s3://audit/prod?endpoint_override=minio:9000&scheme=http);
+# archiving is disabled while unset
+AUDIT_ARCHIVE_URI = os.getenv("AUDIT_ARCHIVE_URI", "")
+AUDIT_RETENTION_DAYS = float(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+AUDIT_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("AUDIT_ARCHIVE_INTERVAL_SECONDS", "3600"))
+AUDIT_ARCHIVE_FILE_ROWS = int(os.getenv("AUDIT_ARCHIVE_FILE_ROWS", "500000"))
+AUDIT_ARCHIVE_ROW_GROUP_ROWS = int(os.getenv("AUDIT_ARCHIVE_ROW_GROUP_ROWS", "50000"))
+AUDIT_ARCHIVE_ZSTD_LEVEL = int(os.getenv("AUDIT_ARCHIVE_ZSTD_LEVEL", "6"))
+# Upper bound per run so the job does not hold a connection for long
+AUDIT_ARCHIVE_MAX_FILES_PER_RUN = int(os.getenv("AUDIT_ARCHIVE_MAX_FILES_PER_RUN", "4"))
+
+# Serialises archiving across processes and replicas
+AUDIT_ARCHIVE_LOCK_ID = 0xA4C41E
+# Batches considered per file; many small batches just make a smaller file
+MAX_BATCHES_PER_FILE = 20000
+
+# Columns returned by the audit query API, in its row order
+EVENT_COLUMNS = (
+    "id", "timestamp", "actor", "action", "resource", "resource_id", "success",
+    "metadata", "ip_address", "user_agent", "event_count", "first_seen", "last_seen",
+)
+
+# metadata and ip_address are stored as their Postgres text output, which
+# canonical_row reproduces the sealed digests from
+ARCHIVE_ROWS_SQL = f"""
+    SELECT
+        e.id::text AS id, e.timestamp, e.actor, e.action, e.resource, e.resource_id, e.success,
+        e.metadata::text AS metadata, e.ip_address::text AS ip_address, e.user_agent,
+        e.event_count, e.first_seen, e.last_seen, e.batch_id,
+        {CANONICAL_ROW_SQL} AS canonical
+    FROM audit_events e
+    WHERE e.batch_id BETWEEN $1 AND $2
+    ORDER BY e.batch_id, e.id
+"""
+
+# Archived metadata documents sent to Postgres per round trip
+METADATA_FILTER_CHUNK = 2000
+
+# Indexes (0-based) of archived metadata documents matching the metadata
+# filters, evaluated by Postgres so the semantics equal those of live rows
+ARCHIVED_METADATA_FILTER_SQL = """
+    SELECT COALESCE(array_agg(i - 1 ORDER BY i), '{}')
+    FROM unnest($1::text[]) WITH ORDINALITY AS m(doc, i)
+    WHERE ($2::jsonb IS NULL OR doc::jsonb @> $2::jsonb)
+      AND ($3::jsonpath IS NULL OR doc::jsonb @@ $3::jsonpath)
+"""
+
+
+def _require_pyarrow() -> Tuple[Any, Any, Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.fs as pafs
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Audit archives require pyarrow") from e
+    return pa, pc, pafs, pq
+
+
+def archive_schema() -> Any:
+    """Parquet schema of archive files"""
+    pa = _require_pyarrow()[0]
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", timestamp),
+        ("actor", pa.string()),
+        ("action", pa.string()),
+        ("resource", pa.string()),
+        ("resource_id", pa.string()),
+        ("success", pa.bool_()),
+        ("metadata", pa.string()),
+        ("ip_address", pa.string()),
+        ("user_agent", pa.string()),
+        ("event_count", pa.int32()),
+        ("first_seen", timestamp),
+        ("last_seen", timestamp),
+        ("batch_id", pa.int64()),
+    ])
+
+
+@functools.lru_cache(maxsize=1)
+def archive_store() -> Tuple[Any, str]:
+    """The filesystem and root path named by AUDIT_ARCHIVE_URI"""
+    if not AUDIT_ARCHIVE_URI:
+        raise RuntimeError("AUDIT_ARCHIVE_URI is not set")
+    pafs = _require_pyarrow()[2]
+    filesystem, root = pafs.FileSystem.from_uri(AUDIT_ARCHIVE_URI)
+    return filesystem, root.rstrip("/")
+
+
+async def _expired_batches(conn: asyncpg.Connection, cutoff: datetime) -> List[asyncpg.Record]:
+    """
+    The oldest unarchived batches, in chain order, that all ended before
+    cutoff and together fit in one archive file
+    """
+    selected: List[asyncpg.Record] = []
+    rows = 0
+    for batch in await conn.fetch("""
+        SELECT id, prev_digest, digest, row_count, first_event_at, last_event_at
+        FROM audit_batches
+        WHERE archive_id IS NULL
+        ORDER BY id
+        LIMIT $1
+    """, MAX_BATCHES_PER_FILE):
+        if batch["last_event_at"] >= cutoff or (selected and rows + batch["row_count"] > AUDIT_ARCHIVE_FILE_ROWS):
+            break
+        selected.append(batch)
+        rows += batch["row_count"]
+    return selected
+
+
+def _write_row_group(writer: Any, schema: Any, columns: Dict[str, List[Any]]) -> None:
+    pa = _require_pyarrow()[0]
+    writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+
+
+def _remove(filesystem: Any, path: str) -> None:
+    try:
+        filesystem.delete_file(path)
+    except OSError:
+        pass
+
+
+async def archive_next_file(conn: asyncpg.Connection, cutoff: datetime) -> int:
+    """
+    Move the next run of expired batches into one Parquet file
+
+    Rows are streamed from a cursor and written one row group at a time, so
+    memory is bounded by AUDIT_ARCHIVE_ROW_GROUP_ROWS. Batch digests are
+    recomputed while writing; the rows are deleted, and the batches marked
+    archived, only after every digest matched and the file is complete.
+
+    Returns:
+        Rows archived; 0 when no sealed batch is past retention
+
+    Raises:
+        RuntimeError: A batch does not verify, or the archive could not be
+            written completely; nothing is deleted
+    """
+    batches = await _expired_batches(conn, cutoff)
+    if not batches:
+        return 0
+
+    pq = _require_pyarrow()[3]
+    filesystem, root = archive_store()
+    schema = archive_schema()
+    first, last = batches[0], batches[-1]
+    path = f"audit_events/{first['first_event_at']:%Y/%m/%d}/batches-{first['id']:012d}-{last['id']:012d}.parquet"
+    location = f"{root}/{path}"
+
+    digests = BatchDigests({batch["id"]: batch for batch in batches})
+    unreproducible = 0
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    await asyncio.to_thread(filesystem.create_dir, location.rsplit("/", 1)[0], recursive=True)
+    sink = await asyncio.to_thread(filesystem.open_output_stream, location)
+    writer = pq.ParquetWriter(sink, schema, compression="zstd", compression_level=AUDIT_ARCHIVE_ZSTD_LEVEL)
+    try:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            async for row in conn.cursor(ARCHIVE_ROWS_SQL, first["id"], last["id"], prefetch=5000):
+                digests.add(row["batch_id"], row["canonical"])
+                # The file must reproduce the digest without Postgres
+                unreproducible += canonical_row(row) != row["canonical"]
+                for name in schema.names:
+                    columns[name].append(row[name])
+                if len(columns["id"]) >= AUDIT_ARCHIVE_ROW_GROUP_ROWS:
+                    await asyncio.to_thread(_write_row_group, writer, schema, columns)
+                    columns = {name: [] for name in schema.names}
+        if columns["id"]:
+            await asyncio.to_thread(_write_row_group, writer, schema, columns)
+        await asyncio.to_thread(writer.close)
+        await asyncio.to_thread(sink.close)
+    except BaseException:
+        writer.close()
+        sink.close()
+        await asyncio.to_thread(_remove, filesystem, location)
+        raise
+
+    report = digests.finish()
+    if report["problems"] or unreproducible:
+        await asyncio.to_thread(_remove, filesystem, location)
+        logger.error(
+            "Audit batches failed verification; not archived",
+            first_batch_id=first["id"],
+            last_batch_id=last["id"],
+            problems=report["problems"][:20],
+            unreproducible_rows=unreproducible
+        )
+        raise RuntimeError(f"Audit batches {first['id']}-{last['id']} failed verification")
+
+    # Until audit_archives records the file, any failure leaves it orphaned
+    try:
+        # The footer is written last; reading it back confirms the object is complete
+        written = await asyncio.to_thread(pq.read_metadata, location, filesystem=filesystem)
+        if written.num_rows != report["rows"]:
+            raise RuntimeError(f"Archive {path} holds {written.num_rows} rows, expected {report['rows']}")
+        size = (await asyncio.to_thread(filesystem.get_file_info, location)).size
+
+        async with conn.transaction():
+            archive_id = await conn.fetchval("""
+                INSERT INTO audit_archives (path, first_batch_id, last_batch_id, row_count, first_event_at, last_event_at, bytes)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                RETURNING id
+            """,
+                path, first["id"], last["id"], report["rows"],
+                min(batch["first_event_at"] for batch in batches),
+                max(batch["last_event_at"] for batch in batches),
+                size
+            )
+            await conn.execute("UPDATE audit_batches SET archive_id = $1 WHERE id BETWEEN $2 AND $3", archive_id, first["id"], last["id"])
+            deleted = await conn.execute("DELETE FROM audit_events WHERE batch_id BETWEEN $1 AND $2", first["id"], last["id"])
+            if int(deleted.split()[-1]) != report["rows"]:
+                raise RuntimeError(f"Audit batches {first['id']}-{last['id']} changed while being archived")
+    except BaseException:
+        await asyncio.to_thread(_remove, filesystem, location)
+        raise
+
+    logger.info(
+        "Audit batches archived",
+        archive_id=archive_id,
+        path=path,
+        first_batch_id=first["id"],
+        last_batch_id=last["id"],
+        rows=report["rows"],
+        bytes=size
+    )
+    return report["rows"]
+
+
+async def archive_expired(max_files: Optional[int] = AUDIT_ARCHIVE_MAX_FILES_PER_RUN) -> int:
+    """Archive sealed batches older than AUDIT_RETENTION_DAYS, up to max_files files (None: all)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=AUDIT_RETENTION_DAYS)
+    total = 0
+    async with get_connection() as conn:
+        if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", AUDIT_ARCHIVE_LOCK_ID):
+            return 0
+        try:
+            for _ in range(max_files) if max_files is not None else itertools.count():
+                archived = await archive_next_file(conn, cutoff)
+                if not archived:
+                    break
+                total += archived
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", AUDIT_ARCHIVE_LOCK_ID)
+    return total
+
+
+archiver = PeriodicJob(
+    "audit_archive", archive_expired, AUDIT_ARCHIVE_INTERVAL_SECONDS if AUDIT_ARCHIVE_URI else 0
+)
+
+
+# Archives whose events overlap [$1, $2]; either bound may be NULL
+ARCHIVE_OVERLAP_SQL = """
+    FROM audit_archives
+    WHERE ($1::timestamptz IS NULL OR last_event_at >= $1)
+      AND ($2::timestamptz IS NULL OR first_event_at <= $2)
+"""
+
+
+async def archives_overlap(
+    conn: asyncpg.Connection,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> bool:
+    """Whether any archive file holds events in [start_date, end_date]; no file is opened"""
+    return await conn.fetchval(f"SELECT EXISTS (SELECT 1 {ARCHIVE_OVERLAP_SQL})", start_date, end_date)
+
+
+async def find_archives(
+    conn: asyncpg.Connection,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> List[asyncpg.Record]:
+    """Archive files whose events overlap [start_date, end_date], newest first"""
+    return await conn.fetch(f"""
+        SELECT id, path, first_event_at, last_event_at
+        {ARCHIVE_OVERLAP_SQL}
+        ORDER BY last_event_at DESC
+    """, start_date, end_date)
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes are UTC, as asyncpg sends them for timestamptz
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _filter_expression(
+    equals: Dict[str, Any],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Any:
+    pa, pc, _, _ = _require_pyarrow()
+    timestamp = pa.timestamp("us", tz="UTC")
+    conditions = [pc.field(name) == value for name, value in equals.items() if value is not None and value != ""]
+    if start_date:
+        conditions.append(pc.field("timestamp") >= pa.scalar(_utc(start_date), type=timestamp))
+    if end_date:
+        conditions.append(pc.field("timestamp") <= pa.scalar(_utc(end_date), type=timestamp))
+    return functools.reduce(operator.and_, conditions) if conditions else None
+
+
+def _row_group_spans(parquet_file: Any) -> List[Tuple[int, datetime, datetime]]:
+    """(row group, oldest event, newest event) of each row group, newest first"""
+    column = parquet_file.schema_arrow.get_field_index("timestamp")
+    spans = []
+    for group in range(parquet_file.metadata.num_row_groups):
+        statistics = parquet_file.metadata.row_group(group).column(column).statistics
+        spans.append((group, statistics.min, statistics.max))
+    return sorted(spans, key=lambda span: span[2], reverse=True)
+
+
+def _read_row_group(parquet_file: Any, group: int, expression: Any) -> Any:
+    """A row group's rows matching expression, newest first"""
+    table = parquet_file.read_row_group(group, columns=list(EVENT_COLUMNS))
+    if expression is not None:
+        table = table.filter(expression)
+    return table.sort_by([("timestamp", "descending"), ("id", "descending")])
+
+
+def _offer(found: List[Tuple[datetime, str, Dict[str, Any]]], row: Dict[str, Any], limit: int) -> bool:
+    """Keep row if it is among the newest limit rows so far; False once it is not"""
+    entry = (row["timestamp"], row["id"], row)
+    if len(found) < limit:
+        heapq.heappush(found, entry)
+    elif entry[:2] > found[0][:2]:
+        heapq.heapreplace(found, entry)
+    else:
+        return False
+    return True
+
+
+def _event(row: Dict[str, Any]) -> Dict[str, Any]:
+    """An archived row in the shape asyncpg returns audit_events rows in"""
+    event = {name: row[name] for name in EVENT_COLUMNS}
+    event["id"] = uuid.UUID(row["id"])
+    event["metadata"] = json.loads(row["metadata"]) if row["metadata"] is not None else None
+    for name in ("timestamp", "first_seen", "last_seen"):
+        if event[name] is not None:
+            event[name] = event[name].astimezone(timezone.utc)
+    if row["ip_address"] is not None:
+        # An address for a full-length mask, an interface otherwise
+        interface = ipaddress.ip_interface(row["ip_address"])
+        event["ip_address"] = interface.ip if interface.network.prefixlen == interface.max_prefixlen else interface
+    return event
+
+
+async def read_archived_events(
+    conn: asyncpg.Connection,
+    archives: List[asyncpg.Record],
+    equals: Dict[str, Any],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    metadata_contains: Optional[Dict[str, Any]],
+    metadata_path: Optional[str],
+    limit: int
+) -> List[Dict[str, Any]]:
+    """
+    The newest `limit` archived events matching the filters, newest first
+
+    Args:
+        archives: Files to search, newest first, from find_archives
+        equals: Column equality filters (actor, action, success, ...)
+
+    Row groups are visited newest first and skipped by their timestamp
+    statistics when outside the range or older than the limit-th match
+    found so far. Each row group is read and filtered off the event loop;
+    metadata filters are then evaluated by Postgres on its rows, newest
+    first, in chunks of METADATA_FILTER_CHUNK.
+    """
+    pa, _, _, pq = _require_pyarrow()
+    filesystem, root = archive_store()
+    expression = _filter_expression(equals, start_date, end_date)
+    start = _utc(start_date) if start_date else None
+    end = _utc(end_date) if end_date else None
+    filter_metadata = metadata_contains is not None or bool(metadata_path)
+    found: List[Tuple[datetime, str, Dict[str, Any]]] = []
+
+    for archive in archives:
+        if len(found) >= limit and archive["last_event_at"] < found[0][0]:
+            break
+        source = await asyncio.to_thread(filesystem.open_input_file, f"{root}/{archive['path']}")
+        try:
+            parquet_file = await asyncio.to_thread(pq.ParquetFile, source)
+            for group, oldest, newest in _row_group_spans(parquet_file):
+                if (start and newest < start) or (end and oldest > end):
+                    continue
+                if len(found) >= limit and newest < found[0][0]:
+                    break
+                table = await asyncio.to_thread(_read_row_group, parquet_file, group, expression)
+                for offset in range(0, table.num_rows, METADATA_FILTER_CHUNK):
+                    chunk = table.slice(offset, METADATA_FILTER_CHUNK)
+                    if len(found) >= limit and chunk["timestamp"][0].as_py() < found[0][0]:
+                        break
+                    if filter_metadata:
+                        matching = await conn.fetchval(
+                            ARCHIVED_METADATA_FILTER_SQL,
+                            chunk["metadata"].to_pylist(), metadata_contains, metadata_path or None
+                        )
+                        chunk = chunk.take(pa.array(matching, type=pa.int64()))
+                    for row in chunk.to_pylist():
+                        if not _offer(found, row, limit):
+                            break
+        finally:
+            source.close()
+
+    return [_event(row) for _, _, row in sorted(found, key=lambda entry: entry[:2], reverse=True)]
+
+
+# Columns archived events are counted by for the audit summary
+SUMMARY_COLUMNS = ("actor", "action", "resource", "success")
+
+
+@functools.lru_cache(maxsize=256)
+def _archive_counts(path: str, start: Optional[datetime], end: Optional[datetime]) -> Any:
+    """
+    Summed event_count per SUMMARY_COLUMNS of one archive file within
+    [start, end]; archive files never change, so results are cached
+    """
+    pa, _, _, pq = _require_pyarrow()
+    filesystem, root = archive_store()
+    table = pq.read_table(
+        f"{root}/{path}",
+        filesystem=filesystem,
+        columns=[*SUMMARY_COLUMNS, "event_count", "timestamp"],
+        filters=_filter_expression({}, start, end),
+    )
+    return table.group_by(list(SUMMARY_COLUMNS)).aggregate([("event_count", "sum")])
+
+
+async def count_archived_events(
+    conn: asyncpg.Connection,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Optional[Dict[str, List[Any]]]:
+    """
+    Archived events in [start_date, end_date] summed per actor, action,
+    resource and success, as columns; None when no archive overlaps
+
+    Files wholly inside the range are aggregated once per process and reused.
+    """
+    archives = await find_archives(conn, start_date, end_date)
+    if not archives:
+        return None
+    pa = _require_pyarrow()[0]
+    start = _utc(start_date) if start_date else None
+    end = _utc(end_date) if end_date else None
+    tables = []
+    for archive in archives:
+        covered = (start is None or archive["first_event_at"] >= start) and (end is None or archive["last_event_at"] <= end)
+        tables.append(await asyncio.to_thread(
+            _archive_counts, archive["path"], None if covered else start, None if covered else end
+        ))
+    counts = pa.concat_tables(tables).group_by(list(SUMMARY_COLUMNS)).aggregate([("event_count_sum", "sum")])
+    return {
+        **{name: counts[name].to_pylist() for name in SUMMARY_COLUMNS},
+        "event_count": counts["event_count_sum_sum"].to_pylist(),
+    }
+
+
+async def verify_archive(conn: asyncpg.Connection, archive_id: int, batch_rows: int) -> Dict[str, Any]:
+    """Recompute the digests of an archive's batches from its file, as verify_range does for live rows"""
+    pa, _, _, pq = _require_pyarrow()
+    archive = await conn.fetchrow("SELECT path, first_batch_id FROM audit_archives WHERE id = $1", archive_id)
+    digests = BatchDigests({
+        batch["id"]: batch
+        for batch in await conn.fetch(
+            "SELECT id, prev_digest, digest, row_count FROM audit_batches WHERE archive_id = $1", archive_id
+        )
+    })
+    filesystem, root = archive_store()
+    try:
+        with filesystem.open_input_file(f"{root}/{archive['path']}") as source:
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_rows):
+                for row in batch.to_pylist():
+                    digests.add(row["batch_id"], canonical_row(row))
+    except (OSError, pa.ArrowException) as e:
+        return {
+            "batches": 0, "rows": 0, "bytes": 0,
+            "problems": [{"batch_id": archive["first_batch_id"], "error": f"archive {archive['path']} unreadable: {e}"}],
+        }
+    return digests.finish()
+
+
+async def _run(max_files: Optional[int]) -> Dict[str, Any]:
+    rows = await archive_expired(max_files)
+    await close_pool()
+    return {"archived_rows": rows, "retention_days": AUDIT_RETENTION_DAYS}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move audit events past retention into Parquet archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Archive every sealed batch past retention now")
+    run.add_argument("--max-files", type=int, default=None, help="Stop after this many archive files")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    print(json.dumps(asyncio.run(_run(args.max_files)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
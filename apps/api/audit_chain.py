@@ -0,0 +1,387 @@
+"""
+Tamper-evident hash chain over audit events for Allstar Forge Platform
+
+Provides:
+- A background sealer that groups unsealed audit_events rows into batches
+  and stores, per batch, sha256(previous batch digest || canonical rows) in
+  audit_batches. Request handlers keep inserting rows exactly as before;
+  sealing happens later, in one statement per batch inside Postgres
+- Sealed batch digests logged as they are created, so the chain tip can be
+  anchored in the external log pipeline (SIEM)
+- A verification command that checks the chain links, then streams the
+  events in bounded chunks to worker processes which recompute every batch
+  digest in parallel, reporting throughput and peak memory
+
+Batches moved to Parquet by the retention job (audit_archive.py) keep their
+audit_batches records and are verified from the archive files, so the chain
+spans hot and archived events alike.
+
+Any change to a sealed row, a row moved between batches, a deleted row or
+batch, or a row pointing at a batch that does not exist breaks
+verification. Deleting the newest batches is only detectable against a
+digest anchored outside the database.
+
+Usage:
+    python audit_chain.py seal                   # seal everything pending now
+    python audit_chain.py verify --workers 4     # exit status 1 on any mismatch
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import asyncpg
+import structlog
+
+from db import DATABASE_URL, close_pool, get_connection
+from jobs import PeriodicJob
+
+logger = structlog.get_logger()
+
+AUDIT_SEAL_INTERVAL_SECONDS = float(os.getenv("AUDIT_SEAL_INTERVAL_SECONDS", "5"))
+AUDIT_SEAL_BATCH_SIZE = int(os.getenv("AUDIT_SEAL_BATCH_SIZE", "5000"))
+# Upper bound per run so catching up on a backlog does not hold a connection for long
+AUDIT_SEAL_MAX_BATCHES_PER_RUN = int(os.getenv("AUDIT_SEAL_MAX_BATCHES_PER_RUN", "20"))
+
+# Serialises sealing across processes and replicas; the chain has a single tip
+AUDIT_SEAL_LOCK_ID = 0x5C4E3B
+GENESIS_DIGEST = bytes(32)
+
+BIGINT_MIN = -(2 ** 63)
+BIGINT_MAX = 2 ** 63 - 1
+
+# Canonical text of one event (alias e). jsonb output is normalised and
+# timestamps are epoch microseconds, so the text does not depend on session
+# settings. batch_id is deliberately excluded.
+CANONICAL_ROW_SQL = """
+    jsonb_build_array(
+        e.id::text,
+        (extract(epoch FROM e.timestamp) * 1000000)::bigint,
+        e.actor, e.action, e.resource, e.resource_id, e.success, e.metadata,
+        e.ip_address::text, e.user_agent, e.event_count,
+        (extract(epoch FROM e.first_seen) * 1000000)::bigint,
+        (extract(epoch FROM e.last_seen) * 1000000)::bigint
+    )::text
+"""
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def canonical_row(event: Mapping[str, Any]) -> str:
+    """
+    Python equivalent of CANONICAL_ROW_SQL for events held outside Postgres
+
+    metadata and ip_address are expected as their Postgres text output
+    (metadata::text, ip_address::text), timestamps as aware datetimes.
+    Strings are escaped the way jsonb output escapes them.
+    """
+    def text(value: Optional[str]) -> str:
+        return "null" if value is None else json.dumps(value, ensure_ascii=False)
+
+    def micros(value: Optional[datetime]) -> str:
+        return "null" if value is None else str((value - EPOCH) // MICROSECOND)
+
+    parts = [
+        text(event["id"]), micros(event["timestamp"]),
+        text(event["actor"]), text(event["action"]), text(event["resource"]), text(event["resource_id"]),
+        "null" if event["success"] is None else ("true" if event["success"] else "false"),
+        "null" if event["metadata"] is None else event["metadata"],
+        text(event["ip_address"]), text(event["user_agent"]),
+        "null" if event["event_count"] is None else str(event["event_count"]),
+        micros(event["first_seen"]), micros(event["last_seen"]),
+    ]
+    return "[" + ", ".join(parts) + "]"
+
+
+# Rows are hashed in id order, each followed by a newline
+SEAL_BATCH_SQL = f"""
+    WITH picked AS (
+        SELECT id FROM audit_events
+        WHERE batch_id IS NULL
+        ORDER BY timestamp, id
+        LIMIT $2
+        FOR UPDATE
+    ), batch AS (
+        INSERT INTO audit_batches (prev_digest, digest, row_count, first_event_at, last_event_at)
+        SELECT
+            $1::bytea,
+            sha256($1::bytea || convert_to(string_agg({CANONICAL_ROW_SQL} || E'\\n', '' ORDER BY e.id), 'UTF8')),
+            COUNT(*), MIN(e.timestamp), MAX(e.timestamp)
+        FROM audit_events e JOIN picked USING (id)
+        HAVING COUNT(*) > 0
+        RETURNING id, digest, row_count
+    ), sealed AS (
+        UPDATE audit_events e SET batch_id = batch.id
+        FROM batch, picked
+        WHERE e.id = picked.id
+    )
+    SELECT id, digest, row_count FROM batch
+"""
+
+
+async def seal_batch(conn: asyncpg.Connection, max_rows: int = AUDIT_SEAL_BATCH_SIZE) -> int:
+    """
+    Seal up to max_rows of the oldest unsealed events as the next batch
+
+    Returns:
+        Rows sealed; 0 when nothing was pending or another process is sealing
+    """
+    async with conn.transaction():
+        if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", AUDIT_SEAL_LOCK_ID):
+            return 0
+        prev = await conn.fetchval("SELECT digest FROM audit_batches ORDER BY id DESC LIMIT 1")
+        batch = await conn.fetchrow(SEAL_BATCH_SQL, prev or GENESIS_DIGEST, max_rows)
+    if batch is None:
+        return 0
+    logger.info("Audit batch sealed", batch_id=batch["id"], rows=batch["row_count"], digest=batch["digest"].hex())
+    return batch["row_count"]
+
+
+async def seal_pending() -> int:
+    """Seal pending events in full batches, up to AUDIT_SEAL_MAX_BATCHES_PER_RUN"""
+    total = 0
+    async with get_connection() as conn:
+        for _ in range(AUDIT_SEAL_MAX_BATCHES_PER_RUN):
+            sealed = await seal_batch(conn)
+            total += sealed
+            if sealed < AUDIT_SEAL_BATCH_SIZE:
+                break
+    return total
+
+
+sealer = PeriodicJob("audit_seal", seal_pending, AUDIT_SEAL_INTERVAL_SECONDS)
+
+
+async def check_links(conn: asyncpg.Connection, chunk_rows: int, chunk_batches: int) -> Dict[str, Any]:
+    """
+    Check every batch's prev_digest against its predecessor and split the
+    batches into contiguous id ranges of bounded size for the workers
+
+    The first and last ranges are open-ended, so rows pointing below the
+    first or above the last batch are still streamed and reported. Archived
+    batches do not count towards range sizes; their archive files are
+    verified as separate units.
+    """
+    problems: List[Dict[str, Any]] = []
+    ranges: List[Tuple[int, int]] = []
+    expected_prev = GENESIS_DIGEST
+    low, rows, batches, total_batches, total_rows = BIGINT_MIN, 0, 0, 0, 0
+    tip = None
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        async for batch in conn.cursor(
+            "SELECT id, prev_digest, digest, row_count, archive_id FROM audit_batches ORDER BY id", prefetch=10000
+        ):
+            if batch["prev_digest"] != expected_prev:
+                problems.append({"batch_id": batch["id"], "error": "prev_digest does not match the preceding batch"})
+            expected_prev = batch["digest"]
+            tip = batch
+            total_rows += batch["row_count"]
+            total_batches += 1
+            if batch["archive_id"] is not None:
+                continue
+            rows += batch["row_count"]
+            batches += 1
+            if rows >= chunk_rows or batches >= chunk_batches:
+                ranges.append((low, batch["id"]))
+                low, rows, batches = batch["id"] + 1, 0, 0
+        ranges.append((low, BIGINT_MAX))
+        unsealed = await conn.fetchrow(
+            "SELECT COUNT(*) AS rows, MIN(timestamp) AS oldest FROM audit_events WHERE batch_id IS NULL"
+        )
+        archives = [row["id"] for row in await conn.fetch("SELECT id FROM audit_archives ORDER BY id")]
+    return {
+        "problems": problems,
+        "ranges": ranges,
+        "archives": archives,
+        "batches": total_batches,
+        "sealed_rows": total_rows,
+        "tip": {"batch_id": tip["id"], "digest": tip["digest"].hex()} if tip else None,
+        "unsealed_rows": unsealed["rows"],
+        "oldest_unsealed": unsealed["oldest"].isoformat() if unsealed["oldest"] else None,
+    }
+
+
+class BatchDigests:
+    """
+    Recompute batch digests from canonical rows arriving in (batch_id, id)
+    order and compare them with the sealed batch records
+
+    Used for rows streamed from Postgres and from archive files alike.
+    """
+
+    def __init__(self, batches: Dict[int, Mapping[str, Any]]) -> None:
+        self.batches = dict(batches)
+        self.problems: List[Dict[str, Any]] = []
+        self.stats = {"batches": 0, "rows": 0, "bytes": 0}
+        self._current: Optional[int] = None
+        self._hasher = None
+        self._count = 0
+
+    def add(self, batch_id: int, canonical: str) -> None:
+        if batch_id != self._current:
+            self._finish_current()
+            self._current, self._count = batch_id, 0
+            batch = self.batches.get(batch_id)
+            self._hasher = hashlib.sha256(batch["prev_digest"] if batch else GENESIS_DIGEST)
+        data = canonical.encode() + b"\n"
+        self._hasher.update(data)
+        self._count += 1
+        self.stats["rows"] += 1
+        self.stats["bytes"] += len(data)
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the last batch and report batches none of whose rows were seen"""
+        self._finish_current()
+        for batch_id, batch in self.batches.items():
+            self._check(batch_id, batch, hashlib.sha256(batch["prev_digest"]).digest(), 0)
+        self.batches = {}
+        return {**self.stats, "problems": self.problems}
+
+    def _finish_current(self) -> None:
+        if self._current is not None:
+            self._check(self._current, self.batches.pop(self._current, None), self._hasher.digest(), self._count)
+            self._current = None
+
+    def _check(self, batch_id: int, batch: Optional[Mapping[str, Any]], digest: bytes, seen: int) -> None:
+        self.stats["batches"] += batch is not None
+        if batch is None:
+            self.problems.append({"batch_id": batch_id, "error": "events reference a batch that does not exist", "rows": seen})
+        elif seen != batch["row_count"]:
+            self.problems.append({"batch_id": batch_id, "error": "row count mismatch", "expected": batch["row_count"], "found": seen})
+        elif digest != batch["digest"]:
+            self.problems.append({"batch_id": batch_id, "error": "digest mismatch"})
+
+
+async def verify_range(conn: asyncpg.Connection, low: int, high: int, prefetch: int) -> Dict[str, Any]:
+    """Recompute the digest of every batch with an id in [low, high] still held in Postgres"""
+    # Batch records and rows come from one snapshot, so concurrent sealing or archiving cannot skew them
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        digests = BatchDigests({
+            batch["id"]: batch
+            for batch in await conn.fetch("""
+                SELECT id, prev_digest, digest, row_count FROM audit_batches
+                WHERE id BETWEEN $1 AND $2 AND archive_id IS NULL
+            """, low, high)
+        })
+        async for row in conn.cursor(f"""
+            SELECT e.batch_id, {CANONICAL_ROW_SQL} AS canonical
+            FROM audit_events e
+            WHERE e.batch_id BETWEEN $1 AND $2
+            ORDER BY e.batch_id, e.id
+        """, low, high, prefetch=prefetch):
+            digests.add(row["batch_id"], row["canonical"])
+    return digests.finish()
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(dsn: str) -> None:
+    """Give each worker process one event loop and one connection for all its ranges"""
+    loop = asyncio.new_event_loop()
+    _worker["loop"] = loop
+    _worker["conn"] = loop.run_until_complete(asyncpg.connect(dsn))
+
+
+def _verify_in_worker(task: Tuple[str, int, int, int]) -> Dict[str, Any]:
+    kind, low, high, prefetch = task
+    if kind == "archive":
+        # Imported here: audit_archive depends on this module
+        from audit_archive import verify_archive
+        return _worker["loop"].run_until_complete(verify_archive(_worker["conn"], low, prefetch))
+    return _worker["loop"].run_until_complete(verify_range(_worker["conn"], low, high, prefetch))
+
+
+async def _plan(chunk_rows: int, chunk_batches: int) -> Dict[str, Any]:
+    async with get_connection() as conn:
+        plan = await check_links(conn, chunk_rows, chunk_batches)
+    await close_pool()
+    return plan
+
+
+def verify_chain(workers: int, chunk_rows: int, chunk_batches: int, prefetch: int) -> Dict[str, Any]:
+    """Verify the whole chain; memory per worker is bounded by prefetch and chunk_batches"""
+    started = time.perf_counter()
+    plan = asyncio.run(_plan(chunk_rows, chunk_batches))
+    problems = plan["problems"]
+    totals = {"batches": 0, "rows": 0, "bytes": 0}
+
+    # Archive files first: they are the larger units of work
+    tasks: Iterator[Tuple[str, int, int, int]] = itertools.chain(
+        (("archive", archive_id, archive_id, prefetch) for archive_id in plan["archives"]),
+        (("range", low, high, prefetch) for low, high in plan["ranges"]),
+    )
+    with multiprocessing.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(DATABASE_URL,)) as pool:
+        for result in pool.imap_unordered(_verify_in_worker, tasks):
+            for key in totals:
+                totals[key] += result[key]
+            problems.extend(result["problems"])
+
+    elapsed = time.perf_counter() - started
+    problems.sort(key=lambda problem: problem["batch_id"])
+    return {
+        "status": "failed" if problems else "verified",
+        **totals,
+        "tip": plan["tip"],
+        "unsealed_rows": plan["unsealed_rows"],
+        "oldest_unsealed": plan["oldest_unsealed"],
+        "workers": workers,
+        "chunks": len(plan["ranges"]),
+        "archives": len(plan["archives"]),
+        "elapsed_seconds": round(elapsed, 2),
+        "rows_per_second": round(totals["rows"] / elapsed) if elapsed else None,
+        "mb_per_second": round(totals["bytes"] / 1e6 / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "problem_count": len(problems),
+        "problems": problems[:100],
+    }
+
+
+async def _seal_all() -> Dict[str, Any]:
+    total = 0
+    async with get_connection() as conn:
+        while True:
+            sealed = await seal_batch(conn)
+            total += sealed
+            if sealed < AUDIT_SEAL_BATCH_SIZE:
+                break
+    await close_pool()
+    return {"sealed_rows": total}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Seal and verify the audit event hash chain")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("seal", help="Seal all pending audit events now")
+    verify = commands.add_parser("verify", help="Re-verify every sealed batch")
+    verify.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    verify.add_argument("--chunk-rows", type=int, default=200_000, help="Rows per work unit")
+    verify.add_argument("--chunk-batches", type=int, default=10_000, help="Batches per work unit")
+    verify.add_argument("--prefetch", type=int, default=2000, help="Rows each worker fetches per round trip")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "seal":
+        print(json.dumps(asyncio.run(_seal_all()), indent=2))
+        return
+    report = verify_chain(args.workers, args.chunk_rows, args.chunk_batches, args.prefetch)
+    print(json.dumps(report, indent=2))
+    if report["problems"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
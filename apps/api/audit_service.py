@@ -6,16 +6,168 @@ Provides comprehensive audit logging capabilities:
 - PostgreSQL persistence for compliance
 - Real-time event streaming
 - Security and compliance reporting
+- Metadata search by JSONB containment and JSONPath predicates
+- Queries spanning live rows and Parquet-archived ranges (see audit_archive.py)
+- Coalescing of repeated read events into counted rows
 """
 
-import json
+import asyncio
+import os
+import asyncpg
 import structlog
-from typing import Any, Optional, List, Dict
-from datetime import datetime
+from typing import Any, Optional, List, Dict, Iterable, Tuple
+from datetime import datetime, timezone
 from db import get_connection
+from audit_archive import archives_overlap, count_archived_events, find_archives, read_archived_events
 
 logger = structlog.get_logger()
 
+# Repeated (actor, action, resource_id) read events within this window are
+# persisted as one row with event_count and first/last-seen timestamps; 0 disables
+AUDIT_COALESCE_WINDOW_SECONDS = float(os.getenv("AUDIT_COALESCE_WINDOW_SECONDS", "60"))
+AUDIT_COALESCE_ACTIONS = [
+    action.strip()
+    for action in os.getenv("AUDIT_COALESCE_ACTIONS", "project.view,project.list,project.watch").split(",")
+    if action.strip()
+]
+# Coalesced rows kept for the next window while flushes fail; beyond this the oldest are discarded
+AUDIT_COALESCE_MAX_PENDING = int(os.getenv("AUDIT_COALESCE_MAX_PENDING", "50000"))
+
+# Only actions ending in one of these verbs may ever be coalesced
+READ_VERBS = frozenset({"view", "list", "watch", "get", "read", "search"})
+
+
+def is_read_action(action: str) -> bool:
+    """Whether an action name denotes a read (never true for writes)"""
+    return action.rsplit(".", 1)[-1] in READ_VERBS
+
+
+class AuditCoalescer:
+    """
+    In-memory window merging repeated read events before persistence
+
+    Pending entries are flushed in one batched insert every window, so a
+    dashboard refreshing every few seconds costs one row per window instead
+    of one per request. Failed and write-type events are never coalesced.
+    A failed flush puts its rows back to be retried with the next window.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        actions: Iterable[str],
+        max_pending: int = AUDIT_COALESCE_MAX_PENDING
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.actions = frozenset(action for action in actions if is_read_action(action))
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.coalesced_events = 0
+        self.discarded_events = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self._task is not None
+
+    def offer(self, payload: Dict[str, Any]) -> bool:
+        """
+        Buffer a read event if it is eligible for coalescing
+
+        Returns:
+            True when the event was absorbed and must not be written directly
+        """
+        if not self.enabled or not payload["success"] or payload["action"] not in self.actions:
+            return False
+        
+        now = datetime.now(timezone.utc)
+        key = (payload["actor"], payload["action"], payload["resource_id"])
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = {**payload, "event_count": 1, "first_seen": now, "last_seen": now}
+        else:
+            entry["event_count"] += 1
+            entry["last_seen"] = now
+            self.coalesced_events += 1
+        return True
+
+    def start(self) -> None:
+        """Start the periodic flush task"""
+        if self.window_seconds > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and persist anything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Persist all pending coalesced events in one batch"""
+        if not self._pending:
+            return 0
+        
+        pending, self._pending = self._pending, {}
+        try:
+            async with get_connection() as conn:
+                await conn.executemany("""
+                    INSERT INTO audit_events (
+                        timestamp, actor, action, resource, resource_id, success, 
+                        metadata, ip_address, user_agent, event_count, first_seen, last_seen
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                """, [
+                    (
+                        entry["first_seen"],
+                        entry["actor"],
+                        entry["action"],
+                        entry["resource"],
+                        entry["resource_id"],
+                        entry["success"],
+                        entry["metadata"],
+                        entry["ip_address"],
+                        entry["user_agent"],
+                        entry["event_count"],
+                        entry["first_seen"],
+                        entry["last_seen"]
+                    )
+                    for entry in pending.values()
+                ])
+            return len(pending)
+        except Exception as e:
+            logger.error(
+                "Failed to flush coalesced audit events, retrying next window",
+                error=str(e),
+                rows=len(pending),
+                events=sum(entry["event_count"] for entry in pending.values())
+            )
+            self._requeue(pending)
+            return 0
+
+    def _requeue(self, failed: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]]) -> None:
+        """Merge rows from a failed flush with those buffered since, oldest first"""
+        for key, entry in self._pending.items():
+            previous = failed.get(key)
+            if previous is None:
+                failed[key] = entry
+            else:
+                previous["event_count"] += entry["event_count"]
+                previous["last_seen"] = entry["last_seen"]
+        self._pending = failed
+        overflow = [self._pending.pop(key) for key in list(self._pending)[:max(0, len(self._pending) - self.max_pending)]]
+        if overflow:
+            events = sum(entry["event_count"] for entry in overflow)
+            self.discarded_events += events
+            logger.error("Discarded oldest coalesced audit events after failed flushes", rows=len(overflow), events=events)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.window_seconds)
+            await self.flush()
+
+
+coalescer = AuditCoalescer(AUDIT_COALESCE_WINDOW_SECONDS, AUDIT_COALESCE_ACTIONS)
+
 
 async def emit_event(
     actor: str,
@@ -41,7 +193,8 @@ async def emit_event(
         user_agent: Client user agent string
     
     Returns:
-        Event ID for tracking
+        Event ID for tracking, or an empty string when the event was
+        coalesced into a pending read-event row
     """
     event_id = None
     
@@ -66,6 +219,10 @@ async def emit_event(
             **payload
         )
         
+        # Merge repeated reads into one row per coalescing window
+        if coalescer.offer(payload):
+            return ""
+        
         # Persist to database
         async with get_connection() as conn:
             result = await conn.fetchrow("""
@@ -80,7 +237,7 @@ async def emit_event(
                 payload["resource"], 
                 payload["resource_id"], 
                 payload["success"], 
-                json.dumps(payload["metadata"]),
+                payload["metadata"],
                 payload["ip_address"],
                 payload["user_agent"]
             )
@@ -95,6 +252,155 @@ async def emit_event(
         return ""
 
 
+async def emit_events(events: List[Dict[str, Any]]) -> int:
+    """
+    Emit many audit events with a single connection and batched insert
+
+    Args:
+        events: Dicts with the same keys as emit_event's arguments
+
+    Returns:
+        Number of events persisted
+    """
+    if not events:
+        return 0
+    
+    try:
+        records = [
+            (
+                event["actor"],
+                event["action"],
+                event["resource"],
+                event.get("resource_id"),
+                event.get("success", True),
+                event.get("metadata") or {},
+                event.get("ip_address"),
+                event.get("user_agent")
+            )
+            for event in events
+        ]
+        
+        for event in events:
+            logger.info("audit_event", timestamp=datetime.utcnow().isoformat(), **event)
+        
+        async with get_connection() as conn:
+            await conn.executemany("""
+                INSERT INTO audit_events (
+                    actor, action, resource, resource_id, success, 
+                    metadata, ip_address, user_agent
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            """, records)
+        
+        logger.info("Audit events persisted", count=len(records))
+        return len(records)
+        
+    except Exception as e:
+        logger.error("Failed to emit audit events", error=str(e), count=len(events))
+        # Don't raise exception to avoid breaking the main flow
+        return 0
+
+
+# Explicit parameter types where the operator alone is ambiguous
+PARAM_CASTS = {"metadata @>": "::jsonb", "metadata @@": "::jsonpath"}
+
+
+def build_audit_events_query(
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    resource: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    success: Optional[bool] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    metadata_contains: Optional[Dict[str, Any]] = None,
+    metadata_path: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> Tuple[str, List[Any]]:
+    """
+    Build the filtered, paginated audit event query
+    
+    Empty filters are skipped; success=False is still a filter. Both
+    metadata filters can use the GIN (jsonb_path_ops) index on metadata:
+    metadata_contains as `@>`, metadata_path as a JSONPath predicate with
+    `@@`, e.g. `$.decision == "deny" && $.resource_kind == "Deployment"`.
+    Only equality tests in a predicate narrow the index scan.
+    
+    Returns:
+        SQL text and its positional parameters
+    """
+    filters = (
+        ("actor =", actor),
+        ("action =", action),
+        ("resource =", resource),
+        ("resource_id =", resource_id),
+        ("success =", success),
+        ("timestamp >=", start_date),
+        ("timestamp <=", end_date),
+        ("metadata @>", metadata_contains),
+        ("metadata @@", metadata_path),
+    )
+    where_conditions = []
+    params: List[Any] = []
+    for condition, value in filters:
+        if value is None or value == "":
+            continue
+        params.append(value)
+        where_conditions.append(f"{condition} ${len(params)}{PARAM_CASTS.get(condition, '')}")
+    
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    params.extend([limit, offset])
+    
+    query = f"""
+        SELECT id, timestamp, actor, action, resource, resource_id, 
+               success, metadata, ip_address, user_agent,
+               event_count, first_seen, last_seen
+        FROM audit_events {where_clause}
+        ORDER BY timestamp DESC
+        LIMIT ${len(params) - 1} OFFSET ${len(params)}
+    """
+    return query, params
+
+
+async def fetch_audit_rows(
+    conn: asyncpg.Connection,
+    query: str,
+    params: List[Any],
+    custom_plan: bool = False
+) -> List[asyncpg.Record]:
+    """
+    Run a query from build_audit_events_query
+    
+    Every metadata filter value shares one prepared statement, and after a
+    few executions Postgres may switch it to a generic plan that cannot see
+    how selective the value is and walks the timestamp index instead of the
+    GIN index. custom_plan forces planning with the actual values.
+    """
+    if not custom_plan:
+        return await conn.fetch(query, *params)
+    async with conn.transaction():
+        await conn.execute("SET LOCAL plan_cache_mode = force_custom_plan")
+        return await conn.fetch(query, *params)
+
+
+class InvalidMetadataPath(ValueError):
+    """metadata_path is not a valid JSONPath expression"""
+
+
+async def check_metadata_path(conn: asyncpg.Connection, metadata_path: str) -> None:
+    """
+    Parse a JSONPath predicate on its own, so that only its errors are
+    reported as invalid input
+
+    Raises:
+        InvalidMetadataPath: metadata_path is not a valid JSONPath expression
+    """
+    try:
+        await conn.fetchval("SELECT $1::jsonpath", metadata_path)
+    except (asyncpg.PostgresSyntaxError, asyncpg.DataError) as e:
+        raise InvalidMetadataPath(f"Invalid metadata_path: {e}")
+
+
 async def get_audit_events(
     actor: Optional[str] = None,
     action: Optional[str] = None,
@@ -103,6 +409,8 @@ async def get_audit_events(
     success: Optional[bool] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    metadata_contains: Optional[Dict[str, Any]] = None,
+    metadata_path: Optional[str] = None,
     limit: int = 100,
     offset: int = 0
 ) -> List[Dict[str, Any]]:
@@ -117,73 +425,55 @@ async def get_audit_events(
         success: Filter by success status
         start_date: Filter events after this date
         end_date: Filter events before this date
+        metadata_contains: JSON object the event metadata must contain
+        metadata_path: JSONPath predicate the event metadata must satisfy
         limit: Maximum number of events to return
         offset: Number of events to skip
     
     Returns:
         List of audit events
+    
+    Raises:
+        InvalidMetadataPath: metadata_path is not a valid JSONPath expression
+        RuntimeError: The range covers archived events that cannot be read
+    
+    When the date range overlaps archived events, the newest offset + limit
+    matches are taken from both Postgres and the archive files and merged,
+    so pages are the same as if every event were still in audit_events.
     """
+    filters = dict(
+        actor=actor, action=action, resource=resource, resource_id=resource_id, success=success,
+        start_date=start_date, end_date=end_date, metadata_contains=metadata_contains,
+        metadata_path=metadata_path
+    )
     try:
         async with get_connection() as conn:
-            # Build WHERE clause dynamically
-            where_conditions = []
-            params = []
-            param_count = 0
-            
-            if actor:
-                param_count += 1
-                where_conditions.append(f"actor = ${param_count}")
-                params.append(actor)
-            
-            if action:
-                param_count += 1
-                where_conditions.append(f"action = ${param_count}")
-                params.append(action)
-            
-            if resource:
-                param_count += 1
-                where_conditions.append(f"resource = ${param_count}")
-                params.append(resource)
-            
-            if resource_id:
-                param_count += 1
-                where_conditions.append(f"resource_id = ${param_count}")
-                params.append(resource_id)
-            
-            if success is not None:
-                param_count += 1
-                where_conditions.append(f"success = ${param_count}")
-                params.append(success)
+            if metadata_path:
+                await check_metadata_path(conn, metadata_path)
+            custom_plan = metadata_contains is not None or bool(metadata_path)
+            if not await archives_overlap(conn, start_date, end_date):
+                query, params = build_audit_events_query(**filters, limit=limit, offset=offset)
+                rows = await fetch_audit_rows(conn, query, params, custom_plan=custom_plan)
+                return [dict(row) for row in rows]
             
-            if start_date:
-                param_count += 1
-                where_conditions.append(f"timestamp >= ${param_count}")
-                params.append(start_date)
-            
-            if end_date:
-                param_count += 1
-                where_conditions.append(f"timestamp <= ${param_count}")
-                params.append(end_date)
-            
-            where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-            
-            # Add pagination parameters
-            param_count += 1
-            limit_param = f"${param_count}"
-            param_count += 1
-            offset_param = f"${param_count}"
-            params.extend([limit, offset])
-            
-            query = f"""
-                SELECT id, timestamp, actor, action, resource, resource_id, 
-                       success, metadata, ip_address, user_agent
-                FROM audit_events {where_clause}
-                ORDER BY timestamp DESC
-                LIMIT {limit_param} OFFSET {offset_param}
-            """
-            
-            rows = await conn.fetch(query, *params)
-            return [dict(row) for row in rows]
+            query, params = build_audit_events_query(**filters, limit=offset + limit, offset=0)
+            events = [dict(row) for row in await fetch_audit_rows(conn, query, params, custom_plan=custom_plan)]
+            # With a full page of live rows, only archived events at least as new as the oldest can still place
+            archived_from = events[-1]["timestamp"] if len(events) == offset + limit else start_date
+            archives = await find_archives(conn, archived_from, end_date)
+            if not archives:
+                return events[offset:offset + limit]
+            events += await read_archived_events(
+                conn, archives,
+                equals=dict(actor=actor, action=action, resource=resource, resource_id=resource_id, success=success),
+                start_date=archived_from, end_date=end_date, metadata_contains=metadata_contains,
+                metadata_path=metadata_path, limit=offset + limit
+            )
+            events.sort(key=lambda event: (event["timestamp"], str(event["id"])), reverse=True)
+            return events[offset:offset + limit]
+    
+    except (InvalidMetadataPath, RuntimeError):
+        raise
             
     except Exception as e:
         logger.error("Failed to retrieve audit events", error=str(e))
@@ -197,8 +487,15 @@ async def get_audit_summary(
     """
     Get audit event summary statistics
     
+    Archived ranges are included: their events are counted per actor,
+    action, resource and outcome from the archive files and added to the
+    live rows before aggregating.
+    
     Returns:
         Summary statistics including total events, success rate, top actors, etc.
+    
+    Raises:
+        RuntimeError: The range covers archived events that cannot be read
     """
     try:
         async with get_connection() as conn:
@@ -215,26 +512,39 @@ async def get_audit_summary(
                 date_filter = "WHERE timestamp <= $1"
                 params = [end_date]
             
+            # Live rows, plus the archived counts when the range reaches into the archive
+            events = f"SELECT actor, action, resource, success, event_count::bigint FROM audit_events {date_filter}"
+            archived = await count_archived_events(conn, start_date, end_date)
+            if archived:
+                first = len(params) + 1
+                params += [archived[name] for name in ("actor", "action", "resource", "success", "event_count")]
+                events += f"""
+                    UNION ALL
+                    SELECT * FROM unnest(
+                        ${first}::text[], ${first + 1}::text[], ${first + 2}::text[], ${first + 3}::boolean[], ${first + 4}::bigint[]
+                    ) AS archived(actor, action, resource, success, event_count)
+                """
+            
             # Get summary statistics
             summary_query = f"""
                 SELECT 
-                    COUNT(*) as total_events,
-                    COUNT(*) FILTER (WHERE success = true) as successful_events,
-                    COUNT(*) FILTER (WHERE success = false) as failed_events,
+                    COALESCE(SUM(event_count), 0)::bigint as total_events,
+                    COALESCE(SUM(event_count) FILTER (WHERE success = true), 0)::bigint as successful_events,
+                    COALESCE(SUM(event_count) FILTER (WHERE success = false), 0)::bigint as failed_events,
                     COUNT(DISTINCT actor) as unique_actors,
                     COUNT(DISTINCT action) as unique_actions,
                     COUNT(DISTINCT resource) as unique_resources
-                FROM audit_events {date_filter}
+                FROM ({events}) AS events
             """
             
             summary = await conn.fetchrow(summary_query, *params)
             
             # Get top actors
             actors_query = f"""
-                SELECT actor, COUNT(*) as event_count
-                FROM audit_events {date_filter}
+                SELECT actor, SUM(event_count)::bigint as event_count
+                FROM ({events}) AS events
                 GROUP BY actor
-                ORDER BY event_count DESC
+                ORDER BY event_count DESC, actor
                 LIMIT 10
             """
             
@@ -242,10 +552,10 @@ async def get_audit_summary(
             
             # Get top actions
             actions_query = f"""
-                SELECT action, COUNT(*) as event_count
-                FROM audit_events {date_filter}
+                SELECT action, SUM(event_count)::bigint as event_count
+                FROM ({events}) AS events
                 GROUP BY action
-                ORDER BY event_count DESC
+                ORDER BY event_count DESC, action
                 LIMIT 10
             """
             
@@ -256,6 +566,9 @@ async def get_audit_summary(
                 "top_actors": [dict(row) for row in top_actors],
                 "top_actions": [dict(row) for row in top_actions]
             }
+    
+    except RuntimeError:
+        raise
             
     except Exception as e:
         logger.error("Failed to get audit summary", error=str(e))
@@ -0,0 +1,119 @@
+"""
+Audit metadata search benchmark
+
+Seeds synthetic audit events into a scratch schema of the Postgres at
+DATABASE_URL, migrates it like a real database, then runs selective
+metadata searches built by build_audit_events_query. For each it times the
+query with and without index scans. tests/test_audit_search_plan.py checks
+that these searches are planned on the GIN index. The scratch schema is
+dropped afterwards.
+
+Run from apps/api:
+
+    python benchmarks/bench_audit_search.py --events 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncpg  # noqa: E402
+
+from audit_service import build_audit_events_query, fetch_audit_rows  # noqa: E402
+from db import DATABASE_URL, _init_connection, migrate  # noqa: E402
+
+SCHEMA = "bench_audit_search"
+
+# One in 50 events is a policy evaluation; few of those deny a Deployment
+SEED = """
+    INSERT INTO audit_events (timestamp, actor, action, resource, resource_id, success, metadata)
+    SELECT
+        NOW() - make_interval(secs => i),
+        'user-' || (i % 300) || '@example.com',
+        CASE WHEN i % 50 = 0 THEN 'policy.evaluate' ELSE (ARRAY['project.view', 'project.list', 'project.create'])[1 + i % 3] END,
+        CASE WHEN i % 50 = 0 THEN 'policy' ELSE 'project' END,
+        'res-' || (i % 5000),
+        i % 50 <> 0 OR i % 7 <> 0,
+        CASE WHEN i % 50 = 0 THEN jsonb_build_object(
+            'decision', CASE WHEN i % 7 = 0 THEN 'deny' ELSE 'allow' END,
+            'resource_kind', (ARRAY['Deployment', 'Service', 'Ingress', 'CronJob'])[1 + i / 50 % 4],
+            'policy', 'policy-' || (i % 40),
+            'violations', CASE WHEN i % 7 = 0
+                THEN jsonb_build_array(jsonb_build_object('rule', 'no-privileged', 'severity', (ARRAY['high', 'low', 'low', 'low'])[1 + i / 50 % 4]))
+                ELSE '[]'::jsonb END
+        ) ELSE jsonb_build_object('page', 1 + i % 10, 'source', 'ui') END
+    FROM generate_series(1, $1) AS i
+"""
+
+SEARCHES = {
+    "contains": {"metadata_contains": {"decision": "deny", "resource_kind": "Deployment"}},
+    "path_equality": {"metadata_path": '$.decision == "deny" && $.resource_kind == "Deployment"'},
+    "path_array": {"metadata_path": '$.violations[*].severity == "high"'},
+    "contains_with_action": {"action": "policy.evaluate", "metadata_contains": {"policy": "policy-10"}},
+}
+
+
+async def seed(conn: asyncpg.Connection, events: int) -> None:
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    # Only the scratch schema, so migrate() finds no existing schema_migrations
+    await conn.execute(f"SET search_path TO {SCHEMA}")
+    await migrate(conn)
+    await conn.execute(SEED, events)
+    # VACUUM also merges the GIN pending list, as autovacuum would on a live table
+    await conn.execute("VACUUM ANALYZE audit_events")
+
+
+async def timed(conn: asyncpg.Connection, query: str, params: list, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await fetch_audit_rows(conn, query, params, custom_plan=True)
+        samples.append(time.perf_counter() - started)
+    return len(rows), round(statistics.median(samples) * 1000, 2)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    conn = await asyncpg.connect(DATABASE_URL)
+    await _init_connection(conn)
+    try:
+        await seed(conn, args.events)
+        results = {}
+        for name, filters in SEARCHES.items():
+            query, params = build_audit_events_query(**filters, limit=100)
+            rows, indexed_ms = await timed(conn, query, params, args.repeat)
+            async with conn.transaction():
+                await conn.execute("SET LOCAL enable_bitmapscan = off")
+                await conn.execute("SET LOCAL enable_indexscan = off")
+                _, scan_ms = await timed(conn, query, params, args.repeat)
+            results[name] = {
+                "rows": rows,
+                "median_ms": indexed_ms,
+                "without_index_ms": scan_ms,
+            }
+        return {"events": args.events, "searches": results}
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema for manual EXPLAINs")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Project search benchmark
+
+Seeds synthetic projects into a scratch schema of the Postgres at
+DATABASE_URL, migrates it like a real database, then times representative
+searches (page plus facet counts) and reports which indexes each plan
+uses. The scratch schema is dropped afterwards.
+
+Run from apps/api:
+
+    python benchmarks/bench_project_search.py --projects 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncpg  # noqa: E402
+
+from db import DATABASE_URL, _init_connection, migrate  # noqa: E402
+from routers.projects import build_project_search, run_project_search  # noqa: E402
+
+SCHEMA = "bench_project_search"
+
+SEED = """
+    INSERT INTO projects (name, template, environment, team, status, created_by, created_at, metadata)
+    SELECT
+        (ARRAY['payments', 'checkout', 'search', 'ledger', 'identity', 'catalog', 'billing', 'notify'])[1 + i % 8]
+            || '-' || (ARRAY['api', 'worker', 'web', 'etl'])[1 + i / 8 % 4] || '-' || i,
+        (ARRAY['fastapi-service', 'node-service', 'react-app', 'data-pipeline', 'go-service'])[1 + i % 5],
+        (ARRAY['dev', 'staging', 'prod'])[1 + i % 3],
+        'team-' || (i % 40),
+        (ARRAY['active', 'active', 'active', 'provisioning', 'failed', 'archived'])[1 + i % 6],
+        'bench',
+        NOW() - make_interval(mins => i),
+        jsonb_build_object(
+            'cost_center', 'cc-' || (i % 50),
+            'tier', (ARRAY['gold', 'silver', 'bronze'])[1 + i % 3],
+            'replicas', 1 + i % 5
+        ) || CASE WHEN i % 10 = 0 THEN '{"pci": true}'::jsonb ELSE '{}'::jsonb END
+    FROM generate_series(1, $1) AS i
+"""
+
+SEARCHES = {
+    "facets_only": {},
+    "text": {"q": "payments api"},
+    "text_prefix": {"q": "check"},
+    "name_prefix": {"name_prefix": "ledger-etl-1"},
+    "fields": {"team": ["team-7", "team-8"], "environment": ["prod"]},
+    "metadata_value": {"metadata": ["cost_center=cc-7"]},
+    "metadata_key": {"metadata": ["pci"], "status": ["active"]},
+    "combined": {"q": "billing", "environment": ["prod"], "metadata": ["tier=bronze"]},
+}
+
+
+async def seed(conn: asyncpg.Connection, projects: int) -> None:
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    # Only the scratch schema, so migrate() finds no existing schema_migrations
+    await conn.execute(f"SET search_path TO {SCHEMA}")
+    await migrate(conn)
+    await conn.execute(SEED, projects)
+    await conn.execute("ANALYZE projects")
+
+
+def plan_indexes(plan: dict) -> list:
+    found = set()
+
+    def walk(node: dict) -> None:
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return sorted(found)
+
+
+async def explain(conn: asyncpg.Connection, where_clause: str, params: list) -> list:
+    plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM projects {where_clause}", *params)
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan_indexes(plan[0]["Plan"])
+
+
+async def run(args: argparse.Namespace) -> dict:
+    conn = await asyncpg.connect(DATABASE_URL)
+    await _init_connection(conn)
+    try:
+        started = time.perf_counter()
+        await seed(conn, args.projects)
+        seeded = time.perf_counter() - started
+
+        results = {}
+        for name, filters in SEARCHES.items():
+            where_clause, params, order_by = build_project_search(**filters)
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = await run_project_search(conn, where_clause, params, order_by, 1, 20)
+                samples.append(time.perf_counter() - started)
+            results[name] = {
+                "total": result["total"],
+                "median_ms": round(statistics.median(samples) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                "indexes": await explain(conn, where_clause, params),
+            }
+        return {"projects": args.projects, "seed_s": round(seeded, 1), "searches": results}
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema for manual EXPLAINs")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Scorecard engine benchmark
+
+Times the vectorized compute_scores pass over synthetic metric matrices and
+checks it against a straightforward per-project loop.
+
+Run from apps/api:
+
+    python benchmarks/bench_scoring.py --projects 10000 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import DEFAULT_TIER, METRICS, compute_scores, load_config  # noqa: E402
+
+
+def scalar_tier(config, row) -> str:
+    """Reference per-project implementation"""
+    scores = [min(max(int(round(value)), 0), 100) for value in row]
+    for tier, thresholds in zip(config.tiers, config.thresholds):
+        if all(score >= threshold for score, threshold in zip(scores, thresholds)):
+            return tier
+    return DEFAULT_TIER
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    config = load_config()
+    rng = np.random.default_rng(args.seed)
+    results = []
+
+    for count in args.projects:
+        metrics = rng.uniform(60, 100, size=(count, len(METRICS)))
+
+        started = time.perf_counter()
+        _, tiers = compute_scores(config, metrics)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = [scalar_tier(config, row) for row in metrics.tolist()]
+        scalar = time.perf_counter() - started
+
+        assert tiers.tolist() == expected
+        results.append({
+            "projects": count,
+            "vectorized_ms": round(vectorized * 1000, 2),
+            "scalar_ms": round(scalar * 1000, 2),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-page serialization benchmark for project listings
+
+Compares the validated path (ProjectResponse(**dict(row)) followed by FastAPI's
+response_model re-validation and JSON encoding) against the trusted fast path
+used by the projects router, which serializes row dicts directly.
+
+Run from apps/api:
+
+    python benchmarks/bench_serialization.py --page-sizes 20 100 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routers.projects import (  # noqa: E402
+    ProjectListResponse,
+    ProjectResponse,
+    trusted_json_response,
+)
+
+
+def make_rows(count: int) -> list:
+    """Build rows shaped like asyncpg Records from the projects table"""
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"project-{i}",
+            "template": "data-pipeline",
+            "environment": "dev",
+            "team": "analytics",
+            "status": "active",
+            "created_at": now - timedelta(days=i),
+            "updated_at": now,
+            "created_by": "user@example.com",
+            "metadata": {"cost_center": "cc-42", "tags": ["etl", "batch"]},
+        }
+        for i in range(count)
+    ]
+
+
+def validated_page(rows: list) -> bytes:
+    """Previous behaviour: validate rows, then let response_model validate again"""
+    page = ProjectListResponse(
+        projects=[ProjectResponse(**{**row, "id": str(row["id"])}) for row in rows],
+        total=len(rows),
+        page=1,
+        page_size=len(rows),
+    )
+    revalidated = ProjectListResponse.model_validate(page.model_dump())
+    return json.dumps(revalidated.model_dump(mode="json")).encode()
+
+
+def trusted_page(rows: list) -> bytes:
+    """Fast path: serialize trusted rows once, without building models"""
+    return trusted_json_response({
+        "projects": [dict(row) for row in rows],
+        "total": len(rows),
+        "page": 1,
+        "page_size": len(rows),
+    }).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.page_sizes:
+        rows = make_rows(size)
+        assert json.loads(validated_page(rows)) == json.loads(trusted_page(rows))
+        for name, fn in (("validated", validated_page), ("trusted", trusted_page)):
+            best = min(timeit.repeat(lambda: fn(rows), number=args.repeat, repeat=5))
+            results.append({
+                "path": name,
+                "page_size": size,
+                "us_per_page": round(best / args.repeat * 1e6, 2),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
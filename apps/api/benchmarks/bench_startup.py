@@ -0,0 +1,110 @@
+"""
+Cold start benchmark for the API
+
+Measures, in fresh processes, how long `import main` takes and how long a
+uvicorn server takes from spawn until /ready first reports it ready.
+Needs the Postgres at DATABASE_URL; background batch jobs are disabled so
+they do not compete with startup.
+
+Run from apps/api:
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def startup_env() -> dict:
+    return {
+        **os.environ,
+        "SCORECARD_INTERVAL_SECONDS": "0",
+        "COST_FORECAST_INTERVAL_SECONDS": "0",
+        "AUDIT_SEAL_INTERVAL_SECONDS": "0",
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=API_DIR, env=startup_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_first_ready(timeout: float) -> float:
+    """Seconds from spawning uvicorn until /ready answers 200"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ready"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=startup_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited during startup: {server.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                # Includes the 503 /ready returns until the first checks pass
+                pass
+            time.sleep(0.005)
+        raise TimeoutError(f"/ready not ready within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # Unmeasured first run applies any pending migrations and warms the OS page cache
+    time_first_ready(args.timeout)
+
+    imports = [time_import() for _ in range(args.repeat)]
+    ready = [time_first_ready(args.timeout) for _ in range(args.repeat)]
+    print(json.dumps({
+        "repeat": args.repeat,
+        "import": summarize(imports),
+        "first_ready": summarize(ready),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Streaming billing-export ingestion for Allstar Forge Platform
+
+Provides:
+- Streaming reads of CSV (optionally gzipped) and Parquet billing exports
+- Mapping of billing tags to projects through an index loaded once per run
+- Per (project, day, service) aggregation in a buffer bounded by key count,
+  flushed into cost_daily with COPY when full
+- Checkpoints committed with each flush, so an interrupted run resumes
+  where it stopped without double counting
+- Restarts that remove the source's ingested rows and their rollup
+  contributions together with the checkpoint
+- Throughput and peak RSS reported at the end of each run
+
+Usage:
+    python billing_ingest.py export.csv.gz --source aws-cur-2024-01 \\
+        --date-column lineItem/UsageStartDate --cost-column lineItem/UnblendedCost \\
+        --tag-column resourceTags/user:project --service-column product/ProductName
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import itertools
+import json
+import os
+import resource
+import time
+from datetime import date
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import asyncpg
+import structlog
+
+from cost_series import COST_CURRENCY, ingest_cost_rows, remove_cost_source
+from db import close_pool, get_connection
+
+logger = structlog.get_logger()
+
+DEFAULT_BATCH_ROWS = 65536
+DEFAULT_MAX_BUFFER_KEYS = 200_000
+
+
+class ProjectTagIndex:
+    """Maps billing tag values to project IDs"""
+
+    def __init__(self, mapping: Dict[str, Any]) -> None:
+        self._mapping = mapping
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection) -> "ProjectTagIndex":
+        """Index every project by ID, name and metadata billing_tag"""
+        mapping: Dict[str, Any] = {}
+        for row in await conn.fetch("SELECT id, name, metadata->>'billing_tag' AS billing_tag FROM projects"):
+            mapping[str(row["id"])] = row["id"]
+            mapping[row["name"]] = row["id"]
+            if row["billing_tag"]:
+                mapping[row["billing_tag"]] = row["id"]
+        return cls(mapping)
+
+    def __len__(self) -> int:
+        return len(self._mapping)
+
+    def resolve(self, tag: Optional[str]) -> Optional[Any]:
+        return self._mapping.get(tag) if tag else None
+
+
+def file_fingerprint(path: str) -> str:
+    """Identity of an export file; a changed file invalidates its checkpoint"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def iter_csv_rows(path: str, columns: Tuple[str, ...], skip: int) -> Iterator[Tuple[Optional[str], ...]]:
+    """Yield the selected columns of each CSV row, skipping the first rows"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = [column for column in columns if column and column not in header]
+        if missing:
+            raise ValueError(f"Columns not found in export: {missing}")
+        indexes = [header.index(column) if column else None for column in columns]
+        for row in itertools.islice(reader, skip, None):
+            yield tuple(row[i] if i is not None and i < len(row) else None for i in indexes)
+
+
+def iter_parquet_rows(path: str, columns: Tuple[str, ...], skip: int, batch_rows: int) -> Iterator[Tuple[Optional[str], ...]]:
+    """Yield the selected columns of each Parquet row, reading one record batch at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet ingestion requires pyarrow") from e
+
+    selected = [column for column in columns if column]
+    parquet_file = pq.ParquetFile(path)
+    seen = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=selected):
+        if seen + batch.num_rows <= skip:
+            seen += batch.num_rows
+            continue
+        values = {name: batch.column(name).to_pylist() for name in selected}
+        start = max(0, skip - seen)
+        seen += batch.num_rows
+        for i in range(start, batch.num_rows):
+            yield tuple(
+                None if not column or values[column][i] is None else str(values[column][i])
+                for column in columns
+            )
+
+
+class CostBuffer:
+    """Per (project, day, service) cost sums, bounded by key count"""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self.sums: Dict[Tuple[Any, date, str, str], float] = {}
+
+    def add(self, key: Tuple[Any, date, str, str], amount: float) -> None:
+        self.sums[key] = self.sums.get(key, 0.0) + amount
+
+    @property
+    def full(self) -> bool:
+        return len(self.sums) >= self.max_keys
+
+    def drain(self, source: str) -> list:
+        rows = [
+            (project_id, day, service, round(amount, 4), currency, source)
+            for (project_id, day, service, currency), amount in self.sums.items()
+        ]
+        self.sums = {}
+        return rows
+
+
+async def _load_checkpoint(conn: asyncpg.Connection, source: str, fingerprint: str, restart: bool) -> Tuple[int, bool]:
+    row = await conn.fetchrow(
+        "SELECT fingerprint, position, completed FROM cost_ingest_checkpoints WHERE source = $1", source
+    )
+    if row is None or restart:
+        return 0, False
+    if row["fingerprint"] != fingerprint:
+        raise RuntimeError(
+            f"Export for source {source!r} changed since its last checkpoint; rerun with --restart "
+            "to replace the rows already ingested for it"
+        )
+    return row["position"], row["completed"]
+
+
+async def _commit(conn: asyncpg.Connection, rows: list, source: str, fingerprint: str, position: int, completed: bool) -> None:
+    """Write aggregated rows and advance the checkpoint atomically"""
+    async with conn.transaction():
+        await ingest_cost_rows(conn, rows)
+        await conn.execute("""
+            INSERT INTO cost_ingest_checkpoints (source, fingerprint, position, completed, updated_at)
+            VALUES ($1, $2, $3, $4, NOW())
+            ON CONFLICT (source) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint, position = EXCLUDED.position,
+                completed = EXCLUDED.completed, updated_at = NOW()
+        """, source, fingerprint, position, completed)
+
+
+async def ingest_export(args: argparse.Namespace) -> Dict[str, Any]:
+    """Stream one export file into cost_daily and return run statistics"""
+    source = args.source or os.path.basename(args.path)
+    fingerprint = file_fingerprint(args.path)
+    columns = (args.date_column, args.cost_column, args.tag_column, args.service_column, args.currency_column)
+
+    started = time.perf_counter()
+    stats = {
+        "source": source, "rows_read": 0, "rows_unmapped": 0, "rows_invalid": 0,
+        "rows_written": 0, "rows_removed": 0, "flushes": 0,
+    }
+
+    async with get_connection() as conn:
+        position, completed = await _load_checkpoint(conn, source, fingerprint, args.restart)
+        if completed:
+            return {**stats, "status": "already_completed"}
+        if args.restart:
+            # Rows from the earlier run would otherwise be counted twice
+            async with conn.transaction():
+                stats["rows_removed"] = await remove_cost_source(conn, source)
+                await conn.execute("DELETE FROM cost_ingest_checkpoints WHERE source = $1", source)
+
+        index = await ProjectTagIndex.load(conn)
+        stats["resumed_from"] = position
+        logger.info("Billing ingestion started", source=source, resume_position=position, index_size=len(index))
+
+        if args.path.endswith(".parquet"):
+            rows = iter_parquet_rows(args.path, columns, position, args.batch_rows)
+        else:
+            rows = iter_csv_rows(args.path, columns, position)
+
+        buffer = CostBuffer(args.max_buffer_keys)
+        day_cache: Dict[str, date] = {}
+
+        for usage_date, cost, tag, service, currency in rows:
+            position += 1
+            stats["rows_read"] += 1
+            project_id = index.resolve(tag)
+            if project_id is None:
+                stats["rows_unmapped"] += 1
+            else:
+                try:
+                    key = usage_date[:10]
+                    day = day_cache.get(key)
+                    if day is None:
+                        day = day_cache[key] = date.fromisoformat(key)
+                    buffer.add((project_id, day, service or "unallocated", currency or COST_CURRENCY), float(cost))
+                except (TypeError, ValueError):
+                    stats["rows_invalid"] += 1
+
+            if buffer.full:
+                drained = buffer.drain(source)
+                await _commit(conn, drained, source, fingerprint, position, False)
+                stats["rows_written"] += len(drained)
+                stats["flushes"] += 1
+
+        drained = buffer.drain(source)
+        await _commit(conn, drained, source, fingerprint, position, True)
+        stats["rows_written"] += len(drained)
+        stats["flushes"] += 1
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        "status": "completed",
+        "elapsed_seconds": round(elapsed, 2),
+        "rows_per_second": round(stats["rows_read"] / elapsed) if elapsed else None,
+        "mb_per_second": round(os.path.getsize(args.path) / 1e6 / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+    logger.info("Billing ingestion finished", **stats)
+    return stats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream a billing export into the cost time series")
+    parser.add_argument("path", help="CSV, CSV.gz or Parquet billing export")
+    parser.add_argument("--source", help="Checkpoint key for this export (defaults to the file name)")
+    parser.add_argument("--date-column", default="usage_date")
+    parser.add_argument("--cost-column", default="cost")
+    parser.add_argument("--tag-column", default="project", help="Tag holding the project ID, name or billing_tag")
+    parser.add_argument("--service-column", default="service")
+    parser.add_argument("--currency-column", default="", help="Leave empty to assume COST_CURRENCY")
+    parser.add_argument("--max-buffer-keys", type=int, default=DEFAULT_MAX_BUFFER_KEYS,
+                        help="Flush after this many distinct (project, day, service) keys")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Parquet record batch size")
+    parser.add_argument("--restart", action="store_true", help="Remove rows already ingested for the source and start over")
+    return parser.parse_args(argv)
+
+
+async def _main() -> None:
+    stats = await ingest_export(parse_args())
+    await close_pool()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
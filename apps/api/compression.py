@@ -0,0 +1,229 @@
+"""
+Response compression middleware for Allstar Forge Platform API
+
+Provides:
+- Accept-Encoding negotiation across zstd, brotli and gzip
+- Minimum-size threshold so small responses skip compression entirely
+- Streaming compression for chunked responses
+- Low default compression levels to keep CPU cost per response bounded
+
+brotli and zstandard are optional; when they are not installed the
+middleware only offers gzip.
+"""
+
+import zlib
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Server preference order when the client accepts several encodings equally
+SUPPORTED_ENCODINGS: Tuple[str, ...] = tuple(
+    name for name, available in (
+        ("zstd", zstandard is not None),
+        ("br", brotli is not None),
+        ("gzip", True),
+    ) if available
+)
+
+COMPRESSIBLE_MEDIA_TYPES: Tuple[str, ...] = (
+    "application/json",
+    "application/problem+json",
+    "text/",
+)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def select_encoding(accept_encoding: str, supported: Sequence[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """
+    Pick the best content coding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw Accept-Encoding request header value
+        supported: Encodings the server can produce, in preference order
+
+    Returns:
+        Chosen encoding, or None when the response should stay uncompressed
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    wildcard = weights.get("*", 0.0)
+    best: Optional[str] = None
+    best_q = 0.0
+    for encoding in supported:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses with the negotiated encoding"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        excluded_media_types: Sequence[str] = ("text/event-stream",),
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor_for(self, encoding: str):
+        if encoding == "zstd":
+            return _ZstdCompressor(self.zstd_level)
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def is_compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(self.excluded_media_types):
+            return False
+        return content_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+class _CompressionResponder:
+    """Per-request send wrapper that decides on and applies compression"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start_message is not None:
+            await self._start(message)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        chunk = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _start(self, message: Message) -> None:
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.middleware.is_compressible(headers):
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body and len(body) < self.middleware.minimum_size:
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        self.compressor = self.middleware.compressor_for(self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            headers["ETag"] = "W/" + headers["etag"]
+
+        if not more_body:
+            body = self.compressor.finish(body)
+            headers["Content-Length"] = str(len(body))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        del headers["Content-Length"]
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
@@ -0,0 +1,465 @@
+"""
+Cost time series and forecasting for Allstar Forge Platform
+
+Provides:
+- Append-only daily cost series in cost_daily, range-partitioned by month
+- Bulk ingestion of billing export rows via COPY
+- Daily rollups by team, environment and template, updated on ingestion
+  and when a source's rows are removed for re-ingestion
+- Vectorized trend forecasting for every project in one NumPy pass
+- Savings opportunity detection and precomputed snapshots in costs
+
+The costs router serves the latest snapshot written by the forecast job and
+never computes anything inline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import asyncpg
+import structlog
+
+from db import get_connection
+from jobs import PeriodicJob
+
+if TYPE_CHECKING:
+    # Imported inside the functions that need it, keeping it off API startup
+    import numpy as np
+
+logger = structlog.get_logger()
+
+COST_CURRENCY = os.getenv("COST_CURRENCY", "USD")
+COST_HISTORY_DAYS = int(os.getenv("COST_HISTORY_DAYS", "90"))
+COST_FORECAST_INTERVAL_SECONDS = float(os.getenv("COST_FORECAST_INTERVAL_SECONDS", "3600"))
+COST_SNAPSHOT_RETENTION_DAYS = int(os.getenv("COST_SNAPSHOT_RETENTION_DAYS", "7"))
+
+# Horizon of the rolling forecast reported alongside the month-end forecast
+FORECAST_HORIZON_DAYS = 30
+
+# Savings rules
+WEEKEND_RATIO_THRESHOLD = 0.8      # non-prod weekend spend vs weekday spend
+WEEKEND_DAYS_PER_MONTH = 8.6
+GROWTH_THRESHOLD = 0.25            # last 30 days vs the 30 before
+IDLE_STATUSES = ("suspended", "deleted")
+
+# Columns accepted by ingest_cost_rows, in record order
+COST_COLUMNS: Tuple[str, ...] = ("project_id", "day", "service", "amount", "currency", "source")
+
+# Project attributes that costs are rolled up by; keys are SQL over projects p
+ROLLUP_DIMENSIONS: Dict[str, str] = {
+    "team": "COALESCE(p.team, 'unassigned')",
+    "environment": "p.environment",
+    "template": "p.template",
+}
+
+_ROLLUP_KEYS = ", ".join(f"('{dimension}', {key})" for dimension, key in ROLLUP_DIMENSIONS.items())
+
+# Time buckets supported by aggregate_costs
+ROLLUP_GRANULARITIES: Dict[str, str] = {
+    "total": "NULL::date",
+    "day": "day",
+    "month": "date_trunc('month', day)::date",
+}
+
+# Advisory lock key so only one API process forecasts at a time
+COST_FORECAST_LOCK_ID = 0xC057F0CA
+
+_known_partitions: Set[str] = set()
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month_start: date) -> str:
+    return f"cost_daily_y{month_start.year:04d}m{month_start.month:02d}"
+
+
+async def ensure_partitions(conn: asyncpg.Connection, first_day: date, last_day: date) -> None:
+    """Create monthly cost_daily partitions covering [first_day, last_day]"""
+    month = _month_start(first_day)
+    while month <= last_day:
+        name = partition_name(month)
+        if name not in _known_partitions:
+            try:
+                # A savepoint when called inside ingest_cost_rows' transaction, so a
+                # lost race does not abort the caller's transaction with it
+                async with conn.transaction():
+                    await conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF cost_daily "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+                    )
+            except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+                # Created concurrently by another ingester
+                pass
+            _known_partitions.add(name)
+        month = _next_month(month)
+
+
+async def ingest_cost_rows(conn: asyncpg.Connection, rows: Sequence[Tuple[Any, ...]]) -> int:
+    """
+    Append daily cost rows with COPY
+
+    Args:
+        conn: Database connection
+        rows: Tuples in COST_COLUMNS order
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    days = [row[1] for row in rows]
+    async with conn.transaction():
+        await ensure_partitions(conn, min(days), max(days))
+        await conn.copy_records_to_table("cost_daily", records=rows, columns=list(COST_COLUMNS))
+        await _update_rollups(conn, rows)
+    return len(rows)
+
+
+async def _update_rollups(conn: asyncpg.Connection, rows: Sequence[Tuple[Any, ...]]) -> None:
+    """Fold newly ingested rows into cost_rollups under each project's current attributes"""
+    totals: Dict[Tuple[Any, date, str], float] = {}
+    for project_id, day, _, amount, currency, _ in rows:
+        key = (project_id, day, currency)
+        totals[key] = totals.get(key, 0.0) + float(amount)
+
+    project_ids, days, currencies = zip(*totals)
+    # Sorted upserts keep concurrent ingesters from deadlocking on shared rollup rows
+    await conn.execute(f"""
+        INSERT INTO cost_rollups (dimension, key, day, currency, amount)
+        SELECT d.dimension, d.key, s.day, s.currency, SUM(s.amount)
+        FROM unnest($1::uuid[], $2::date[], $3::text[], $4::float8[]) AS s(project_id, day, currency, amount)
+        JOIN projects p ON p.id = s.project_id
+        CROSS JOIN LATERAL (VALUES {_ROLLUP_KEYS}) AS d(dimension, key)
+        GROUP BY d.dimension, s.day, d.key, s.currency
+        ORDER BY d.dimension, s.day, d.key, s.currency
+        ON CONFLICT (dimension, day, key, currency)
+        DO UPDATE SET amount = cost_rollups.amount + EXCLUDED.amount
+    """, list(project_ids), list(days), list(currencies), list(totals.values()))
+
+
+async def remove_cost_source(conn: asyncpg.Connection, source: str) -> int:
+    """
+    Delete the cost_daily rows of one ingestion source and subtract them from cost_rollups
+
+    Run inside the caller's transaction so the removal commits together with
+    whatever replaces the rows.
+
+    Returns:
+        Number of cost_daily rows removed
+    """
+    return await conn.fetchval(f"""
+        WITH removed AS (
+            DELETE FROM cost_daily WHERE source = $1
+            RETURNING project_id, day, currency, amount
+        ), contributions AS (
+            SELECT d.dimension, d.key, r.day, r.currency, SUM(r.amount) AS amount
+            FROM removed r
+            JOIN projects p ON p.id = r.project_id
+            CROSS JOIN LATERAL (VALUES {_ROLLUP_KEYS}) AS d(dimension, key)
+            GROUP BY d.dimension, r.day, d.key, r.currency
+        ), subtracted AS (
+            UPDATE cost_rollups c SET amount = c.amount - x.amount
+            FROM contributions x
+            WHERE c.dimension = x.dimension AND c.day = x.day AND c.key = x.key AND c.currency = x.currency
+        )
+        SELECT COUNT(*) FROM removed
+    """, source)
+
+
+async def rebuild_cost_rollups(conn: asyncpg.Connection) -> int:
+    """
+    Recompute cost_rollups from the full cost_daily series
+
+    Needed once for history ingested before rollups existed, or after
+    projects move between teams and past spend should follow them.
+
+    Returns:
+        Number of rollup rows written
+    """
+    async with conn.transaction():
+        await conn.execute("LOCK TABLE cost_rollups IN EXCLUSIVE MODE")
+        await conn.execute("DELETE FROM cost_rollups")
+        result = await conn.execute(f"""
+            INSERT INTO cost_rollups (dimension, key, day, currency, amount)
+            SELECT d.dimension, d.key, c.day, c.currency, SUM(c.amount)
+            FROM cost_daily c
+            JOIN projects p ON p.id = c.project_id
+            CROSS JOIN LATERAL (VALUES {_ROLLUP_KEYS}) AS d(dimension, key)
+            GROUP BY d.dimension, c.day, d.key, c.currency
+        """)
+    return int(result.split()[-1])
+
+
+async def aggregate_costs(
+    conn: asyncpg.Connection,
+    group_by: str,
+    start: date,
+    end: date,
+    granularity: str = "total",
+    currency: str = COST_CURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    Spend per team, environment or template over [start, end]
+
+    Args:
+        group_by: One of ROLLUP_DIMENSIONS
+        granularity: One of ROLLUP_GRANULARITIES; "total" returns no buckets
+
+    Returns:
+        Groups ordered by descending total, each with its buckets when requested
+    """
+    rows = await conn.fetch(f"""
+        SELECT key, {ROLLUP_GRANULARITIES[granularity]} AS bucket,
+               SUM(amount)::float8 AS amount
+        FROM cost_rollups
+        WHERE dimension = $1 AND day BETWEEN $2 AND $3 AND currency = $4
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, group_by, start, end, currency)
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        group = groups.setdefault(row["key"], {"key": row["key"], "total": 0.0})
+        group["total"] += row["amount"]
+        if row["bucket"] is not None:
+            group.setdefault("buckets", []).append({"start": row["bucket"], "amount": round(row["amount"], 2)})
+    for group in groups.values():
+        group["total"] = round(group["total"], 2)
+    return sorted(groups.values(), key=lambda group: group["total"], reverse=True)
+
+
+async def load_cost_matrix(conn: asyncpg.Connection, start: date, days: int) -> Tuple[list, list, list, np.ndarray]:
+    """
+    Daily cost totals for every project with spend in [start, start + days)
+
+    Returns:
+        Project IDs, environments, statuses and a dense (projects, days) matrix
+    """
+    import numpy as np
+    rows = await conn.fetch("""
+        SELECT p.id, p.environment, p.status, c.offsets, c.amounts
+        FROM projects p
+        JOIN (
+            SELECT project_id,
+                   array_agg(day - $1::date ORDER BY day) AS offsets,
+                   array_agg(total ORDER BY day) AS amounts
+            FROM (
+                SELECT project_id, day, SUM(amount)::float8 AS total
+                FROM cost_daily
+                WHERE day >= $1 AND day < $2 AND currency = $3
+                GROUP BY project_id, day
+            ) daily
+            GROUP BY project_id
+        ) c ON c.project_id = p.id
+    """, start, start + timedelta(days=days), COST_CURRENCY)
+
+    matrix = np.zeros((len(rows), days))
+    for i, row in enumerate(rows):
+        matrix[i, row["offsets"]] = row["amounts"]
+    return (
+        [row["id"] for row in rows],
+        [row["environment"] for row in rows],
+        [row["status"] for row in rows],
+        matrix
+    )
+
+
+def forecast_costs(series: np.ndarray, as_of: date) -> Dict[str, np.ndarray]:
+    """
+    Fit a linear trend per project and project spend forward
+
+    Each row is fitted by least squares from its first non-zero day, so
+    recently onboarded projects are not dragged down by leading zeros.
+
+    Args:
+        series: (projects, days) daily totals ending the day before as_of
+        as_of: First day not covered by the series (normally today)
+
+    Returns:
+        Arrays of month-to-date spend, month-end forecast, next-30-day
+        forecast and daily slope per project
+    """
+    import numpy as np
+    projects, days = series.shape
+    t = np.arange(days, dtype=np.float64)
+
+    active = series > 0
+    first_day = np.where(active.any(axis=1), active.argmax(axis=1), days)
+    weights = (t[None, :] >= first_day[:, None]).astype(np.float64)
+    n = weights.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+
+    t_mean = (weights * t).sum(axis=1) / safe_n
+    y_mean = (weights * series).sum(axis=1) / safe_n
+    t_dev = (t[None, :] - t_mean[:, None]) * weights
+    denominator = (t_dev ** 2).sum(axis=1)
+    slope = np.divide(
+        (t_dev * (series - y_mean[:, None])).sum(axis=1),
+        denominator,
+        out=np.zeros(projects),
+        where=denominator > 0
+    )
+    intercept = y_mean - slope * t_mean
+
+    month_start = _month_start(as_of)
+    mtd_days = min((as_of - month_start).days, days)
+    month_to_date = series[:, days - mtd_days:].sum(axis=1) if mtd_days else np.zeros(projects)
+    remaining_days = (_next_month(month_start) - as_of).days
+
+    horizon = max(remaining_days, FORECAST_HORIZON_DAYS)
+    future_t = days + np.arange(horizon, dtype=np.float64)
+    predicted = np.maximum(intercept[:, None] + slope[:, None] * future_t[None, :], 0.0)
+
+    return {
+        "month_to_date": month_to_date,
+        "month_forecast": month_to_date + predicted[:, :remaining_days].sum(axis=1),
+        "next_30_days": predicted[:, :FORECAST_HORIZON_DAYS].sum(axis=1),
+        "daily_slope": slope,
+    }
+
+
+def detect_savings(
+    series: np.ndarray,
+    start: date,
+    environments: Sequence[str],
+    statuses: Sequence[str]
+) -> List[List[Dict[str, Any]]]:
+    """
+    Vectorized savings rules over the cost matrix
+
+    Returns:
+        Per project, a list of opportunities with an estimated monthly saving
+    """
+    import numpy as np
+    projects, days = series.shape
+    weekday = np.array([(start + timedelta(days=i)).weekday() for i in range(days)])
+    recent = series[:, -28:]
+    recent_weekend = weekday[-28:] >= 5
+
+    weekend_avg = recent[:, recent_weekend].mean(axis=1) if recent_weekend.any() else np.zeros(projects)
+    weekday_avg = recent[:, ~recent_weekend].mean(axis=1) if (~recent_weekend).any() else np.zeros(projects)
+    non_prod = np.array([environment != "prod" for environment in environments], dtype=bool)
+    always_on = non_prod & (weekday_avg > 0) & (weekend_avg >= WEEKEND_RATIO_THRESHOLD * weekday_avg)
+
+    last_30 = series[:, -30:].sum(axis=1)
+    previous_30 = series[:, -60:-30].sum(axis=1) if days >= 60 else np.zeros(projects)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(previous_30 > 0, last_30 / previous_30 - 1, 0.0)
+    growing = growth > GROWTH_THRESHOLD
+
+    idle = np.array([status in IDLE_STATUSES for status in statuses], dtype=bool) & (series[:, -7:].sum(axis=1) > 0)
+    idle_monthly = series[:, -7:].mean(axis=1) * 30
+
+    opportunities: List[List[Dict[str, Any]]] = [[] for _ in range(projects)]
+    for i in np.flatnonzero(always_on | growing | idle):
+        if idle[i]:
+            opportunities[i].append({
+                "type": "idle_spend",
+                "description": f"Project is {statuses[i]} but still incurring cost",
+                "estimated_monthly_savings": round(float(idle_monthly[i]), 2),
+            })
+        if always_on[i]:
+            opportunities[i].append({
+                "type": "off_hours_shutdown",
+                "description": f"{environments[i]} resources run through weekends; schedule off-hours shutdown",
+                "estimated_monthly_savings": round(float(weekend_avg[i] * WEEKEND_DAYS_PER_MONTH), 2),
+            })
+        if growing[i]:
+            opportunities[i].append({
+                "type": "spend_growth",
+                "description": f"Spend grew {growth[i]:.0%} over the last 30 days; review recent resource changes",
+                "estimated_monthly_savings": round(float(last_30[i] - previous_30[i]), 2),
+            })
+    return opportunities
+
+
+async def recompute_cost_forecasts(conn: asyncpg.Connection, as_of: Optional[date] = None) -> int:
+    """
+    Forecast every project's spend and persist snapshots into costs
+
+    Returns:
+        Number of projects forecast, or 0 if another process holds the lock
+    """
+    import numpy as np
+    as_of = as_of or datetime.now(timezone.utc).date()
+    start = as_of - timedelta(days=COST_HISTORY_DAYS)
+
+    async with conn.transaction():
+        if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", COST_FORECAST_LOCK_ID):
+            return 0
+
+        project_ids, environments, statuses, series = await load_cost_matrix(conn, start, COST_HISTORY_DAYS)
+        if not project_ids:
+            return 0
+
+        forecast = forecast_costs(series, as_of)
+        savings = detect_savings(series, start, environments, statuses)
+        calculated_at = datetime.now(timezone.utc)
+
+        await conn.execute("""
+            INSERT INTO costs (project_id, current_cost, forecast_cost, currency, calculated_at, metadata)
+            SELECT project_id, current_cost, forecast_cost, $4, $5, metadata::jsonb
+            FROM unnest($1::uuid[], $2::float8[], $3::float8[], $6::text[])
+                AS s(project_id, current_cost, forecast_cost, metadata)
+        """,
+            project_ids,
+            np.round(forecast["month_to_date"], 2).tolist(),
+            np.round(forecast["month_forecast"], 2).tolist(),
+            COST_CURRENCY,
+            calculated_at,
+            [
+                json.dumps({
+                    "next_30_days": round(next_30, 2),
+                    "daily_trend": round(slope, 4),
+                    "savings_opportunities": opportunities,
+                    "as_of": as_of.isoformat(),
+                })
+                for next_30, slope, opportunities in zip(
+                    forecast["next_30_days"].tolist(), forecast["daily_slope"].tolist(), savings
+                )
+            ]
+        )
+
+        await conn.execute(
+            "DELETE FROM costs WHERE calculated_at < NOW() - make_interval(days => $1)",
+            COST_SNAPSHOT_RETENTION_DAYS
+        )
+
+    return len(project_ids)
+
+
+async def run_cost_forecasts() -> int:
+    """Recompute all cost forecasts using a pooled connection"""
+    async with get_connection() as conn:
+        return await recompute_cost_forecasts(conn)
+
+
+scheduler = PeriodicJob("cost_forecasts", run_cost_forecasts, COST_FORECAST_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    # One-off forecast run, e.g. from a cron job: python cost_series.py
+    # Rebuild rollups from the full series instead: python cost_series.py --rebuild-rollups
+    import sys
+    from db import close_pool
+
+    async def _main() -> None:
+        if "--rebuild-rollups" in sys.argv:
+            async with get_connection() as conn:
+                print(f"Cost rollup rows written: {await rebuild_cost_rollups(conn)}")
+        else:
+            print(f"Cost forecasts written: {await scheduler.run_once()}")
+        await close_pool()
+
+    asyncio.run(_main())
@@ -0,0 +1,263 @@
+"""
+Incremental DORA metrics aggregation for Allstar Forge Platform
+
+Provides:
+- Per-project rolling-window state updated in O(1) per deployment/incident
+- Sliding daily counters for deployments and change failures
+- Log-bucketed quantile sketches for lead time and time to restore
+- Persistence in dora_aggregates with precomputed summary columns
+
+The state keeps one bucket per active day plus running window totals.
+Adding an event touches one day bucket and the totals; expiring a day
+subtracts its bucket from the totals, so no history is ever rescanned and
+readers only look at the summary columns.
+"""
+
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import asyncpg
+
+WINDOW_DAYS = int(os.getenv("DORA_WINDOW_DAYS", "30"))
+# Events may be stamped at most this far ahead of the server clock; a later
+# one would slide the window forward and expire every real bucket
+MAX_CLOCK_SKEW = timedelta(seconds=float(os.getenv("DORA_MAX_CLOCK_SKEW_SECONDS", "300")))
+
+# Sketch bucket growth factor; quantiles are accurate to about +/-11%
+SKETCH_GAMMA = 1.25
+_LOG_GAMMA = math.log(SKETCH_GAMMA)
+
+
+def epoch_day(ts: datetime) -> int:
+    """UTC day number of a timestamp"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() // 86400)
+
+
+def is_future(ts: datetime, now: Optional[datetime] = None) -> bool:
+    """Whether a timestamp lies beyond the allowed clock skew"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts > (now or datetime.now(timezone.utc)) + MAX_CLOCK_SKEW
+
+
+def sketch_bucket(seconds: float) -> str:
+    """Sketch bucket key for a duration (JSON object keys are strings)"""
+    return str(max(0, math.ceil(math.log(max(seconds, 1.0)) / _LOG_GAMMA)))
+
+
+def sketch_quantile(sketch: Dict[str, int], q: float) -> Optional[float]:
+    """Approximate quantile of the durations recorded in a sketch"""
+    total = sum(sketch.values())
+    if total == 0:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(sketch, key=int):
+        seen += sketch[key]
+        if seen > rank:
+            # Midpoint of the bucket (gamma^(i-1), gamma^i]
+            return 2 * SKETCH_GAMMA ** int(key) / (1 + SKETCH_GAMMA)
+    return None
+
+
+def _merge(target: Dict[str, int], source: Dict[str, int], sign: int) -> None:
+    for key, count in source.items():
+        value = target.get(key, 0) + sign * count
+        if value:
+            target[key] = value
+        else:
+            target.pop(key, None)
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"deploys": 0, "failures": 0, "lead_time": {}, "restore_time": {}}
+
+
+def new_state(day: int) -> Dict[str, Any]:
+    return {"head_day": day, "days": {}, "totals": _empty_bucket()}
+
+
+def advance(state: Dict[str, Any], day: int) -> None:
+    """Slide the window forward to end at day, expiring buckets that fall out"""
+    if day <= state["head_day"]:
+        return
+    cutoff = day - WINDOW_DAYS
+    totals = state["totals"]
+    for key in [key for key in state["days"] if int(key) <= cutoff]:
+        bucket = state["days"].pop(key)
+        totals["deploys"] -= bucket["deploys"]
+        totals["failures"] -= bucket["failures"]
+        _merge(totals["lead_time"], bucket["lead_time"], -1)
+        _merge(totals["restore_time"], bucket["restore_time"], -1)
+    state["head_day"] = day
+
+
+def _bucket_for(state: Dict[str, Any], day: int) -> Optional[Dict[str, Any]]:
+    advance(state, day)
+    if day <= state["head_day"] - WINDOW_DAYS:
+        return None
+    return state["days"].setdefault(str(day), _empty_bucket())
+
+
+def record_deployment(
+    state: Dict[str, Any],
+    deployed_at: datetime,
+    lead_time_seconds: Optional[float],
+    failed: bool
+) -> bool:
+    """
+    Add one deployment to the window
+
+    Returns:
+        False when the deployment is older than the window and was ignored
+    """
+    bucket = _bucket_for(state, epoch_day(deployed_at))
+    if bucket is None:
+        return False
+    totals = state["totals"]
+    bucket["deploys"] += 1
+    totals["deploys"] += 1
+    if failed:
+        bucket["failures"] += 1
+        totals["failures"] += 1
+    if lead_time_seconds is not None:
+        _merge(bucket["lead_time"], {sketch_bucket(lead_time_seconds): 1}, 1)
+        _merge(totals["lead_time"], {sketch_bucket(lead_time_seconds): 1}, 1)
+    return True
+
+
+def record_incident(state: Dict[str, Any], resolved_at: datetime, restore_seconds: float) -> bool:
+    """
+    Add one resolved incident's time to restore to the window
+
+    Returns:
+        False when the incident is older than the window and was ignored
+    """
+    bucket = _bucket_for(state, epoch_day(resolved_at))
+    if bucket is None:
+        return False
+    key = sketch_bucket(restore_seconds)
+    _merge(bucket["restore_time"], {key: 1}, 1)
+    _merge(state["totals"]["restore_time"], {key: 1}, 1)
+    return True
+
+
+def summarize(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary metrics stored alongside the state for O(1) reads"""
+    totals = state["totals"]
+    deploys = totals["deploys"]
+    return {
+        "deploy_count": deploys,
+        "failure_count": totals["failures"],
+        "deploys_per_day": deploys / WINDOW_DAYS,
+        "change_failure_rate": totals["failures"] / deploys if deploys else None,
+        "lead_time_p50_seconds": sketch_quantile(totals["lead_time"], 0.5),
+        "lead_time_p90_seconds": sketch_quantile(totals["lead_time"], 0.9),
+        "restore_time_p50_seconds": sketch_quantile(totals["restore_time"], 0.5),
+        "restore_time_p90_seconds": sketch_quantile(totals["restore_time"], 0.9),
+    }
+
+
+SUMMARY_COLUMNS: List[str] = list(summarize(new_state(0)).keys())
+
+
+async def _lock_states(conn: asyncpg.Connection, project_ids: List[str], today: int) -> Dict[str, Dict[str, Any]]:
+    """Ensure aggregate rows exist for known projects and lock them in a stable order"""
+    await conn.execute("""
+        INSERT INTO dora_aggregates (project_id, head_day, state)
+        SELECT p.id, $2, $3
+        FROM projects p
+        WHERE p.id = ANY($1::uuid[])
+        ON CONFLICT (project_id) DO NOTHING
+    """, project_ids, today, new_state(today))
+    rows = await conn.fetch("""
+        SELECT project_id, state FROM dora_aggregates
+        WHERE project_id = ANY($1::uuid[])
+        ORDER BY project_id
+        FOR UPDATE
+    """, project_ids)
+    return {str(row["project_id"]): row["state"] for row in rows}
+
+
+async def _store_states(conn: asyncpg.Connection, states: Dict[str, Dict[str, Any]]) -> None:
+    summary_assignments = ", ".join(f"{column} = ${i + 4}" for i, column in enumerate(SUMMARY_COLUMNS))
+    await conn.executemany(f"""
+        UPDATE dora_aggregates
+        SET state = $2, head_day = $3, {summary_assignments}, updated_at = NOW()
+        WHERE project_id = $1
+    """, [
+        (project_id, state, state["head_day"], *summarize(state).values())
+        for project_id, state in states.items()
+    ])
+
+
+async def ingest_events(
+    conn: asyncpg.Connection,
+    deployments: Iterable[Dict[str, Any]] = (),
+    incidents: Iterable[Dict[str, Any]] = ()
+) -> Dict[str, int]:
+    """
+    Fold a batch of deployment and incident events into the aggregates
+
+    Deployments need project_id, deployed_at, optional lead_time_seconds and
+    failed. Incidents need project_id, resolved_at and restore_seconds.
+    Each touched project row is locked once for the whole batch; events
+    for unknown projects or stamped beyond MAX_CLOCK_SKEW in the future are
+    counted as rejected.
+    """
+    deployments = list(deployments)
+    incidents = list(incidents)
+    project_ids = sorted({str(event["project_id"]) for event in deployments + incidents})
+    if not project_ids:
+        return {"accepted": 0, "ignored": 0, "rejected": 0}
+
+    accepted = ignored = rejected = 0
+    now = datetime.now(timezone.utc)
+    async with conn.transaction():
+        states = await _lock_states(conn, project_ids, epoch_day(now))
+        for event in deployments:
+            state = states.get(str(event["project_id"]))
+            if state is None or is_future(event["deployed_at"], now):
+                rejected += 1
+            elif record_deployment(state, event["deployed_at"], event.get("lead_time_seconds"), event.get("failed", False)):
+                accepted += 1
+            else:
+                ignored += 1
+        for event in incidents:
+            state = states.get(str(event["project_id"]))
+            if state is None or is_future(event["resolved_at"], now):
+                rejected += 1
+            elif record_incident(state, event["resolved_at"], event["restore_seconds"]):
+                accepted += 1
+            else:
+                ignored += 1
+        await _store_states(conn, states)
+
+    return {"accepted": accepted, "ignored": ignored, "rejected": rejected}
+
+
+async def roll_stale_aggregates(conn: asyncpg.Connection) -> int:
+    """
+    Slide windows that have not seen events today
+
+    Keeps summary columns correct for quiet projects; only rows whose
+    head_day is behind today are touched.
+    """
+    today = epoch_day(datetime.now(timezone.utc))
+    async with conn.transaction():
+        rows = await conn.fetch("""
+            SELECT project_id, state FROM dora_aggregates
+            WHERE head_day < $1
+            ORDER BY project_id
+            FOR UPDATE SKIP LOCKED
+        """, today)
+        states = {row["project_id"]: row["state"] for row in rows}
+        for state in states.values():
+            advance(state, today)
+        if states:
+            await _store_states(conn, states)
+    return len(states)
@@ -0,0 +1,180 @@
+"""
+Liveness and readiness for Allstar Forge Platform API
+
+Provides:
+- Dependency checks for Postgres, Temporal and Redis, run by one background
+  task per process on a fixed interval
+- Cached readiness served to probes without touching any dependency, so
+  frequent probes never take pool connections away from requests
+- Required vs optional dependencies: a failed required check makes the
+  process unready, a failed optional one only reports it as degraded
+
+Temporal and Redis are checked only when TEMPORAL_ADDRESS / REDIS_URL are
+set.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+import structlog
+
+from db import get_db_pool
+
+logger = structlog.get_logger()
+
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+READINESS_REQUIRED: Set[str] = {
+    name.strip() for name in os.getenv("READINESS_REQUIRED", "database").split(",") if name.strip()
+}
+TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "")
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+# Cached results older than this many intervals mean the checker is stuck
+STALE_AFTER_INTERVALS = 3
+
+
+async def check_database() -> None:
+    pool = await get_db_pool()
+    async with pool.acquire(timeout=HEALTH_CHECK_TIMEOUT_SECONDS) as conn:
+        await conn.fetchval("SELECT 1")
+
+
+async def check_temporal() -> None:
+    """Temporal frontend accepts TCP connections"""
+    host, _, port = TEMPORAL_ADDRESS.rpartition(":")
+    _, writer = await asyncio.open_connection(host or TEMPORAL_ADDRESS, int(port or 7233))
+    writer.close()
+    await writer.wait_closed()
+
+
+async def check_redis() -> None:
+    """Redis answers PING; an auth error still proves the server is up"""
+    url = urlparse(REDIS_URL)
+    reader, writer = await asyncio.open_connection(url.hostname or "localhost", url.port or 6379)
+    try:
+        writer.write(b"PING\r\n")
+        await writer.drain()
+        reply = await reader.readline()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    if not (reply.startswith(b"+PONG") or reply.startswith(b"-NOAUTH")):
+        raise ConnectionError(f"Unexpected reply to PING: {reply[:80]!r}")
+
+
+@dataclass
+class CheckResult:
+    up: bool
+    latency_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "status": "up" if self.up else "down",
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at.isoformat(),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class HealthChecker:
+    """Run dependency checks in the background and cache the results"""
+
+    def __init__(
+        self,
+        checks: Dict[str, Callable[[], Awaitable[None]]],
+        required: Set[str],
+        interval_seconds: float = HEALTH_CHECK_INTERVAL_SECONDS,
+        timeout_seconds: float = HEALTH_CHECK_TIMEOUT_SECONDS
+    ) -> None:
+        self.checks = checks
+        self.required = required
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.results: Dict[str, CheckResult] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refreshed_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _check(self, name: str, check: Callable[[], Awaitable[None]]) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        previous = self.results.get(name)
+        self.results[name] = CheckResult(
+            up=error is None,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            checked_at=datetime.now(timezone.utc),
+            error=error,
+        )
+        if previous is None or previous.up != (error is None):
+            log = logger.info if error is None else logger.warning
+            log("Dependency health changed", dependency=name, up=error is None, error=error)
+
+    async def refresh(self) -> None:
+        """Run every check concurrently and record the results"""
+        await asyncio.gather(*(self._check(name, check) for name, check in self.checks.items()))
+        self._refreshed_at = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval_seconds)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cached readiness report; never performs I/O"""
+        if not self._refreshed_at:
+            return {"status": "starting", "ready": False, "checks": {}}
+        stale = time.monotonic() - self._refreshed_at > self.interval_seconds * STALE_AFTER_INTERVALS
+        down = {name for name, result in self.results.items() if not result.up}
+        ready = not stale and not (down & self.required)
+        if stale:
+            status = "stale"
+        elif not ready:
+            status = "unavailable"
+        elif down:
+            status = "degraded"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "ready": ready,
+            "checks": {
+                name: {**result.to_dict(), "required": name in self.required}
+                for name, result in self.results.items()
+            },
+        }
+
+
+def _default_checks() -> Dict[str, Callable[[], Awaitable[None]]]:
+    checks = {"database": check_database}
+    if TEMPORAL_ADDRESS:
+        checks["temporal"] = check_temporal
+    if REDIS_URL:
+        checks["redis"] = check_redis
+    return checks
+
+
+checker = HealthChecker(checks=_default_checks(), required=READINESS_REQUIRED)
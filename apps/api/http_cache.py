@@ -0,0 +1,36 @@
+"""
+Conditional GET helpers for Allstar Forge Platform API
+
+Provides weak ETag generation from cheap freshness inputs (for example
+max(updated_at) plus the filter set) so handlers can answer 304 Not Modified
+before fetching or serializing a response body.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response
+
+
+def weak_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values that determine a response's content"""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """304 response carrying the current validator"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,55 @@
+"""
+Periodic background jobs for Allstar Forge Platform API
+
+Provides a small scheduler used by batch engines (scorecards, cost
+forecasts) that recompute precomputed read models on a fixed interval.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class PeriodicJob:
+    """Run an async job now and then every interval until stopped"""
+
+    def __init__(self, name: str, job: Callable[[], Awaitable[int]], interval_seconds: float) -> None:
+        self.name = name
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background loop; an interval of 0 disables the job"""
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run_once(self) -> int:
+        """Run the job once and log how many items it processed"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        processed = await self.job()
+        if processed:
+            logger.info(
+                "Periodic job completed",
+                job=self.name,
+                processed=processed,
+                duration_ms=round((loop.time() - started) * 1000, 1)
+            )
+        return processed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Periodic job failed", job=self.name, error=str(e))
+            await asyncio.sleep(self.interval_seconds)
@@ -10,15 +10,24 @@ Main FastAPI application providing REST endpoints for:
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import structlog
 import os
 
-from db import init_db, get_db_pool
+from db import init_db, get_db_pool, read_coalescer
+from health import checker as health_checker
 from auth import oidc_auth
-from routers import projects, environments, workflows, monitoring, catalog, scorecards, costs, policies, audit, extensions
+from admission import admit, concurrency_limiter, rate_limit
+from compression import CompressionMiddleware
+from status_events import broadcaster
+from audit_service import coalescer
+from audit_chain import sealer as audit_sealer
+from audit_archive import archiver as audit_archiver
+from scoring import scheduler as scorecard_scheduler
+from cost_series import scheduler as cost_forecast_scheduler
+from routers import projects, environments, workflows, monitoring, catalog, scorecards, costs, policies, audit, extensions, dora
 
 # Configure structured logging
 structlog.configure(
@@ -35,20 +44,50 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+# Deploys that run `python db.py` as a release step can skip the version check
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup/shutdown tasks"""
     logger.info("Starting Allstar Forge API")
     
-    # Initialize database
-    await init_db()
+    # Apply pending schema migrations; a single version check when current
+    if MIGRATE_ON_STARTUP:
+        await init_db()
     app.state.db_pool = await get_db_pool()
     
+    # Background dependency checks behind the cached /ready endpoint
+    health_checker.start()
+    
+    # Single LISTEN connection fanning status events out to SSE subscribers
+    await broadcaster.start()
+    
+    # Periodic flush of coalesced read audit events
+    coalescer.start()
+    
+    # Hash-chain sealing of new audit events, off the request path
+    audit_sealer.start()
+    
+    # Retention: sealed audit batches past AUDIT_RETENTION_DAYS move to Parquet
+    audit_archiver.start()
+    
+    # Periodic batch recomputation of scorecards and cost forecasts
+    scorecard_scheduler.start()
+    cost_forecast_scheduler.start()
+    
     yield
     
     # Cleanup
     logger.info("Shutting down Allstar Forge API")
+    await health_checker.stop()
+    await scorecard_scheduler.stop()
+    await cost_forecast_scheduler.stop()
+    await broadcaster.stop()
+    await coalescer.stop()
+    await audit_sealer.stop()
+    await audit_archiver.stop()
     if hasattr(app.state, 'db_pool') and app.state.db_pool:
         await app.state.db_pool.close()
 
@@ -71,6 +110,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated zstd/brotli/gzip compression for larger JSON bodies
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+)
+
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -84,7 +129,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail, "status_code": exc.status_code}
+        content={"detail": exc.detail, "status_code": exc.status_code},
+        headers=exc.headers
     )
 
 
@@ -106,32 +152,39 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 @app.get("/healthz")
 async def health_check():
-    """Health check endpoint for load balancers and monitoring"""
-    try:
-        # Check database connectivity
-        pool = app.state.db_pool
-        async with pool.acquire() as conn:
-            await conn.fetchval("SELECT 1")
-        
-        return {
-            "status": "healthy",
+    """Liveness probe: the process is serving requests; performs no I/O"""
+    return {"status": "healthy", "version": "1.0.0"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: cached dependency status from the background checker"""
+    report = health_checker.readiness()
+    return JSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content={
+            **report,
+            "admission": concurrency_limiter.snapshot(),
+            "coalescing": read_coalescer.snapshot(),
             "version": "1.0.0",
-            "database": "connected"
         }
-    except Exception as e:
-        logger.error("Health check failed", error=str(e))
-        raise HTTPException(status_code=503, detail="Service unavailable")
+    )
 
 
-# Mount API routers with proper authentication and error handling
-app.include_router(projects.router, prefix="/api/v1/projects", tags=["projects"])
-app.include_router(environments.router, prefix="/api/v1/environments", tags=["environments"])
-app.include_router(workflows.router, prefix="/api/v1/workflows", tags=["workflows"])
-app.include_router(monitoring.router, prefix="/api/v1/monitoring", tags=["monitoring"])
-app.include_router(catalog.router, prefix="/api/v1/catalog", tags=["catalog"])
-app.include_router(scorecards.router, prefix="/api/v1/scorecards", tags=["scorecards"])
-app.include_router(costs.router, prefix="/api/v1/costs", tags=["costs"])
-app.include_router(policies.router, prefix="/api/v1/policies", tags=["policies"])
-app.include_router(audit.router, prefix="/api/v1/audit", tags=["audit"])
-app.include_router(extensions.router, prefix="/api/v1/extensions", tags=["extensions"])
+# Per-identity rate limits on every API route; DB-bound routers also pass
+# the adaptive concurrency limit so overload is shed instead of queued
+limited = [Depends(rate_limit)]
+db_bound = [Depends(rate_limit), Depends(admit)]
 
+# Mount API routers with proper authentication and error handling
+app.include_router(projects.router, prefix="/api/v1/projects", tags=["projects"], dependencies=db_bound)
+app.include_router(environments.router, prefix="/api/v1/environments", tags=["environments"], dependencies=db_bound)
+app.include_router(workflows.router, prefix="/api/v1/workflows", tags=["workflows"], dependencies=db_bound)
+app.include_router(monitoring.router, prefix="/api/v1/monitoring", tags=["monitoring"], dependencies=limited)
+app.include_router(catalog.router, prefix="/api/v1/catalog", tags=["catalog"], dependencies=limited)
+app.include_router(scorecards.router, prefix="/api/v1/scorecards", tags=["scorecards"], dependencies=db_bound)
+app.include_router(dora.router, prefix="/api/v1/dora", tags=["dora"], dependencies=db_bound)
+app.include_router(costs.router, prefix="/api/v1/costs", tags=["costs"], dependencies=db_bound)
+app.include_router(policies.router, prefix="/api/v1/policies", tags=["policies"], dependencies=db_bound)
+app.include_router(audit.router, prefix="/api/v1/audit", tags=["audit"], dependencies=db_bound)
+app.include_router(extensions.router, prefix="/api/v1/extensions", tags=["extensions"], dependencies=db_bound)
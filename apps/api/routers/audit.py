@@ -1,11 +1,46 @@
-from fastapi import APIRouter, Depends
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from auth import oidc_auth
+from audit_service import InvalidMetadataPath, get_audit_events
 
 router = APIRouter()
 
 
 @router.get("/events")
-def list_events(limit: int = 100, _: dict = Depends(oidc_auth)):
-  return {"events": [], "limit": limit}
-
-
+async def list_events(
+  actor: Optional[str] = None,
+  action: Optional[str] = None,
+  resource: Optional[str] = None,
+  resource_id: Optional[str] = None,
+  success: Optional[bool] = None,
+  start_date: Optional[datetime] = None,
+  end_date: Optional[datetime] = None,
+  metadata: Optional[str] = Query(None, description='JSON object the metadata must contain, e.g. {"decision": "deny"}'),
+  metadata_path: Optional[str] = Query(None, max_length=1000, description='JSONPath predicate, e.g. $.decision == "deny"'),
+  limit: int = Query(100, ge=1, le=1000),
+  offset: int = Query(0, ge=0),
+  _: dict = Depends(oidc_auth)
+):
+  # Both metadata filters are served by the GIN index on audit_events.metadata;
+  # ranges reaching past retention are also read from the Parquet archive
+  metadata_contains = None
+  if metadata:
+    try:
+      metadata_contains = json.loads(metadata)
+    except ValueError:
+      raise HTTPException(status_code=400, detail="metadata must be a JSON object")
+    if not isinstance(metadata_contains, dict):
+      raise HTTPException(status_code=400, detail="metadata must be a JSON object")
+  try:
+    events = await get_audit_events(
+      actor=actor, action=action, resource=resource, resource_id=resource_id, success=success,
+      start_date=start_date, end_date=end_date, metadata_contains=metadata_contains,
+      metadata_path=metadata_path, limit=limit, offset=offset
+    )
+  except InvalidMetadataPath as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except RuntimeError as e:
+    raise HTTPException(status_code=503, detail=f"Archived audit events unavailable: {e}")
+  return {"events": events, "limit": limit, "offset": offset}
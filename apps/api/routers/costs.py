@@ -1,11 +1,110 @@
-from fastapi import APIRouter, Depends
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from auth import oidc_auth
+from audit_service import emit_event
+from cost_series import COST_CURRENCY, aggregate_costs, ingest_cost_rows
+from db import READ_COALESCING, fetchrow_shared, get_connection, read_coalescer
 
 router = APIRouter()
 
 
-@router.get("/{project_id}")
-def get_costs(project_id: str, _: dict = Depends(oidc_auth)):
-  return {"projectId": project_id, "current": 1234.56, "forecast": 1500.00, "savingsOpportunities": []}
+def _project_uuid(project_id: str) -> uuid.UUID:
+  try:
+    return uuid.UUID(project_id)
+  except ValueError:
+    raise HTTPException(status_code=400, detail=f"Invalid project ID: {project_id[:64]!r}")
+
+
+class CostRow(BaseModel):
+  project_id: str
+  day: date
+  amount: float
+  service: str = "unallocated"
+  currency: str = Field(COST_CURRENCY, min_length=3, max_length=3)
+
+
+class CostIngestRequest(BaseModel):
+  source: Optional[str] = Field(None, description="Billing export identifier")
+  rows: List[CostRow] = Field(..., min_length=1, max_length=50000)
+
 
+@router.post("/ingest")
+async def ingest_costs(req: CostIngestRequest, identity: dict = Depends(oidc_auth)):
+  # Bulk append of billing export rows into the daily cost series; rows for
+  # unknown projects could never reach the rollups, so they are skipped and reported
+  project_ids = [_project_uuid(row.project_id) for row in req.rows]
+  async with get_connection() as conn:
+    known = {
+      record["id"] for record in
+      await conn.fetch("SELECT id FROM projects WHERE id = ANY($1::uuid[])", list(set(project_ids)))
+    }
+    written = await ingest_cost_rows(conn, [
+      (project_id, row.day, row.service, row.amount, row.currency, req.source)
+      for project_id, row in zip(project_ids, req.rows) if project_id in known
+    ])
+  unknown = sorted({str(project_id) for project_id in project_ids if project_id not in known})
+  skipped = len(req.rows) - written
+  await emit_event(actor=identity["sub"], action="cost.ingest", resource="costs", resource_id=req.source, success=True, metadata={"rows": written, "skipped": skipped})
+  return {"ingested": written, "skipped": skipped, "unknownProjects": unknown}
 
+
+@router.get("/aggregate")
+async def get_cost_aggregate(
+  group_by: Literal["team", "environment", "template"] = Query(...),
+  start: Optional[date] = Query(None, description="First day, defaults to 30 days before end"),
+  end: Optional[date] = Query(None, description="Last day inclusive, defaults to today"),
+  granularity: Literal["total", "day", "month"] = "total",
+  currency: str = Query(COST_CURRENCY, min_length=3, max_length=3),
+  _: dict = Depends(oidc_auth)
+):
+  # Served from cost_rollups, which ingestion keeps current; never scans cost_daily
+  end = end or datetime.now(timezone.utc).date()
+  start = start or end - timedelta(days=29)
+  if start > end:
+    raise HTTPException(status_code=400, detail="start must not be after end")
+  if (end - start).days > 366:
+    raise HTTPException(status_code=400, detail="Time range is limited to 366 days")
+  currency = currency.upper()
+
+  async def aggregate():
+    async with get_connection() as conn:
+      return await aggregate_costs(conn, group_by, start, end, granularity, currency)
+
+  # Dashboards load the same aggregate at once; identical concurrent requests share one query
+  key = (group_by, start, end, granularity, currency)
+  groups = await read_coalescer.do("cost_aggregate", key, aggregate) if READ_COALESCING else await aggregate()
+  return {
+    "groupBy": group_by,
+    "start": start,
+    "end": end,
+    "granularity": granularity,
+    "currency": currency,
+    "total": round(sum(group["total"] for group in groups), 2),
+    "groups": groups,
+  }
+
+
+@router.get("/{project_id}")
+async def get_costs(project_id: str, _: dict = Depends(oidc_auth)):
+  # Served from the latest precomputed snapshot; see cost_series.py for the forecast job
+  project_id = str(_project_uuid(project_id))
+  row = await fetchrow_shared("cost_snapshot", """
+    SELECT current_cost, forecast_cost, currency, calculated_at, metadata
+    FROM costs WHERE project_id = $1
+    ORDER BY calculated_at DESC LIMIT 1
+  """, project_id)
+  if not row:
+    raise HTTPException(status_code=404, detail="Cost forecast not yet computed")
+  metadata = row["metadata"] or {}
+  return {
+    "projectId": project_id,
+    "current": float(row["current_cost"]),
+    "forecast": float(row["forecast_cost"]),
+    "next30Days": metadata.get("next_30_days"),
+    "currency": row["currency"],
+    "savingsOpportunities": metadata.get("savings_opportunities", []),
+    "calculatedAt": row["calculated_at"],
+  }
@@ -0,0 +1,117 @@
+"""
+DORA Metrics API Router
+
+Handles delivery performance data:
+- Ingestion of deployment and incident events from CI/CD and on-call tooling
+- Per-project rolling-window DORA aggregates
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+import uuid
+import structlog
+
+from audit_service import emit_event
+from auth import oidc_auth
+from db import get_connection
+from dora_metrics import ingest_events, is_future, MAX_CLOCK_SKEW, SUMMARY_COLUMNS, WINDOW_DAYS
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+def _project_uuid(project_id: str) -> str:
+    """Canonical form of a project ID, or 400 when it is not a UUID"""
+    try:
+        return str(uuid.UUID(project_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid project ID: {project_id[:64]!r}")
+
+
+class DeploymentEvent(BaseModel):
+    """A completed deployment of a project"""
+    project_id: str
+    deployed_at: datetime
+    commit_at: Optional[datetime] = Field(None, description="Time of the earliest commit in the deployment")
+    lead_time_seconds: Optional[float] = Field(None, ge=0, description="Overrides commit_at when provided")
+    failed: bool = Field(False, description="Whether the change caused a failure in production")
+
+    @model_validator(mode="after")
+    def derive_lead_time(self):
+        if is_future(self.deployed_at):
+            raise ValueError(f"deployed_at must not be more than {MAX_CLOCK_SKEW.total_seconds():.0f}s in the future")
+        if self.lead_time_seconds is None and self.commit_at is not None:
+            self.lead_time_seconds = max(0.0, (self.deployed_at - self.commit_at).total_seconds())
+        return self
+
+
+class IncidentEvent(BaseModel):
+    """A resolved production incident"""
+    project_id: str
+    started_at: datetime
+    resolved_at: datetime
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if is_future(self.resolved_at):
+            raise ValueError(f"resolved_at must not be more than {MAX_CLOCK_SKEW.total_seconds():.0f}s in the future")
+        if self.resolved_at < self.started_at:
+            raise ValueError("resolved_at must not be before started_at")
+        return self
+
+
+class DoraEventBatch(BaseModel):
+    """Batch of delivery events"""
+    deployments: List[DeploymentEvent] = Field(default_factory=list, max_length=5000)
+    incidents: List[IncidentEvent] = Field(default_factory=list, max_length=5000)
+
+
+@router.post("/events")
+async def ingest_dora_events(
+    batch: DoraEventBatch,
+    identity: dict = Depends(oidc_auth)
+):
+    """Fold deployment and incident events into the rolling DORA aggregates"""
+    deployments = [{**event.model_dump(), "project_id": _project_uuid(event.project_id)} for event in batch.deployments]
+    incidents = [
+        {
+            "project_id": _project_uuid(event.project_id),
+            "resolved_at": event.resolved_at,
+            "restore_seconds": (event.resolved_at - event.started_at).total_seconds()
+        }
+        for event in batch.incidents
+    ]
+    try:
+        async with get_connection() as conn:
+            result = await ingest_events(conn, deployments=deployments, incidents=incidents)
+        await emit_event(
+            actor=identity["sub"],
+            action="dora.ingest",
+            resource="dora",
+            success=True,
+            metadata={"deployments": len(deployments), "incidents": len(incidents), **result}
+        )
+        logger.info("DORA events ingested", actor=identity["sub"], **result)
+        return result
+    except Exception as e:
+        logger.error("Failed to ingest DORA events", error=str(e), actor=identity["sub"])
+        raise HTTPException(status_code=500, detail="Failed to ingest events")
+
+
+@router.get("/{project_id}")
+async def get_dora_metrics(
+    project_id: str,
+    _: dict = Depends(oidc_auth)
+):
+    """Get the rolling-window DORA summary for a project"""
+    project_id = _project_uuid(project_id)
+    async with get_connection() as conn:
+        row = await conn.fetchrow(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)}, updated_at FROM dora_aggregates WHERE project_id = $1",
+            project_id
+        )
+    if not row:
+        raise HTTPException(status_code=404, detail="No DORA data for project")
+    return {"projectId": project_id, "windowDays": WINDOW_DAYS, **dict(row)}
@@ -12,8 +12,8 @@ class CreateEnvRequest(BaseModel):
 
 
 @router.post("")
-def create_environment(req: CreateEnvRequest, identity: dict = Depends(oidc_auth)):
-  emit_event(actor=identity["sub"], action="environment.create", resource="environment", resource_id=req.projectId, success=True, metadata=req.model_dump())
+async def create_environment(req: CreateEnvRequest, identity: dict = Depends(oidc_auth)):
+  await emit_event(actor=identity["sub"], action="environment.create", resource="environment", resource_id=req.projectId, success=True, metadata=req.model_dump())
   return {"env": {"id": "env1", "type": req.type, "projectId": req.projectId}, "status": "provisioning"}
 
 
@@ -13,8 +13,8 @@ class InstallExtensionPayload(BaseModel):
 
 
 @router.post("/install")
-def install_extension(payload: InstallExtensionPayload, identity: dict = Depends(oidc_auth)):
-  emit_event(actor=identity["sub"], action="extension.install", resource="extension", resource_id=payload.id, success=True, metadata=payload.model_dump())
+async def install_extension(payload: InstallExtensionPayload, identity: dict = Depends(oidc_auth)):
+  await emit_event(actor=identity["sub"], action="extension.install", resource="extension", resource_id=payload.id, success=True, metadata=payload.model_dump())
   return {"status": "installed", "extension": payload.model_dump()}
 
 
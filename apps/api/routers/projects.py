@@ -4,24 +4,42 @@ Projects API Router
 Handles project lifecycle management including:
 - Project creation and provisioning
 - Project listing and filtering
+- Full-text and faceted project search
 - Project status updates
 - Integration with Temporal workflows
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic_core import to_json
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import json
+import os
+import re
 import uuid
 import structlog
 
 from auth import oidc_auth
-from db import get_connection
-from audit_service import emit_event
+from db import READ_COALESCING, fetch_shared, fetchrow_shared, get_connection, read_coalescer
+from audit_service import emit_event, emit_events
+from http_cache import weak_etag, etag_matches, not_modified
+from status_events import RESYNC_EVENT, broadcaster, publish_status_event
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Upper bound on provisioning workflows started concurrently by batch creation
+PROVISIONING_START_CONCURRENCY = int(os.getenv("PROVISIONING_START_CONCURRENCY", "10"))
+
+# Interval between SSE keepalive comments on idle event streams
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Columns project search returns counts for, in GROUPING() argument order
+FACET_FIELDS = ("team", "template", "environment", "status")
+
 
 class CreateProjectRequest(BaseModel):
     """Request model for creating a new project"""
@@ -32,6 +50,28 @@ class CreateProjectRequest(BaseModel):
     metadata: Optional[dict] = Field(default_factory=dict, description="Additional project metadata")
 
 
+class BatchCreateProjectsRequest(BaseModel):
+    """Request model for creating many projects at once"""
+    projects: List[CreateProjectRequest] = Field(..., min_length=1, max_length=500, description="Projects to create")
+
+
+class BatchItemResult(BaseModel):
+    """Per-item outcome of a batch project creation"""
+    index: int
+    name: str
+    status: str
+    project_id: Optional[str] = None
+    workflow_id: Optional[str] = None
+    reason: Optional[str] = None
+
+
+class BatchCreateProjectsResponse(BaseModel):
+    """Response model for batch project creation"""
+    created: int
+    conflicts: int
+    results: List[BatchItemResult]
+
+
 class ProjectResponse(BaseModel):
     """Response model for project data"""
     id: str
@@ -54,71 +94,322 @@ class ProjectListResponse(BaseModel):
     page_size: int
 
 
+class FacetCount(BaseModel):
+    """Number of matching projects sharing one facet value"""
+    value: Optional[str]
+    count: int
+
+
+class ProjectSearchResponse(ProjectListResponse):
+    """Response model for project search"""
+    facets: Dict[str, List[FacetCount]]
+
+
+def trusted_json_response(content: Any, etag: Optional[str] = None) -> Response:
+    """
+    Serialize trusted database output directly to JSON
+
+    Rows read from our own schema already satisfy the response models, so
+    this skips model construction and response_model re-validation while
+    producing the same JSON encoding pydantic would.
+    """
+    headers = {"ETag": etag} if etag else None
+    return Response(content=to_json(content), media_type="application/json", headers=headers)
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    """Encode one server-sent event frame"""
+    return b"event: " + event.encode() + b"\ndata: " + to_json(data) + b"\n\n"
+
+
+async def start_provisioning_workflow(project_id: str) -> str:
+    """Start the provisioning workflow for a project and return its workflow ID"""
+    # TODO: Start Temporal workflow for provisioning
+    # For now, return mock workflow ID
+    return f"wf_provision_{project_id[:8]}"
+
+
+def build_project_filters(status: Optional[str] = None, team: Optional[str] = None) -> tuple[str, list]:
+    """WHERE clause and positional parameters for the project list filters"""
+    where_conditions = []
+    params = []
+    
+    if status:
+        params.append(status)
+        where_conditions.append(f"status = ${len(params)}")
+    
+    if team:
+        params.append(team)
+        where_conditions.append(f"team = ${len(params)}")
+    
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    return where_clause, params
+
+
+def parse_metadata_filters(items: Optional[List[str]]) -> tuple[dict, list]:
+    """
+    Split `key=value` and bare `key` metadata filters
+
+    Values are read as JSON when they parse (numbers, booleans, quoted
+    strings) and as plain strings otherwise. Returns the containment
+    document and the keys that must exist.
+    """
+    contains = {}
+    keys = []
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        key = key.strip()
+        if not key:
+            raise ValueError(f"Invalid metadata filter: {item!r}")
+        if not sep:
+            keys.append(key)
+            continue
+        try:
+            contains[key] = json.loads(value)
+        except ValueError:
+            contains[key] = value
+    return contains, keys
+
+
+def build_project_search(
+    q: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    status: Optional[List[str]] = None,
+    team: Optional[List[str]] = None,
+    template: Optional[List[str]] = None,
+    environment: Optional[List[str]] = None,
+    metadata: Optional[List[str]] = None
+) -> tuple[str, list, str]:
+    """
+    WHERE clause, positional parameters and ORDER BY for a project search
+
+    Every condition is served by an index from migration 2: search_vector
+    (GIN) for q, lower(name) text_pattern_ops for name_prefix, btree indexes
+    for the facet fields and the metadata GIN for containment and key tests.
+    """
+    where_conditions = []
+    params = []
+    order_by = "created_at DESC"
+    
+    def param(value: Any) -> str:
+        params.append(value)
+        return f"${len(params)}"
+    
+    # Every word matches as a prefix, so results update as the user types
+    words = re.findall(r"[^\W_]+", (q or "").lower())
+    if words:
+        tsquery = f"to_tsquery('simple', {param(' & '.join(word + ':*' for word in words))})"
+        where_conditions.append(f"search_vector @@ {tsquery}")
+        order_by = f"ts_rank(search_vector, {tsquery}) DESC, created_at DESC"
+    
+    if name_prefix:
+        escaped = name_prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where_conditions.append(f"lower(name) LIKE {param(escaped + '%')}")
+    
+    for field, values in (("status", status), ("team", team), ("template", template), ("environment", environment)):
+        if values:
+            where_conditions.append(f"{field} = ANY({param(values)}::text[])")
+    
+    contains, keys = parse_metadata_filters(metadata)
+    if contains:
+        where_conditions.append(f"metadata @> {param(contains)}::jsonb")
+    if keys:
+        where_conditions.append(f"metadata ?& {param(keys)}::text[]")
+    
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    return where_clause, params, order_by
+
+
+async def run_project_search(
+    conn,
+    where_clause: str,
+    params: list,
+    order_by: str,
+    page: int,
+    page_size: int
+) -> dict:
+    """
+    One page of matching projects plus total and facet counts
+
+    Facet counts for every field and the total come from a single query:
+    matching rows are first reduced to their distinct field combinations,
+    which GROUPING SETS then sums per field.
+    """
+    fields = ", ".join(FACET_FIELDS)
+    facet_rows = await conn.fetch(f"""
+        WITH combinations AS (
+            SELECT {fields}, COUNT(*) AS count
+            FROM projects {where_clause}
+            GROUP BY {fields}
+        )
+        SELECT {fields}, GROUPING({fields}) AS grouping_id, SUM(count)::bigint AS count
+        FROM combinations
+        GROUP BY GROUPING SETS ({", ".join(f"({field})" for field in FACET_FIELDS)}, ())
+    """, *params)
+    
+    # GROUPING() sets the bit of every field not grouped; the first field is the high bit
+    all_bits = (1 << len(FACET_FIELDS)) - 1
+    facet_by_grouping = {all_bits ^ (1 << (len(FACET_FIELDS) - 1 - i)): field for i, field in enumerate(FACET_FIELDS)}
+    facets = {field: [] for field in FACET_FIELDS}
+    total = 0
+    for row in facet_rows:
+        if row["grouping_id"] == all_bits:
+            # SUM over no matching rows is NULL
+            total = row["count"] or 0
+        else:
+            field = facet_by_grouping[row["grouping_id"]]
+            facets[field].append({"value": row[field], "count": row["count"]})
+    for counts in facets.values():
+        counts.sort(key=lambda facet: (-facet["count"], facet["value"] or ""))
+    
+    projects = []
+    offset = (page - 1) * page_size
+    if offset < total:
+        rows = await conn.fetch(f"""
+            SELECT id, name, template, environment, team, status, 
+                   created_at, updated_at, created_by, metadata
+            FROM projects {where_clause}
+            ORDER BY {order_by}
+            LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
+        """, *params, page_size, offset)
+        projects = [dict(row) for row in rows]
+    
+    return {
+        "projects": projects,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "facets": facets
+    }
+
+
 @router.get("", response_model=ProjectListResponse)
 async def list_projects(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[str] = Query(None, description="Filter by project status"),
     team: Optional[str] = Query(None, description="Filter by team"),
+    if_none_match: Optional[str] = Header(None),
     identity: dict = Depends(oidc_auth)
 ):
-    """List projects with pagination and filtering"""
+    """
+    List projects with pagination and filtering
+
+    The weak ETag covers max(updated_at) and the row count for the filter set,
+    so an unchanged page is answered with 304 before rows are fetched.
+    Concurrent identical requests share the count and page queries.
+    """
     try:
-        async with get_connection() as conn:
-            # Build WHERE clause for filtering
-            where_conditions = []
-            params = []
-            
-            if status:
-                where_conditions.append("status = $%d" % (len(params) + 1))
-                params.append(status)
-            
-            if team:
-                where_conditions.append("team = $%d" % (len(params) + 1))
-                params.append(team)
-            
-            where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-            
-            # Get total count
-            count_query = f"SELECT COUNT(*) FROM projects {where_clause}"
-            total = await conn.fetchval(count_query, *params)
-            
-            # Get projects with pagination
-            offset = (page - 1) * page_size
-            projects_query = f"""
-                SELECT id, name, template, environment, team, status, 
-                       created_at, updated_at, created_by, metadata
-                FROM projects {where_clause}
-                ORDER BY created_at DESC
-                LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
-            """
-            params.extend([page_size, offset])
-            
-            rows = await conn.fetch(projects_query, *params)
-            projects = [ProjectResponse(**dict(row)) for row in rows]
-            
-            # Log the list operation
-            await emit_event(
-                actor=identity["sub"],
-                action="project.list",
-                resource="projects",
-                resource_id=None,
-                success=True,
-                metadata={"page": page, "page_size": page_size, "filters": {"status": status, "team": team}}
-            )
-            
-            return ProjectListResponse(
-                projects=projects,
-                total=total,
-                page=page,
-                page_size=page_size
-            )
+        where_clause, params = build_project_filters(status=status, team=team)
+        
+        # Get total count and freshness for the filter set
+        stats_query = f"SELECT COUNT(*) AS total, MAX(updated_at) AS last_updated FROM projects {where_clause}"
+        stats = await fetchrow_shared("project_list_stats", stats_query, *params)
+        total = stats["total"]
+        etag = weak_etag(stats["last_updated"], total, page, page_size, status, team)
+        
+        # Log the list operation
+        await emit_event(
+            actor=identity["sub"],
+            action="project.list",
+            resource="projects",
+            resource_id=None,
+            success=True,
+            metadata={"page": page, "page_size": page_size, "filters": {"status": status, "team": team}}
+        )
+        
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        # Get projects with pagination
+        offset = (page - 1) * page_size
+        projects_query = f"""
+            SELECT id, name, template, environment, team, status, 
+                   created_at, updated_at, created_by, metadata
+            FROM projects {where_clause}
+            ORDER BY created_at DESC
+            LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
+        """
+        params.extend([page_size, offset])
+        
+        rows = await fetch_shared("project_list_page", projects_query, *params)
+        projects = [dict(row) for row in rows]
+        
+        return trusted_json_response({
+            "projects": projects,
+            "total": total,
+            "page": page,
+            "page_size": page_size
+        }, etag=etag)
             
     except Exception as e:
         logger.error("Failed to list projects", error=str(e), actor=identity["sub"])
         raise HTTPException(status_code=500, detail="Failed to retrieve projects")
 
 
+@router.get("/search", response_model=ProjectSearchResponse)
+async def search_projects(
+    q: Optional[str] = Query(None, max_length=200, description="Words matched as prefixes of name, template, environment and team"),
+    name_prefix: Optional[str] = Query(None, max_length=100, description="Project name starts with (case-insensitive)"),
+    status: Optional[List[str]] = Query(None, description="Any of these statuses"),
+    team: Optional[List[str]] = Query(None, description="Any of these teams"),
+    template: Optional[List[str]] = Query(None, description="Any of these templates"),
+    environment: Optional[List[str]] = Query(None, description="Any of these environments"),
+    metadata: Optional[List[str]] = Query(None, description="`key=value` to match a metadata value, `key` to require the key"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    identity: dict = Depends(oidc_auth)
+):
+    """
+    Search projects with full-text, prefix, field and metadata filters
+
+    Repeated values of one filter are alternatives; different filters must
+    all match. Results are ranked by relevance when q is given, newest
+    first otherwise, and come with counts per team, template, environment
+    and status over all matching projects.
+    """
+    try:
+        where_clause, params, order_by = build_project_search(
+            q=q, name_prefix=name_prefix, status=status, team=team,
+            template=template, environment=environment, metadata=metadata
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        async def search() -> dict:
+            async with get_connection() as conn:
+                return await run_project_search(conn, where_clause, params, order_by, page, page_size)
+        
+        # Identical concurrent searches (typically the unfiltered default view) share one run
+        key = (where_clause, order_by, page, page_size, to_json(params))
+        result = await read_coalescer.do("project_search", key, search) if READ_COALESCING else await search()
+        
+        await emit_event(
+            actor=identity["sub"],
+            action="project.search",
+            resource="projects",
+            resource_id=None,
+            success=True,
+            metadata={
+                "page": page,
+                "page_size": page_size,
+                "query": q,
+                "filters": {
+                    "name_prefix": name_prefix, "status": status, "team": team,
+                    "template": template, "environment": environment, "metadata": metadata
+                },
+                "total": result["total"]
+            }
+        )
+        
+        return trusted_json_response(result)
+    
+    except Exception as e:
+        logger.error("Failed to search projects", error=str(e), actor=identity["sub"])
+        raise HTTPException(status_code=500, detail="Failed to search projects")
+
+
 @router.post("", response_model=dict)
 async def create_project(
     req: CreateProjectRequest, 
@@ -148,9 +439,7 @@ async def create_project(
             
             logger.info("Project created", project_id=project_id, name=req.name, actor=identity["sub"])
             
-            # TODO: Start Temporal workflow for provisioning
-            # For now, return mock workflow ID
-            workflow_id = f"wf_provision_{project_id[:8]}"
+            workflow_id = await start_provisioning_workflow(project_id)
             
             return {
                 "project_id": project_id,
@@ -164,33 +453,140 @@ async def create_project(
         raise HTTPException(status_code=500, detail="Failed to create project")
 
 
+@router.post(":batch", response_model=BatchCreateProjectsResponse)
+async def create_projects_batch(
+    req: BatchCreateProjectsRequest,
+    identity: dict = Depends(oidc_auth)
+):
+    """
+    Create many projects in one transaction and initiate their provisioning
+
+    All items are validated before any write. Rows are streamed into a
+    temporary staging table with COPY and inserted with ON CONFLICT (name)
+    DO NOTHING, so name collisions with existing projects (or concurrent
+    creators) are reported per item instead of failing the whole batch.
+    """
+    actor = identity["sub"]
+    results: List[BatchItemResult] = []
+    staged = {}
+    seen_names = set()
+    
+    for index, item in enumerate(req.projects):
+        if item.name in seen_names:
+            results.append(BatchItemResult(index=index, name=item.name, status="conflict", reason="Duplicate name in batch"))
+            continue
+        seen_names.add(item.name)
+        project_id = uuid.uuid4()
+        staged[str(project_id)] = (index, item)
+        results.append(BatchItemResult(index=index, name=item.name, status="pending", project_id=str(project_id)))
+    
+    try:
+        async with get_connection() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE project_batch_staging (
+                        id UUID NOT NULL,
+                        name VARCHAR(255) NOT NULL,
+                        template VARCHAR(100) NOT NULL,
+                        environment VARCHAR(50) NOT NULL,
+                        team VARCHAR(100),
+                        created_by VARCHAR(255) NOT NULL,
+                        metadata TEXT NOT NULL
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    "project_batch_staging",
+                    records=[
+                        (uuid.UUID(project_id), item.name, item.template, item.environment,
+                         item.team, actor, json.dumps(item.metadata or {}))
+                        for project_id, (_, item) in staged.items()
+                    ],
+                    columns=["id", "name", "template", "environment", "team", "created_by", "metadata"]
+                )
+                rows = await conn.fetch("""
+                    INSERT INTO projects (id, name, template, environment, team, status, created_by, metadata)
+                    SELECT id, name, template, environment, team, 'provisioning', created_by, metadata::jsonb
+                    FROM project_batch_staging
+                    ON CONFLICT (name) DO NOTHING
+                    RETURNING id
+                """)
+    except Exception as e:
+        logger.error("Failed to create project batch", error=str(e), actor=actor, count=len(req.projects))
+        raise HTTPException(status_code=500, detail="Failed to create projects")
+    
+    inserted_ids = {str(row["id"]) for row in rows}
+    created = []
+    for result in results:
+        if result.status != "pending":
+            continue
+        if result.project_id in inserted_ids:
+            result.status = "created"
+            created.append(result)
+        else:
+            result.status = "conflict"
+            result.reason = "Project name already exists"
+            result.project_id = None
+    
+    await emit_events([
+        {
+            "actor": actor,
+            "action": "project.create",
+            "resource": "project",
+            "resource_id": result.project_id,
+            "success": True,
+            "metadata": {**staged[result.project_id][1].model_dump(), "batch": True}
+        }
+        for result in created
+    ])
+    
+    semaphore = asyncio.Semaphore(PROVISIONING_START_CONCURRENCY)
+    
+    async def start(result: BatchItemResult) -> None:
+        async with semaphore:
+            result.workflow_id = await start_provisioning_workflow(result.project_id)
+    
+    await asyncio.gather(*(start(result) for result in created))
+    
+    logger.info("Project batch created", created=len(created), conflicts=len(results) - len(created), actor=actor)
+    
+    return BatchCreateProjectsResponse(
+        created=len(created),
+        conflicts=len(results) - len(created),
+        results=results
+    )
+
+
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: str,
+    if_none_match: Optional[str] = Header(None),
     identity: dict = Depends(oidc_auth)
 ):
-    """Get project details by ID"""
+    """Get project details by ID; concurrent identical reads share one query"""
     try:
-        async with get_connection() as conn:
-            row = await conn.fetchrow("""
-                SELECT id, name, template, environment, team, status, 
-                       created_at, updated_at, created_by, metadata
-                FROM projects WHERE id = $1
-            """, project_id)
-            
-            if not row:
-                raise HTTPException(status_code=404, detail="Project not found")
-            
-            # Log the view event
-            await emit_event(
-                actor=identity["sub"],
-                action="project.view",
-                resource="project",
-                resource_id=project_id,
-                success=True
-            )
-            
-            return ProjectResponse(**dict(row))
+        row = await fetchrow_shared("project", """
+            SELECT id, name, template, environment, team, status, 
+                   created_at, updated_at, created_by, metadata
+            FROM projects WHERE id = $1
+        """, project_id)
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Log the view event
+        await emit_event(
+            actor=identity["sub"],
+            action="project.view",
+            resource="project",
+            resource_id=project_id,
+            success=True
+        )
+        
+        etag = weak_etag(row["id"], row["updated_at"])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        return trusted_json_response(dict(row), etag=etag)
             
     except HTTPException:
         raise
@@ -202,7 +598,7 @@ async def get_project(
 @router.put("/{project_id}/status")
 async def update_project_status(
     project_id: str,
-    status: str = Field(..., description="New project status"),
+    status: str = Query(..., description="New project status"),
     identity: dict = Depends(oidc_auth)
 ):
     """Update project status"""
@@ -222,6 +618,9 @@ async def update_project_status(
             if result == "UPDATE 0":
                 raise HTTPException(status_code=404, detail="Project not found")
             
+            # Push the change to event stream subscribers
+            await publish_status_event(conn, "project.status", project_id, status=status)
+            
             # Log the status change
             await emit_event(
                 actor=identity["sub"],
@@ -243,3 +642,68 @@ async def update_project_status(
         raise HTTPException(status_code=500, detail="Failed to update project status")
 
 
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    request: Request,
+    identity: dict = Depends(oidc_auth)
+):
+    """
+    Stream project status changes and workflow progress as server-sent events
+
+    Replaces polling GET /projects/{id}: the current status is sent first,
+    then every change published through Postgres NOTIFY for this project.
+    If the listener lost its connection, a stream.resync event followed by
+    a fresh status snapshot is sent, since changes may have been missed.
+    """
+    try:
+        async with get_connection() as conn:
+            exists = await conn.fetchval("SELECT 1 FROM projects WHERE id = $1", project_id)
+    except Exception as e:
+        logger.error("Failed to open project event stream", error=str(e), project_id=project_id, actor=identity["sub"])
+        raise HTTPException(status_code=500, detail="Failed to open event stream")
+    
+    if not exists:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    await emit_event(
+        actor=identity["sub"],
+        action="project.watch",
+        resource="project",
+        resource_id=project_id,
+        success=True
+    )
+    
+    async def snapshot() -> Optional[bytes]:
+        async with get_connection() as conn:
+            row = await conn.fetchrow("SELECT status, updated_at FROM projects WHERE id = $1", project_id)
+        if row:
+            return format_sse("project.status", {"kind": "project.status", "project_id": project_id, **dict(row)})
+        return None
+    
+    async def event_stream():
+        # Subscribe before reading the snapshot so no change can fall in between
+        async with broadcaster.subscribe(project_id) as queue:
+            current = await snapshot()
+            if current:
+                yield current
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                yield format_sse(event.get("kind", "message"), event)
+                if event.get("kind") == RESYNC_EVENT:
+                    current = await snapshot()
+                    if current:
+                        yield current
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
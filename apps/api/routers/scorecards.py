@@ -1,11 +1,44 @@
-from fastapi import APIRouter, Depends
+import uuid
+from fastapi import APIRouter, Depends, HTTPException
 from auth import oidc_auth
+from db import fetchrow_shared
+from dora_metrics import SUMMARY_COLUMNS
 
 router = APIRouter()
 
+SCORECARD_QUERY = f"""
+  SELECT s.tier, s.security_score, s.quality_score, s.performance_score, s.compliance_score, s.calculated_at,
+         {", ".join(f"d.{column}" for column in SUMMARY_COLUMNS)}
+  FROM scorecards s
+  LEFT JOIN dora_aggregates d ON d.project_id = s.project_id
+  WHERE s.project_id = $1
+  ORDER BY s.calculated_at DESC LIMIT 1
+"""
 
-@router.get("/{project_id}")
-def get_scorecard(project_id: str, _: dict = Depends(oidc_auth)):
-  return {"projectId": project_id, "tier": "gold", "metrics": {"security": 92, "quality": 91, "performance": 90, "compliance": 96}}
+
+def _project_uuid(project_id: str) -> uuid.UUID:
+  try:
+    return uuid.UUID(project_id)
+  except ValueError:
+    raise HTTPException(status_code=400, detail=f"Invalid project ID: {project_id[:64]!r}")
 
 
+@router.get("/{project_id}")
+async def get_scorecard(project_id: str, _: dict = Depends(oidc_auth)):
+  # Served from the latest precomputed row; see scoring.py for the batch engine
+  project_id = str(_project_uuid(project_id))
+  row = await fetchrow_shared("scorecard", SCORECARD_QUERY, project_id)
+  if not row:
+    raise HTTPException(status_code=404, detail="Scorecard not yet computed")
+  return {
+    "projectId": project_id,
+    "tier": row["tier"],
+    "metrics": {
+      "security": row["security_score"],
+      "quality": row["quality_score"],
+      "performance": row["performance_score"],
+      "compliance": row["compliance_score"],
+    },
+    "dora": {column: row[column] for column in SUMMARY_COLUMNS},
+    "calculatedAt": row["calculated_at"],
+  }
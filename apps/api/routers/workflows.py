@@ -12,9 +12,9 @@ class StartWorkflowRequest(BaseModel):
 
 
 @router.post("/{wf_type}/start")
-def start(wf_type: str, body: StartWorkflowRequest, identity: dict = Depends(oidc_auth)):
+async def start(wf_type: str, body: StartWorkflowRequest, identity: dict = Depends(oidc_auth)):
   wf_id = f"wf_{wf_type}_demo"
-  emit_event(actor=identity["sub"], action="workflow.start", resource="workflow", resource_id=wf_id, success=True, metadata={"type": wf_type, "inputs": body.inputs})
+  await emit_event(actor=identity["sub"], action="workflow.start", resource="workflow", resource_id=wf_id, success=True, metadata={"type": wf_type, "inputs": body.inputs})
   return {"workflowId": wf_id}
 
 
@@ -24,8 +24,8 @@ class ApprovalDecision(BaseModel):
 
 
 @router.post("/{workflow_id}/approval")
-def approve(workflow_id: str, decision: ApprovalDecision, identity: dict = Depends(oidc_auth)):
-  emit_event(actor=identity["sub"], action="workflow.approval", resource="workflow", resource_id=workflow_id, success=decision.approved, metadata=decision.model_dump())
+async def approve(workflow_id: str, decision: ApprovalDecision, identity: dict = Depends(oidc_auth)):
+  await emit_event(actor=identity["sub"], action="workflow.approval", resource="workflow", resource_id=workflow_id, success=decision.approved, metadata=decision.model_dump())
   return {"status": "received", "workflowId": workflow_id, "decision": decision.model_dump()}
 
 
@@ -0,0 +1,273 @@
+"""
+Scorecard computation engine for Allstar Forge Platform
+
+Provides:
+- Loading of tier thresholds and DORA weights from packages/scoring/scorecards.yaml
+- Vectorized scoring of every project in one NumPy pass
+- Performance scores derived from rolling DORA aggregates when available
+- Bulk persistence of results into the scorecards table via COPY
+- A scheduler that recomputes periodically, coordinated across processes
+
+Reads never compute anything inline: the scorecards router serves the most
+recent precomputed row for a project.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import asyncpg
+import structlog
+
+from db import get_connection
+from dora_metrics import roll_stale_aggregates
+from jobs import PeriodicJob
+
+if TYPE_CHECKING:
+    # Imported inside the functions that need it, keeping it off API startup
+    import numpy as np
+
+logger = structlog.get_logger()
+
+SCORECARDS_CONFIG = os.getenv(
+    "SCORECARDS_CONFIG",
+    str(Path(__file__).resolve().parent.parent.parent / "packages" / "scoring" / "scorecards.yaml")
+)
+SCORECARD_INTERVAL_SECONDS = float(os.getenv("SCORECARD_INTERVAL_SECONDS", "3600"))
+SCORECARD_RETENTION_DAYS = int(os.getenv("SCORECARD_RETENTION_DAYS", "7"))
+
+# Column order of the metric matrix and of the scorecards score columns
+METRICS: Tuple[str, ...] = ("security", "quality", "performance", "compliance")
+
+# DORA inputs read from dora_aggregates and their scorecards.yaml weight keys
+DORA_COLUMNS: Tuple[str, ...] = (
+    "deploys_per_day", "lead_time_p50_seconds", "restore_time_p50_seconds", "change_failure_rate"
+)
+DORA_WEIGHT_KEYS: Tuple[str, ...] = ("deploy_frequency_weight", "lead_time_weight", "mttr_weight", "cfr_weight")
+
+# Piecewise-linear bands from low to elite performance, per DORA column.
+# Durations and frequencies are interpolated on a log10 scale.
+DORA_BANDS: Tuple[Tuple[Tuple[float, ...], Tuple[float, ...], bool], ...] = (
+    ((1 / 90, 1 / 30, 1 / 7, 1.0), (25, 50, 75, 100), True),
+    ((3600, 86400, 604800, 2592000), (100, 75, 50, 25), True),
+    ((3600, 86400, 604800, 2592000), (100, 75, 50, 25), True),
+    ((0.15, 0.30, 0.45, 0.60), (100, 75, 50, 25), False),
+)
+
+# Tier assigned to projects that meet no configured thresholds
+DEFAULT_TIER = "bronze"
+
+# Advisory lock key so only one API process recomputes at a time
+SCORECARD_LOCK_ID = 0x5C04ECA4D
+
+
+@dataclass(frozen=True)
+class ScorecardConfig:
+    """Parsed scorecards.yaml"""
+    tiers: Tuple[str, ...]
+    thresholds: np.ndarray
+    dora_weights: Dict[str, float]
+
+    @property
+    def tier_labels(self) -> np.ndarray:
+        import numpy as np
+        return np.array(self.tiers + (DEFAULT_TIER,))
+
+
+def load_config(path: str = SCORECARDS_CONFIG) -> ScorecardConfig:
+    """
+    Load tier thresholds and metric weights
+
+    Tiers are ordered strictest first so the first tier whose thresholds are
+    all met is the one assigned.
+    """
+    import numpy as np
+    import yaml
+    with open(path) as f:
+        raw = yaml.safe_load(f)
+
+    tiers = sorted(
+        raw.get("tiers", {}).items(),
+        key=lambda item: sum(item[1]["thresholds"].get(metric, 0) for metric in METRICS),
+        reverse=True
+    )
+    thresholds = np.array(
+        [[tier["thresholds"].get(metric, 0) for metric in METRICS] for _, tier in tiers],
+        dtype=np.float64
+    ).reshape(len(tiers), len(METRICS))
+
+    return ScorecardConfig(
+        tiers=tuple(name for name, _ in tiers),
+        thresholds=thresholds,
+        dora_weights=dict(raw.get("metrics", {}).get("dora", {}))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_config() -> ScorecardConfig:
+    """Scorecard config, loaded once per process"""
+    return load_config()
+
+
+def compute_scores(config: ScorecardConfig, metrics: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score every project in one vectorized pass
+
+    Args:
+        config: Loaded scorecard config
+        metrics: Float array of shape (projects, len(METRICS)); NaN means no data
+
+    Returns:
+        Integer scores clipped to 0..100, and the tier label per project
+    """
+    import numpy as np
+    scores = np.clip(np.rint(np.nan_to_num(metrics, nan=0.0)), 0, 100).astype(np.int32)
+    meets = (scores[:, None, :] >= config.thresholds[None, :, :]).all(axis=2)
+    tier_index = np.where(meets.any(axis=1), meets.argmax(axis=1), len(config.tiers))
+    return scores, config.tier_labels[tier_index]
+
+
+def dora_performance_scores(config: ScorecardConfig, dora: np.ndarray) -> np.ndarray:
+    """
+    Weighted DORA performance score per project
+
+    Args:
+        config: Loaded scorecard config providing the DORA weights
+        dora: Float array of shape (projects, len(DORA_COLUMNS)); NaN means no data
+
+    Returns:
+        Scores in 0..100, renormalized over the available inputs; NaN where
+        a project has no DORA data at all
+    """
+    import numpy as np
+    sub_scores = np.full(dora.shape, np.nan)
+    for i, (breakpoints, band_scores, log_scale) in enumerate(DORA_BANDS):
+        column = dora[:, i]
+        present = ~np.isnan(column)
+        xs = np.asarray(breakpoints)
+        values = column[present]
+        if log_scale:
+            xs = np.log10(xs)
+            values = np.log10(np.maximum(values, 1e-9))
+        sub_scores[present, i] = np.interp(values, xs, band_scores)
+
+    weights = np.array([config.dora_weights.get(key, 0.0) for key in DORA_WEIGHT_KEYS])
+    available = ~np.isnan(sub_scores)
+    weight_sums = (available * weights).sum(axis=1)
+    weighted = np.where(available, sub_scores, 0.0) @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weight_sums > 0, weighted / weight_sums, np.nan)
+
+
+def _metric_column(metric: str) -> str:
+    path = "{metrics,%s}" % metric
+    return (
+        f"CASE WHEN jsonb_typeof(metadata #> '{path}') = 'number' "
+        f"THEN (metadata #>> '{path}')::float8 END AS {metric}"
+    )
+
+
+METRICS_QUERY = f"""
+    SELECT p.id, {", ".join(_metric_column(metric) for metric in METRICS)},
+           {", ".join(f"d.{column}" for column in DORA_COLUMNS)}
+    FROM projects p
+    LEFT JOIN dora_aggregates d ON d.project_id = p.id
+    WHERE p.status <> 'deleted'
+"""
+
+
+async def load_metrics(conn: asyncpg.Connection) -> Tuple[list, np.ndarray, np.ndarray]:
+    """
+    Fetch scoring inputs for all live projects
+
+    Returns:
+        Project IDs, the (projects, METRICS) matrix and the
+        (projects, DORA_COLUMNS) matrix, with NaN for missing values
+    """
+    import numpy as np
+    rows = await conn.fetch(METRICS_QUERY)
+    project_ids = [row["id"] for row in rows]
+    values = np.array(
+        [[np.nan if value is None else value for value in row.values()][1:] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(METRICS) + len(DORA_COLUMNS))
+    return project_ids, values[:, :len(METRICS)], values[:, len(METRICS):]
+
+
+async def recompute_scorecards(conn: asyncpg.Connection, config: Optional[ScorecardConfig] = None) -> int:
+    """
+    Recompute and persist scorecards for every project
+
+    Runs in one transaction guarded by an advisory lock, so concurrent API
+    processes skip the run instead of duplicating it.
+
+    Returns:
+        Number of scorecards written, or 0 if another process holds the lock
+    """
+    import numpy as np
+    config = config or get_config()
+
+    async with conn.transaction():
+        if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", SCORECARD_LOCK_ID):
+            return 0
+
+        # Slide quiet projects' DORA windows so their aggregates are current
+        await roll_stale_aggregates(conn)
+
+        project_ids, metrics, dora = await load_metrics(conn)
+        if not project_ids:
+            return 0
+
+        performance = METRICS.index("performance")
+        dora_scores = dora_performance_scores(config, dora)
+        metrics[:, performance] = np.where(np.isnan(dora_scores), metrics[:, performance], dora_scores)
+
+        scores, tiers = compute_scores(config, metrics)
+        calculated_at = datetime.now(timezone.utc)
+
+        await conn.copy_records_to_table(
+            "scorecards",
+            records=zip(
+                project_ids,
+                tiers.tolist(),
+                *(scores[:, i].tolist() for i in range(len(METRICS))),
+                [calculated_at] * len(project_ids)
+            ),
+            columns=[
+                "project_id", "tier", "security_score", "quality_score",
+                "performance_score", "compliance_score", "calculated_at"
+            ]
+        )
+
+        await conn.execute(
+            "DELETE FROM scorecards WHERE calculated_at < NOW() - make_interval(days => $1)",
+            SCORECARD_RETENTION_DAYS
+        )
+
+    return len(project_ids)
+
+
+async def run_scorecards() -> int:
+    """Recompute all scorecards using a pooled connection"""
+    async with get_connection() as conn:
+        return await recompute_scorecards(conn)
+
+
+scheduler = PeriodicJob("scorecards", run_scorecards, SCORECARD_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    # One-off recomputation, e.g. from a cron job: python scoring.py
+    from db import close_pool
+
+    async def _main() -> None:
+        print(f"Scorecards written: {await scheduler.run_once()}")
+        await close_pool()
+
+    asyncio.run(_main())
@@ -0,0 +1,248 @@
+"""
+Multi-process server for Allstar Forge Platform API
+
+Provides:
+- A supervisor that binds the listening socket once and shares it with N
+  uvicorn worker processes (shared-nothing: each has its own asyncpg pool)
+- Per-worker pool sizing from a global Postgres connection budget, with the
+  worker count capped so every worker gets a usable pool
+- Opt-in pinning of each worker to one CPU core (Linux)
+- Graceful shutdown on SIGTERM/SIGINT: workers stop accepting, finish
+  in-flight requests and run the app lifespan shutdown, which flushes
+  coalesced audit events before the pool closes
+- Zero-downtime reload on SIGHUP: a new generation of workers starts on the
+  same socket and old workers are drained only once their replacement is
+  serving
+- Restart of workers that exit unexpectedly
+
+    python serve.py --workers 4 --port 8081
+    kill -HUP <supervisor pid>     # reload code and configuration
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from multiprocessing.context import SpawnProcess
+from multiprocessing.synchronize import Event
+from typing import Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))  # 0: one per available core, within the budget
+# Postgres connections the whole deployment may hold, split across workers
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "80"))
+# Seconds a draining worker gets to finish in-flight requests and SSE streams
+API_GRACEFUL_TIMEOUT = float(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+# Only useful when the pod owns its cores; pods sharing a node would all pin to the same ones
+API_PIN_WORKERS = os.getenv("API_PIN_WORKERS", "false").lower() in ("1", "true", "yes")
+
+# Connections each worker holds outside its pool (status event listener)
+DEDICATED_CONNECTIONS_PER_WORKER = 1
+# Smallest pool a worker is started with
+MIN_POOL_SIZE = 2
+WORKER_READY_TIMEOUT = 60.0
+
+_spawn = multiprocessing.get_context("spawn")
+
+
+def max_workers(budget: int) -> int:
+    """
+    Most workers the budget supports with at least MIN_POOL_SIZE pooled
+    connections each, counting the one extra worker alive during a reload
+    """
+    return max(1, budget // (MIN_POOL_SIZE + DEDICATED_CONNECTIONS_PER_WORKER) - 1)
+
+
+def pool_bounds(budget: int, workers: int) -> Dict[str, int]:
+    """
+    Pool sizes for one worker so the deployment stays within budget
+
+    A reload replaces workers one at a time, so at most workers + 1
+    processes hold connections at once.
+    """
+    per_worker = budget // (workers + 1) - DEDICATED_CONNECTIONS_PER_WORKER
+    per_worker = max(MIN_POOL_SIZE, per_worker)
+    return {"min_size": min(5, max(1, per_worker // 4)), "max_size": per_worker}
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def run_worker(
+    index: int,
+    sock: socket.socket,
+    ready: Event,
+    pool: Dict[str, int],
+    workers: int,
+    core: Optional[int],
+    host: str,
+    port: int,
+) -> None:
+    """Worker process entry point: serve the app on the inherited socket"""
+    # Set before main (and db) are imported so the app picks them up
+    os.environ["DB_POOL_MIN_SIZE"] = str(pool["min_size"])
+    os.environ["DB_POOL_MAX_SIZE"] = str(pool["max_size"])
+    # In-process rate limit buckets enforce their share of the limit
+    os.environ["API_WORKER_COUNT"] = str(workers)
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+
+    import uvicorn
+
+    config = uvicorn.Config(
+        "main:app",
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=API_GRACEFUL_TIMEOUT,
+        access_log=False,
+    )
+    server = uvicorn.Server(config)
+
+    async def serve() -> None:
+        serving = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.05)
+        if server.started:
+            ready.set()
+        await serving
+
+    logger.info("API worker starting", worker=index, pid=os.getpid(), core=core, **pool)
+    asyncio.run(serve())
+
+
+@dataclass
+class Worker:
+    index: int
+    process: SpawnProcess
+    ready: Event
+
+
+class Supervisor:
+    """Keep a generation of workers serving on one shared socket"""
+
+    def __init__(self, host: str, port: int, workers: int, budget: int, pin: bool) -> None:
+        self.host = host
+        self.port = port
+        self.count = workers
+        self.pool = pool_bounds(budget, workers)
+        cores = available_cores()
+        self.cores = [cores[i % len(cores)] for i in range(workers)] if pin else [None] * workers
+        self.workers: List[Worker] = []
+        self.sock: Optional[socket.socket] = None
+        self._stopping = False
+        self._reload_requested = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn_worker(self, index: int) -> Worker:
+        ready = _spawn.Event()
+        process = _spawn.Process(
+            target=run_worker,
+            args=(index, self.sock, ready, self.pool, self.count, self.cores[index], self.host, self.port),
+            name=f"api-worker-{index}",
+        )
+        process.start()
+        return Worker(index, process, ready)
+
+    def _stop_workers(self, workers: List[Worker]) -> None:
+        """SIGTERM workers and wait for them to drain"""
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + API_GRACEFUL_TIMEOUT + 10
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning("API worker did not drain in time, killing", worker=worker.index)
+                worker.process.kill()
+                worker.process.join()
+
+    def reload(self) -> None:
+        """Replace workers one at a time, each once its successor is serving"""
+        logger.info("Reloading API workers", workers=self.count)
+        for i, old in enumerate(list(self.workers)):
+            new = self._spawn_worker(old.index)
+            if not new.ready.wait(WORKER_READY_TIMEOUT) or not new.process.is_alive():
+                logger.error("Replacement worker failed to start, keeping current workers", worker=old.index)
+                self._stop_workers([new])
+                return
+            self.workers[i] = new
+            self._stop_workers([old])
+        logger.info("API workers reloaded")
+
+    def run(self) -> None:
+        self.sock = self._bind()
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        self.workers = [self._spawn_worker(i) for i in range(self.count)]
+        logger.info(
+            "API supervisor started",
+            host=self.host, port=self.port, workers=self.count, pinned=self.cores[0] is not None, **self.pool
+        )
+        try:
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self.reload()
+                for i, worker in enumerate(self.workers):
+                    if not worker.process.is_alive() and not self._stopping:
+                        logger.warning("API worker exited, restarting", worker=worker.index,
+                                       exitcode=worker.process.exitcode)
+                        self.workers[i] = self._spawn_worker(worker.index)
+                time.sleep(0.5)
+        finally:
+            logger.info("Draining API workers")
+            self._stop_workers(self.workers)
+            self.sock.close()
+            logger.info("API supervisor stopped")
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload_requested = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Default: one per core, within the budget")
+    parser.add_argument("--connection-budget", type=int, default=DB_CONNECTION_BUDGET)
+    parser.add_argument("--pin", dest="pin", action="store_true", help="Pin each worker to one CPU core")
+    parser.add_argument("--no-pin", dest="pin", action="store_false", help="Do not pin workers to CPU cores")
+    parser.set_defaults(pin=API_PIN_WORKERS)
+    args = parser.parse_args()
+
+    limit = max_workers(args.connection_budget)
+    workers = args.workers or min(len(available_cores()), limit)
+    if workers > limit:
+        logger.warning(
+            "Too many workers for the connection budget, starting fewer",
+            requested=workers, workers=limit, connection_budget=args.connection_budget
+        )
+        workers = limit
+
+    Supervisor(args.host, args.port, workers, args.connection_budget, args.pin).run()
+
+
+if __name__ == "__main__":
+    main()
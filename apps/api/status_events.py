@@ -0,0 +1,138 @@
+"""
+Status event fan-out for Allstar Forge Platform API
+
+Provides:
+- Postgres LISTEN/NOTIFY publishing of project status and workflow progress
+- A single dedicated listener connection per process
+- In-process fan-out to subscribers with bounded per-subscriber buffers
+
+Slow subscribers never block the listener: when a buffer is full the oldest
+event is dropped, since later status events supersede earlier ones.
+Notifications sent while the listener is reconnecting are lost, so every
+subscriber receives a stream.resync event once it is back.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import asyncpg
+import structlog
+
+from db import DATABASE_URL
+
+logger = structlog.get_logger()
+
+STATUS_CHANNEL = "forge_status"
+SUBSCRIBER_BUFFER_SIZE = int(os.getenv("SSE_SUBSCRIBER_BUFFER", "100"))
+RECONNECT_DELAY_SECONDS = 2.0
+RESYNC_EVENT = "stream.resync"
+
+
+async def publish_status_event(conn: asyncpg.Connection, kind: str, project_id: str, **data: Any) -> None:
+    """
+    Publish a status event on the given connection
+
+    When called inside a transaction the notification is only delivered on
+    commit, so subscribers never see changes that were rolled back.
+
+    Args:
+        conn: Connection used for the triggering write
+        kind: Event kind (e.g. 'project.status', 'workflow.progress')
+        project_id: Project the event belongs to
+        **data: Event-specific fields
+    """
+    payload = json.dumps({"kind": kind, "project_id": project_id, **data}, default=str)
+    await conn.execute("SELECT pg_notify($1, $2)", STATUS_CHANNEL, payload)
+
+
+class StatusBroadcaster:
+    """Listens on one connection and fans notifications out to subscribers"""
+
+    def __init__(self, dsn: str = DATABASE_URL, buffer_size: int = SUBSCRIBER_BUFFER_SIZE) -> None:
+        self.dsn = dsn
+        self.buffer_size = buffer_size
+        self._conn: Optional[asyncpg.Connection] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.dropped_events = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def start(self) -> None:
+        """Open the dedicated listener connection"""
+        self._closing = False
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(self._on_terminated)
+        await self._conn.add_listener(STATUS_CHANNEL, self._on_notification)
+        logger.info("Status event listener started", channel=STATUS_CHANNEL)
+
+    async def stop(self) -> None:
+        """Close the listener connection and stop reconnect attempts"""
+        self._closing = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+        logger.info("Status event listener stopped")
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Register a bounded queue receiving events for one project"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(project_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[project_id]
+
+    def _on_notification(self, conn, pid, channel, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.error("Malformed status event payload", channel=channel)
+            return
+
+        for queue in self._subscribers.get(event.get("project_id"), ()):
+            self._deliver(queue, event)
+
+    def _deliver(self, queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_events += 1
+        queue.put_nowait(event)
+
+    def _on_terminated(self, conn) -> None:
+        if self._closing:
+            return
+        logger.error("Status event listener connection lost, reconnecting")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            try:
+                await self.start()
+            except Exception as e:
+                logger.error("Status event listener reconnect failed", error=str(e))
+                continue
+            # Subscribers may have missed events while the listener was down
+            for project_id, queues in self._subscribers.items():
+                for queue in queues:
+                    self._deliver(queue, {"kind": RESYNC_EVENT, "project_id": project_id})
+            logger.info("Status event subscribers resynced", subscribers=self.subscriber_count)
+            return
+
+
+broadcaster = StatusBroadcaster()
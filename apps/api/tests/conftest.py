@@ -0,0 +1,5 @@
+import os
+import sys
+
+# API modules import flat from apps/api, as in its Dockerfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
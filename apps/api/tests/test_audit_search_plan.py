@@ -0,0 +1,107 @@
+"""
+Query-plan check for audit metadata search
+
+Seeds synthetic audit events into a scratch schema of the Postgres at
+DATABASE_URL, migrates it like a real database, and asserts that `@>` and
+`@@` metadata filters built by build_audit_events_query are planned as a
+Bitmap Index Scan on the jsonb_path_ops GIN index. Skipped when
+DATABASE_URL is unset.
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+import asyncpg  # noqa: E402
+
+from audit_service import build_audit_events_query  # noqa: E402
+from db import DATABASE_URL, _init_connection, migrate  # noqa: E402
+
+SCHEMA = "test_audit_search_plan"
+INDEX = "idx_audit_events_metadata"
+EVENTS = 100_000
+
+# One in 50 events is a policy evaluation; few of those deny a Deployment
+SEED = """
+    INSERT INTO audit_events (timestamp, actor, action, resource, resource_id, success, metadata)
+    SELECT
+        NOW() - make_interval(secs => i),
+        'user-' || (i % 300) || '@example.com',
+        CASE WHEN i % 50 = 0 THEN 'policy.evaluate' ELSE (ARRAY['project.view', 'project.list', 'project.create'])[1 + i % 3] END,
+        CASE WHEN i % 50 = 0 THEN 'policy' ELSE 'project' END,
+        'res-' || (i % 5000),
+        i % 50 <> 0 OR i % 7 <> 0,
+        CASE WHEN i % 50 = 0 THEN jsonb_build_object(
+            'decision', CASE WHEN i % 7 = 0 THEN 'deny' ELSE 'allow' END,
+            'resource_kind', (ARRAY['Deployment', 'Service', 'Ingress', 'CronJob'])[1 + i / 50 % 4],
+            'policy', 'policy-' || (i % 40),
+            'violations', CASE WHEN i % 7 = 0
+                THEN jsonb_build_array(jsonb_build_object('rule', 'no-privileged', 'severity', (ARRAY['high', 'low', 'low', 'low'])[1 + i / 50 % 4]))
+                ELSE '[]'::jsonb END
+        ) ELSE jsonb_build_object('page', 1 + i % 10, 'source', 'ui') END
+    FROM generate_series(1, $1) AS i
+"""
+
+SEARCHES = {
+    "contains": {"metadata_contains": {"decision": "deny", "resource_kind": "Deployment"}},
+    "path_equality": {"metadata_path": '$.decision == "deny" && $.resource_kind == "Deployment"'},
+    "path_array": {"metadata_path": '$.violations[*].severity == "high"'},
+    "contains_with_action": {"action": "policy.evaluate", "metadata_contains": {"policy": "policy-10"}},
+}
+
+
+def plan_nodes(node: dict) -> list:
+    nodes = [node]
+    for child in node.get("Plans", []):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+async def explain_searches() -> dict:
+    conn = await asyncpg.connect(DATABASE_URL)
+    await _init_connection(conn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        # Only the scratch schema, so migrate() finds no existing schema_migrations
+        await conn.execute(f"SET search_path TO {SCHEMA}")
+        await migrate(conn)
+        await conn.execute(SEED, EVENTS)
+        # VACUUM also merges the GIN pending list, as autovacuum would on a live table
+        await conn.execute("VACUUM ANALYZE audit_events")
+
+        plans = {"indexdef": await conn.fetchval(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = $1 AND indexname = $2", SCHEMA, INDEX
+        )}
+        for name, filters in SEARCHES.items():
+            query, params = build_audit_events_query(**filters, limit=100)
+            plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *params)
+            plans[name] = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+        return plans
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict:
+    return asyncio.run(explain_searches())
+
+
+def test_metadata_index_uses_jsonb_path_ops(plans):
+    assert plans["indexdef"] is not None
+    assert "USING gin (metadata jsonb_path_ops)" in plans["indexdef"]
+
+
+@pytest.mark.parametrize("search", list(SEARCHES))
+def test_metadata_search_uses_gin_index(plans, search):
+    scans = [
+        node for node in plan_nodes(plans[search])
+        if node["Node Type"] == "Bitmap Index Scan" and node.get("Index Name") == INDEX
+    ]
+    assert scans, f"{search} is not planned as a Bitmap Index Scan on {INDEX}: {json.dumps(plans[search])}"
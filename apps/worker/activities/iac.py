@@ -1,15 +1,129 @@
+import asyncio
+import json
+import os
+import signal
+from collections import deque
+from datetime import timedelta
+
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
+
+TERRAFORM_BIN = os.getenv("TERRAFORM_BIN", "terraform")
+# Without real infrastructure the activities return placeholder results
+IAC_DRY_RUN = os.getenv("IAC_DRY_RUN", "true").lower() in ("1", "true", "yes")
+# Heartbeat at least this often while terraform is quiet; keep well under the
+# heartbeat_timeout the workflow schedules these activities with
+HEARTBEAT_INTERVAL = timedelta(seconds=float(os.getenv("IAC_HEARTBEAT_SECONDS", "10")))
+
+
+def _var_args(variables: dict | None) -> list[str]:
+  # Lists and maps are passed as JSON, which terraform parses as HCL values
+  return [
+    f"-var={key}={value if isinstance(value, str) else json.dumps(value)}"
+    for key, value in (variables or {}).items()
+  ]
+
+
+async def _run_terraform(workdir: str, args: list[str], progress: dict, on_event=None) -> None:
+  """
+  Run terraform, feeding each -json event it prints to on_event
+
+  Heartbeats progress on every event and on a timer while terraform is
+  quiet, so a dead worker is noticed within the heartbeat timeout. On
+  cancellation terraform gets SIGINT to release its state lock cleanly.
+  """
+  process = await asyncio.create_subprocess_exec(
+    TERRAFORM_BIN, *args, "-input=false", "-no-color",
+    cwd=workdir,
+    stdout=asyncio.subprocess.PIPE,
+    stderr=asyncio.subprocess.STDOUT,
+  )
+
+  async def tick() -> None:
+    while True:
+      await asyncio.sleep(HEARTBEAT_INTERVAL.total_seconds())
+      activity.heartbeat(progress)
+
+  ticker = asyncio.create_task(tick())
+  errors = []
+  output = deque(maxlen=20)
+  try:
+    async for line in process.stdout:
+      try:
+        event = json.loads(line)
+      except ValueError:
+        output.append(line.decode(errors="replace").strip())
+        continue
+      if event.get("@level") == "error":
+        errors.append(event.get("@message", ""))
+      if on_event:
+        on_event(event)
+      activity.heartbeat(progress)
+    await process.wait()
+  except asyncio.CancelledError:
+    process.send_signal(signal.SIGINT)
+    await process.wait()
+    raise
+  finally:
+    ticker.cancel()
+
+  if process.returncode != 0:
+    raise ApplicationError(
+      f"terraform {args[0]} failed with exit code {process.returncode}: {'; '.join(errors) or ' '.join(output)}",
+      progress,
+    )
 
 
 @activity.defn
 async def terraform_plan(workdir: str, variables: dict | None = None) -> dict:
-  # placeholder - returns a fake plan
-  return {"workdir": workdir, "changes": 3, "variables": variables or {}}
+  if IAC_DRY_RUN:
+    return {"workdir": workdir, "changes": 3, "variables": variables or {}}
+
+  progress = {"phase": "plan", "changes": 0}
+
+  def on_event(event: dict) -> None:
+    if event.get("type") == "planned_change":
+      progress["changes"] += 1
+
+  await _run_terraform(workdir, ["init"], progress)
+  await _run_terraform(workdir, ["plan", "-json", "-lock-timeout=5m", "-out=tfplan", *_var_args(variables)], progress, on_event)
+  return {"workdir": workdir, "changes": progress["changes"], "variables": variables or {}}
 
 
 @activity.defn
 async def terraform_apply(workdir: str, variables: dict | None = None) -> dict:
-  # placeholder - returns a fake apply result
-  return {"workdir": workdir, "applied": True, "variables": variables or {}}
+  """
+  Apply the configuration, heartbeating the resources applied so far
+
+  A retry after a worker crash picks up the last heartbeat. Terraform state
+  already records those resources, so apply only touches the remainder;
+  the heartbeat keeps the reported list complete across attempts.
+  """
+  if IAC_DRY_RUN:
+    return {"workdir": workdir, "applied": True, "variables": variables or {}}
+
+  details = activity.info().heartbeat_details
+  previous = details[0] if details else {}
+  progress = {"phase": "apply", "applied": list(previous.get("applied", []))}
+  if progress["applied"]:
+    activity.logger.info("Resuming terraform apply after %d resources", len(progress["applied"]))
+  applied = set(progress["applied"])
 
+  def on_event(event: dict) -> None:
+    if event.get("type") == "apply_complete":
+      address = event.get("hook", {}).get("resource", {}).get("addr")
+      if address and address not in applied:
+        applied.add(address)
+        progress["applied"].append(address)
 
+  await _run_terraform(workdir, ["init"], progress)
+  await _run_terraform(
+    workdir, ["apply", "-json", "-auto-approve", "-lock-timeout=5m", *_var_args(variables)], progress, on_event
+  )
+  return {
+    "workdir": workdir,
+    "applied": True,
+    "resources": progress["applied"],
+    "resumed": bool(previous),
+    "variables": variables or {},
+  }
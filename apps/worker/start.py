@@ -3,7 +3,9 @@ from temporalio.client import Client
 from temporalio.worker import Worker
 
 from .workflows.provisioning import ProjectProvisioningWorkflow
+from .workflows.fanout import MultiEnvironmentProvisioningWorkflow
 from .activities.iac import terraform_plan, terraform_apply
+from .activities.progress import publish_progress
 
 
 async def main() -> None:
@@ -11,8 +13,8 @@ async def main() -> None:
   worker = Worker(
     client,
     task_queue="forge-task-queue",
-    workflows=[ProjectProvisioningWorkflow],
-    activities=[terraform_plan, terraform_apply],
+    workflows=[ProjectProvisioningWorkflow, MultiEnvironmentProvisioningWorkflow],
+    activities=[terraform_plan, terraform_apply, publish_progress],
   )
   print("Worker started on forge-task-queue")
   await worker.run()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Worker modules import as the apps.worker package, as in the Dockerfile's CMD
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
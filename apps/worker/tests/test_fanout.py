@@ -0,0 +1,159 @@
+"""
+MultiEnvironmentProvisioningWorkflow against the Temporal test environment
+
+The IaC and progress activities are replaced by fakes that record when each
+unit's plan and apply run, so the tests can check the concurrency cap,
+dependency ordering and failure handling without terraform or Postgres.
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from apps.worker.workflows.fanout import MultiEnvironmentProvisioningWorkflow
+from apps.worker.workflows.provisioning import PROGRESS_RETRY_POLICY, ProjectProvisioningWorkflow
+
+TASK_QUEUE = "forge-test"
+APPLY_SECONDS = 0.3
+
+
+class FakeIac:
+    """Fake terraform_plan / terraform_apply / publish_progress activities"""
+
+    def __init__(self, failing: set[str] = frozenset(), progress_down: bool = False) -> None:
+        self.failing = failing
+        self.progress_down = progress_down
+        self.running = 0
+        self.max_running = 0
+        self.started: dict[str, float] = {}
+        self.finished: dict[str, float] = {}
+        self.progress: list[tuple[str, str, dict]] = []
+
+    def activities(self) -> list:
+        @activity.defn(name="terraform_plan")
+        async def terraform_plan(workdir: str, variables: dict | None = None) -> dict:
+            self.started[workdir] = time.monotonic()
+            if workdir in self.failing:
+                raise ApplicationError(f"plan failed for {workdir}", non_retryable=True)
+            return {"workdir": workdir, "changes": 1}
+
+        @activity.defn(name="terraform_apply")
+        async def terraform_apply(workdir: str, variables: dict | None = None) -> dict:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            try:
+                await asyncio.sleep(APPLY_SECONDS)
+            finally:
+                self.running -= 1
+            self.finished[workdir] = time.monotonic()
+            return {"workdir": workdir, "applied": 1}
+
+        @activity.defn(name="publish_progress")
+        async def publish_progress(project_id: str, stage: str, detail: dict | None = None) -> None:
+            self.progress.append((project_id, stage, detail or {}))
+            if self.progress_down:
+                raise ConnectionError("NOTIFY unavailable")
+
+        return [terraform_plan, terraform_apply, publish_progress]
+
+
+async def run_fanout(inputs: dict, iac: FakeIac) -> dict:
+    try:
+        env = await WorkflowEnvironment.start_time_skipping()
+    except RuntimeError as e:
+        pytest.skip(f"Temporal test server unavailable: {e}")
+    async with env:
+        async with Worker(
+            env.client,
+            task_queue=TASK_QUEUE,
+            workflows=[MultiEnvironmentProvisioningWorkflow, ProjectProvisioningWorkflow],
+            activities=iac.activities(),
+        ):
+            return await env.client.execute_workflow(
+                MultiEnvironmentProvisioningWorkflow.run,
+                inputs,
+                id=f"fanout-test-{uuid.uuid4()}",
+                task_queue=TASK_QUEUE,
+            )
+
+
+def unit(name: str, depends_on: list[str] = ()) -> dict:
+    # The fakes key their records by workdir, so each unit gets its own
+    return {"name": name, "workdir": name, "depends_on": list(depends_on)}
+
+
+def test_concurrency_cap_holds():
+    iac = FakeIac()
+    result = asyncio.run(run_fanout({
+        "project_id": "project-1",
+        "max_concurrency": 2,
+        "units": [unit(f"unit-{i}") for i in range(6)],
+    }, iac))
+
+    assert result["status"] == "completed"
+    assert iac.max_running == 2
+    assert len(iac.finished) == 6
+    assert {stage for _, stage, _ in iac.progress} == {"planned", "completed"}
+
+
+def test_dependents_wait_for_their_dependencies():
+    iac = FakeIac()
+    result = asyncio.run(run_fanout({
+        "max_concurrency": 4,
+        "units": [
+            unit("network"),
+            unit("database", ["network"]),
+            unit("app", ["network", "database"]),
+            unit("dns"),
+        ],
+    }, iac))
+
+    assert result["status"] == "completed"
+    assert iac.started["database"] >= iac.finished["network"]
+    assert iac.started["app"] >= iac.finished["database"]
+    # Independent units do not wait for the chain
+    assert iac.started["dns"] < iac.finished["network"]
+
+
+def test_failed_unit_skips_dependents_and_aggregates_results():
+    iac = FakeIac(failing={"database"})
+    result = asyncio.run(run_fanout({
+        "project_id": "project-1",
+        "max_concurrency": 4,
+        "units": [
+            unit("network"),
+            unit("database", ["network"]),
+            unit("app", ["database"]),
+            unit("worker", ["app"]),
+            unit("dns"),
+        ],
+    }, iac))
+
+    units = result["units"]
+    assert result["status"] == "partial"
+    assert units["network"]["status"] == "completed"
+    assert units["dns"]["status"] == "completed"
+    assert units["database"]["status"] == "failed"
+    assert units["app"] == {"status": "skipped", "blocked_by": ["database"]}
+    assert units["worker"] == {"status": "skipped", "blocked_by": ["app"]}
+    assert "app" not in iac.started and "worker" not in iac.started
+    reported = {(stage, detail.get("unit")) for _, stage, detail in iac.progress}
+    assert {("failed", "database"), ("skipped", "app"), ("skipped", "worker")} <= reported
+
+
+def test_progress_outage_does_not_stall_provisioning():
+    iac = FakeIac(progress_down=True)
+    result = asyncio.run(run_fanout({
+        "project_id": "project-1",
+        "units": [unit("network"), unit("app", ["network"])],
+    }, iac))
+
+    assert result["status"] == "completed"
+    # Each notification gives up after PROGRESS_RETRY_POLICY's attempts
+    assert len(iac.progress) == 4 * PROGRESS_RETRY_POLICY.maximum_attempts
@@ -0,0 +1,124 @@
+import asyncio
+from temporalio import workflow
+from temporalio.exceptions import ApplicationError, ChildWorkflowError
+
+from .provisioning import ProjectProvisioningWorkflow, notify_progress
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def expand_units(inputs: dict) -> list[dict]:
+    """
+    Build provisioning units from workflow inputs
+
+    Either pass "units" directly, or "modules" and "environments" to run
+    every module in every environment. Module dependencies apply within an
+    environment; environments are independent of each other.
+    """
+    if "units" in inputs:
+        units = [dict(unit, depends_on=list(unit.get("depends_on", []))) for unit in inputs["units"]]
+    else:
+        units = []
+        for environment in inputs.get("environments", ["dev"]):
+            for module in inputs.get("modules", []):
+                units.append({
+                    "name": f"{module['name']}@{environment}",
+                    "workdir": module["workdir"],
+                    "environment": environment,
+                    "variables": {
+                        **inputs.get("variables", {}),
+                        **module.get("variables", {}),
+                        "environment": environment,
+                    },
+                    "depends_on": [f"{dependency}@{environment}" for dependency in module.get("depends_on", [])],
+                })
+
+    names = [unit["name"] for unit in units]
+    if len(set(names)) != len(names):
+        raise ApplicationError("Unit names must be unique", non_retryable=True)
+    for unit in units:
+        unknown = set(unit["depends_on"]) - set(names)
+        if unknown:
+            raise ApplicationError(f"Unit {unit['name']} depends on unknown units {sorted(unknown)}", non_retryable=True)
+    _check_acyclic(units)
+    return units
+
+
+def _check_acyclic(units: list[dict]) -> None:
+    remaining = {unit["name"]: set(unit["depends_on"]) for unit in units}
+    while remaining:
+        ready = [name for name, dependencies in remaining.items() if not dependencies & remaining.keys()]
+        if not ready:
+            raise ApplicationError(f"Dependency cycle among units {sorted(remaining)}", non_retryable=True)
+        for name in ready:
+            del remaining[name]
+
+
+@workflow.defn
+class MultiEnvironmentProvisioningWorkflow:
+    """
+    Plan and apply many module/environment units as child workflows
+
+    A unit starts once all of its dependencies have completed, with at most
+    max_concurrency units running at a time. A failed unit skips its
+    dependents; independent units keep going. Units report their own
+    progress; failed and skipped units are reported from here.
+    """
+
+    def __init__(self) -> None:
+        self._results: dict[str, dict] = {}
+
+    @workflow.run
+    async def run(self, inputs: dict):
+        units = expand_units(inputs)
+        slots = asyncio.Semaphore(max(1, int(inputs.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))))
+        done = {unit["name"]: asyncio.Event() for unit in units}
+
+        async def run_unit(unit: dict) -> None:
+            for dependency in unit["depends_on"]:
+                await done[dependency].wait()
+            failed = [d for d in unit["depends_on"] if self._results[d]["status"] != "completed"]
+            if failed:
+                self._results[unit["name"]] = {"status": "skipped", "blocked_by": failed}
+                done[unit["name"]].set()
+                await notify_progress(inputs.get("project_id"), "skipped", {"unit": unit["name"], "blocked_by": failed})
+                return
+
+            async with slots:
+                self._results[unit["name"]] = {"status": "running"}
+                try:
+                    result = await workflow.execute_child_workflow(
+                        ProjectProvisioningWorkflow.run,
+                        {
+                            "project_id": inputs.get("project_id"),
+                            "unit": unit["name"],
+                            "workdir": unit["workdir"],
+                            "variables": unit.get("variables", {}),
+                        },
+                        id=f"{workflow.info().workflow_id}/{unit['name']}",
+                    )
+                    self._results[unit["name"]] = {"status": "completed", **result}
+                except ChildWorkflowError as e:
+                    workflow.logger.warning("Provisioning unit failed: %s", unit["name"])
+                    self._results[unit["name"]] = {"status": "failed", "error": str(e.__cause__ or e)}
+            done[unit["name"]].set()
+            if self._results[unit["name"]]["status"] == "failed":
+                await notify_progress(inputs.get("project_id"), "failed", {"unit": unit["name"]})
+
+        await asyncio.gather(*(run_unit(unit) for unit in units))
+
+        statuses = [result["status"] for result in self._results.values()]
+        if all(status == "completed" for status in statuses):
+            status = "completed"
+        elif "completed" in statuses:
+            status = "partial"
+        else:
+            status = "failed"
+        return {
+            "status": status,
+            "units": {unit["name"]: self._results[unit["name"]] for unit in units},
+        }
+
+    @workflow.query
+    def unit_statuses(self) -> dict:
+        return {name: result["status"] for name, result in self._results.items()}
@@ -1,23 +1,56 @@
 from datetime import timedelta
 from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+
+# IaC activities heartbeat while terraform runs, so a dead worker is detected
+# within IAC_HEARTBEAT_TIMEOUT and the activity is retried elsewhere,
+# resuming from its last heartbeat. The schedule-to-close timeouts only
+# bound the total time across attempts.
+IAC_HEARTBEAT_TIMEOUT = timedelta(seconds=30)
+IAC_RETRY_POLICY = RetryPolicy(maximum_attempts=5, initial_interval=timedelta(seconds=5))
+
+# Progress notifications are informational: a few quick attempts, then the
+# workflow carries on rather than stalling while NOTIFY is unavailable
+PROGRESS_RETRY_POLICY = RetryPolicy(maximum_attempts=3, initial_interval=timedelta(seconds=1))
+
+
+async def notify_progress(project_id: str | None, stage: str, detail: dict) -> None:
+    """Publish workflow progress to event-stream subscribers, best effort"""
+    if not project_id:
+        return
+    try:
+        await workflow.execute_activity(
+            "publish_progress",
+            args=[project_id, stage, detail],
+            start_to_close_timeout=timedelta(seconds=10),
+            retry_policy=PROGRESS_RETRY_POLICY,
+        )
+    except ActivityError:
+        workflow.logger.warning("Progress notification dropped: %s", stage)
 
 
 @workflow.defn
 class ProjectProvisioningWorkflow:
     @workflow.run
     async def run(self, inputs: dict):
+        project_id = inputs.get("project_id")
+        # Set when running as one unit of MultiEnvironmentProvisioningWorkflow
+        unit = {"unit": inputs["unit"]} if inputs.get("unit") else {}
         plan = await workflow.execute_activity(
             "terraform_plan",
-            inputs.get("workdir", "./infra/terraform"),
-            inputs.get("variables", {}),
-            start_to_close_timeout=timedelta(seconds=30),
+            args=[inputs.get("workdir", "./infra/terraform"), inputs.get("variables", {})],
+            schedule_to_close_timeout=timedelta(minutes=30),
+            heartbeat_timeout=IAC_HEARTBEAT_TIMEOUT,
+            retry_policy=IAC_RETRY_POLICY,
         )
+        await notify_progress(project_id, "planned", {"changes": plan.get("changes"), **unit})
         apply = await workflow.execute_activity(
             "terraform_apply",
-            inputs.get("workdir", "./infra/terraform"),
-            inputs.get("variables", {}),
-            start_to_close_timeout=timedelta(seconds=60),
+            args=[inputs.get("workdir", "./infra/terraform"), inputs.get("variables", {})],
+            schedule_to_close_timeout=timedelta(hours=2),
+            heartbeat_timeout=IAC_HEARTBEAT_TIMEOUT,
+            retry_policy=IAC_RETRY_POLICY,
         )
+        await notify_progress(project_id, "completed", {"applied": apply.get("applied"), **unit})
         return {"status": "completed", "plan": plan, "apply": apply}
-
-
@@ -0,0 +1,317 @@
+"""
+Load test for the API and agent services
+
+Drives each FastAPI app in-process through httpx's ASGI transport with a
+weighted mix of realistic requests at fixed concurrency, and reports RPS
+and latency percentiles per route as JSON so runs can be compared across
+commits.
+
+The API runs its real lifespan against DATABASE_URL (a local Postgres, see
+dev/docker-compose.yml); background batch jobs are disabled so they do not
+skew latencies. The agent needs no external services.
+
+    python benchmarks/load_test.py --app api agent --requests 5000 --concurrency 32 \\
+        --output results.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import structlog
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AUTH_HEADERS = {"Authorization": "Bearer load-test"}
+
+# Keep periodic recomputation out of the measured window
+os.environ.setdefault("SCORECARD_INTERVAL_SECONDS", "0")
+os.environ.setdefault("COST_FORECAST_INTERVAL_SECONDS", "0")
+# Every request comes from one identity; measure capacity, not its rate limit
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class Scenario:
+    """One route in the request mix"""
+    route: str
+    weight: float
+    build: Callable[[random.Random, "RunState"], Request]
+
+
+@dataclass
+class RunState:
+    """Identifiers shared by scenarios during a run"""
+    run_id: str
+    project_ids: List[str]
+    plan_ids: List[str]
+    counter: int = 0
+
+    def next_name(self) -> str:
+        self.counter += 1
+        return f"load-{self.run_id}-{self.counter}"
+
+
+def load_app(app_name: str):
+    """Import apps/<app_name>/main.py under a unique module name"""
+    app_dir = REPO_ROOT / "apps" / app_name
+    sys.path.insert(0, str(app_dir))
+    spec = importlib.util.spec_from_file_location(f"{app_name}_main", app_dir / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def quiet_logging(level: str) -> None:
+    structlog.configure(
+        processors=[structlog.processors.add_log_level, structlog.dev.ConsoleRenderer()],
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level.upper())),
+        logger_factory=structlog.PrintLoggerFactory(file=sys.stderr),
+        cache_logger_on_first_use=False,
+    )
+
+
+# Request mixes
+
+API_TEMPLATES = ["web-service", "data-pipeline", "ml-model"]
+ENVIRONMENTS = ["dev", "staging", "prod"]
+
+
+def _create_project(rng: random.Random, state: RunState) -> Request:
+    return ("POST", "/api/v1/projects", {
+        "name": state.next_name(),
+        "template": rng.choice(API_TEMPLATES),
+        "environment": rng.choice(ENVIRONMENTS),
+        "team": f"team-{rng.randint(1, 8)}",
+        "metadata": {"source": "load-test"},
+    })
+
+
+API_MIX = [
+    Scenario("GET /projects", 30, lambda rng, state: (
+        "GET", f"/api/v1/projects?page={rng.randint(1, 3)}&page_size=20", None
+    )),
+    Scenario("GET /projects/{id}", 30, lambda rng, state: (
+        "GET", f"/api/v1/projects/{rng.choice(state.project_ids)}", None
+    )),
+    Scenario("POST /projects", 10, _create_project),
+    Scenario("GET /audit/events", 15, lambda rng, state: (
+        "GET", f"/api/v1/audit/events?limit={rng.choice([20, 50, 100])}", None
+    )),
+    Scenario("POST /policies/validate", 15, lambda rng, state: (
+        "POST", "/api/v1/policies/validate", {
+            "env": rng.choice(ENVIRONMENTS),
+            "resource": {"type": "s3_bucket", "encryption_at_rest": rng.random() < 0.8},
+        }
+    )),
+]
+
+
+def _provision_plan(rng: random.Random, state: RunState) -> Request:
+    return ("POST", "/agent/provision/plan", {
+        "project": state.next_name(),
+        "resources": {f"resource-{i}": {"type": "compute"} for i in range(rng.randint(1, 14))},
+        "risk_level": rng.choice(["low", "medium", "high"]),
+        "environment": rng.choice(ENVIRONMENTS),
+        "team": f"team-{rng.randint(1, 8)}",
+        "budget_limit": rng.choice([None, 500, 5000, 50000]),
+        "compliance_requirements": rng.sample(["soc2", "gdpr", "hipaa", "pci", "iso27001"], rng.randint(0, 5)),
+    })
+
+
+AGENT_MIX = [
+    Scenario("POST /agent/provision/plan", 70, _provision_plan),
+    Scenario("GET /agent/plans/{id}", 20, lambda rng, state: (
+        "GET", f"/agent/plans/{rng.choice(state.plan_ids)}", None
+    )),
+    Scenario("GET /health", 10, lambda rng, state: ("GET", "/health", None)),
+]
+
+
+# Setup and teardown per app
+
+@asynccontextmanager
+async def api_session(args: argparse.Namespace) -> AsyncIterator[Tuple[httpx.AsyncClient, RunState, List[Scenario]]]:
+    app = load_app("api")
+    state = RunState(run_id=uuid.uuid4().hex[:8], project_ids=[], plan_ids=[])
+    async with app.router.lifespan_context(app):
+        async with _client(app) as client:
+            rng = random.Random(args.seed)
+            for _ in range(args.seed_projects):
+                _, url, body = _create_project(rng, state)
+                response = await client.post(url, json=body)
+                response.raise_for_status()
+                state.project_ids.append(response.json()["project_id"])
+            try:
+                yield client, state, API_MIX
+            finally:
+                if args.cleanup:
+                    from db import get_connection
+                    async with get_connection() as conn:
+                        await conn.execute("DELETE FROM projects WHERE name LIKE $1", f"load-{state.run_id}-%")
+
+
+@asynccontextmanager
+async def agent_session(args: argparse.Namespace) -> AsyncIterator[Tuple[httpx.AsyncClient, RunState, List[Scenario]]]:
+    app = load_app("agent")
+    state = RunState(run_id=uuid.uuid4().hex[:8], project_ids=[], plan_ids=[])
+    async with _client(app) as client:
+        rng = random.Random(args.seed)
+        for _ in range(args.seed_projects):
+            _, url, body = _provision_plan(rng, state)
+            response = await client.post(url, json=body)
+            response.raise_for_status()
+            state.plan_ids.append(response.json()["plan_id"])
+        yield client, state, AGENT_MIX
+
+
+SESSIONS = {"api": api_session, "agent": agent_session}
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://loadtest",
+        headers=AUTH_HEADERS,
+        timeout=30.0,
+    )
+
+
+# Driver
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    state: RunState,
+    scenarios: List[Scenario],
+    total_requests: int,
+    warmup_requests: int,
+    concurrency: int,
+    seed: int
+) -> Dict[str, Any]:
+    """Issue requests from concurrency workers until total_requests complete"""
+    latencies: Dict[str, List[float]] = {scenario.route: [] for scenario in scenarios}
+    errors: Dict[str, int] = {scenario.route: 0 for scenario in scenarios}
+    weights = [scenario.weight for scenario in scenarios]
+    issued = 0
+    measure_started = None
+
+    async def worker(worker_id: int) -> None:
+        nonlocal issued, measure_started
+        rng = random.Random(seed * 1000 + worker_id)
+        while issued < warmup_requests + total_requests:
+            sequence = issued
+            issued += 1
+            if sequence == warmup_requests:
+                measure_started = time.perf_counter()
+            scenario = rng.choices(scenarios, weights)[0]
+            method, url, body = scenario.build(rng, state)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = time.perf_counter() - started
+            if sequence >= warmup_requests:
+                latencies[scenario.route].append(elapsed)
+                errors[scenario.route] += failed
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    duration = time.perf_counter() - (measure_started or time.perf_counter())
+
+    routes = {}
+    for route, values in latencies.items():
+        values.sort()
+        routes[route] = {
+            "requests": len(values),
+            "errors": errors[route],
+            "rps": round(len(values) / duration, 1) if duration else None,
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    all_values = sorted(value for values in latencies.values() for value in values)
+    return {
+        "requests": len(all_values),
+        "errors": sum(errors.values()),
+        "duration_s": round(duration, 3),
+        "rps": round(len(all_values) / duration, 1) if duration else None,
+        "p50_ms": round(percentile(all_values, 50) * 1000, 3),
+        "p95_ms": round(percentile(all_values, 95) * 1000, 3),
+        "p99_ms": round(percentile(all_values, 99) * 1000, 3),
+        "routes": routes,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "apps": {},
+    }
+    for app_name in args.app:
+        async with SESSIONS[app_name](args) as (client, state, scenarios):
+            results["apps"][app_name] = await drive(
+                client, state, scenarios, args.requests, args.warmup, args.concurrency, args.seed
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--app", nargs="+", choices=sorted(SESSIONS), default=["api", "agent"])
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests per app")
+    parser.add_argument("--warmup", type=int, default=500, help="Unmeasured requests issued first")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed-projects", type=int, default=50, help="Projects or plans created before the run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-cleanup", dest="cleanup", action="store_false",
+                        help="Keep the projects the API run created")
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    quiet_logging(args.log_level)
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
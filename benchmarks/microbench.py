@@ -0,0 +1,244 @@
+"""
+Microbenchmarks for hot agent and API functions
+
+Times each function over repeated rounds after a warmup, reports per-call
+min/median/mean and spread, and counts allocations per call with
+tracemalloc. Results can be saved as a baseline and later checked against
+it, failing when a function's median slows beyond a threshold.
+
+    python benchmarks/microbench.py                       # print results
+    python benchmarks/microbench.py --save-baseline       # refresh the baseline
+    python benchmarks/microbench.py --check --threshold 0.25
+
+Each run also times a fixed pure-Python calibration loop, and the check
+scales baseline medians by how much faster or slower that loop ran, so a
+busier or slower machine does not read as a regression. Baselines are still
+best refreshed on the machine that runs the check.
+"""
+
+import argparse
+import fnmatch
+import gc
+import importlib.util
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "microbench_baseline.json"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable[[], Any]
+
+
+def run_coroutine(coro) -> Any:
+    """Drive a coroutine that never suspends, without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError("Benchmarked coroutine suspended; it needs an event loop")
+
+
+def _import(app: str, module: str, alias: str):
+    app_dir = REPO_ROOT / "apps" / app
+    if str(app_dir) not in sys.path:
+        sys.path.insert(0, str(app_dir))
+    spec = importlib.util.spec_from_file_location(alias, app_dir / f"{module.replace('.', '/')}.py")
+    loaded = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = loaded
+    spec.loader.exec_module(loaded)
+    return loaded
+
+
+def agent_benchmarks() -> List[Benchmark]:
+    agent = _import("agent", "main", "agent_main")
+    plan = agent.ProvisionPlan(
+        project="payments-api",
+        resources={f"resource-{i}": {"type": "compute"} for i in range(12)},
+        risk_level="medium",
+        environment="prod",
+        team="payments",
+        budget_limit=800,
+        compliance_requirements=["soc2", "gdpr", "hipaa", "pci"],
+    )
+    risk = run_coroutine(agent.assess_risk(plan))
+    cost = run_coroutine(agent.calculate_cost_estimate(plan))
+    return [
+        Benchmark("agent.assess_risk", lambda: run_coroutine(agent.assess_risk(plan))),
+        Benchmark("agent.check_compliance", lambda: run_coroutine(agent.check_compliance(plan))),
+        Benchmark("agent.determine_approval_requirement",
+                  lambda: agent.determine_approval_requirement(plan, risk, cost)),
+        Benchmark("agent.generate_recommendations",
+                  lambda: run_coroutine(agent.generate_recommendations(plan, risk, cost))),
+    ]
+
+
+def api_benchmarks() -> List[Benchmark]:
+    audit = _import("api", "audit_service", "audit_service")
+    projects = _import("api", "routers.projects", "api_projects")
+    now = datetime.now(timezone.utc)
+    row = {
+        "id": "6f1c2b1e-8d0a-4a57-9f0e-3c2f4b1d9a10",
+        "name": "payments-api",
+        "template": "web-service",
+        "environment": "prod",
+        "team": "payments",
+        "status": "active",
+        "created_at": now,
+        "updated_at": now,
+        "created_by": "user@example.com",
+        "metadata": {"tier": "gold", "metrics": {"security": 92, "quality": 88}},
+    }
+    return [
+        Benchmark("api.build_audit_events_query.all_filters", lambda: audit.build_audit_events_query(
+            actor="user@example.com", action="project.create", resource="project", resource_id="abc",
+            success=True, start_date=now - timedelta(days=7), end_date=now, limit=50, offset=100
+        )),
+        Benchmark("api.build_audit_events_query.no_filters", lambda: audit.build_audit_events_query()),
+        Benchmark("api.build_project_filters", lambda: projects.build_project_filters(status="active", team="payments")),
+        Benchmark("api.ProjectResponse.model_validate", lambda: projects.ProjectResponse.model_validate(row)),
+    ]
+
+
+def calibration_workload() -> int:
+    """Fixed interpreter-bound work used to normalise timings across runs"""
+    values = {}
+    for i in range(200):
+        values[f"key-{i}"] = [i, str(i), i * 1.5]
+    return sum(len(value[1]) for value in values.values())
+
+
+def measure(fn: Callable[[], Any], warmup: int, repeat: int, number: int) -> Dict[str, Any]:
+    """Per-call timing statistics over repeat rounds of number calls"""
+    for _ in range(warmup):
+        fn()
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rounds = []
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            rounds.append((time.perf_counter_ns() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Allocations per call, counting blocks still alive (results included)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    kept = [fn() for _ in range(number)]
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del kept
+
+    quartiles = statistics.quantiles(rounds, n=4) if len(rounds) > 1 else [rounds[0]] * 3
+    return {
+        "min_ns": round(min(rounds), 1),
+        "median_ns": round(statistics.median(rounds), 1),
+        "mean_ns": round(statistics.fmean(rounds), 1),
+        "iqr_ns": round(quartiles[2] - quartiles[0], 1),
+        "alloc_blocks_per_call": round(blocks / number, 2),
+        "peak_bytes_per_call": round(peak / number, 1),
+    }
+
+
+def check(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    remeasure: Callable[[str], Dict[str, Any]],
+    confirm: int
+) -> List[str]:
+    """
+    Names and slowdowns of benchmarks slower than baseline by more than threshold
+
+    A benchmark over the threshold is measured again up to confirm times and
+    keeps its best result, so one noisy round does not fail the check.
+    """
+    scale = report["calibration_ns"] / baseline["calibration_ns"] if baseline.get("calibration_ns") else 1.0
+    report["machine_scale"] = round(scale, 3)
+    regressions = []
+    for name, stats in report["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference:
+            continue
+        limit = reference["median_ns"] * scale * (1 + threshold)
+        for _ in range(confirm):
+            if stats["median_ns"] <= limit:
+                break
+            retry = remeasure(name)
+            if retry["median_ns"] < stats["median_ns"]:
+                stats.update(retry)
+        ratio = stats["median_ns"] / (reference["median_ns"] * scale)
+        stats["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {ratio:.2f}x baseline median")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", default="*", help="Glob over benchmark names")
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30, help="Timed rounds per benchmark")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per round")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on regressions against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown, as a fraction")
+    parser.add_argument("--confirm", type=int, default=2, help="Re-measurements before reporting a regression")
+    args = parser.parse_args()
+
+    benchmarks = {
+        benchmark.name: benchmark for benchmark in agent_benchmarks() + api_benchmarks()
+        if fnmatch.fnmatch(benchmark.name, args.filter)
+    }
+
+    def run(name: str) -> Dict[str, Any]:
+        return measure(benchmarks[name].fn, args.warmup, args.repeat, args.number)
+
+    # Calibrate on both sides of the run to average out drift in machine load
+    calibration = [measure(calibration_workload, 50, args.repeat, 200)["median_ns"]]
+    results = {name: run(name) for name in benchmarks}
+    calibration.append(measure(calibration_workload, 50, args.repeat, 200)["median_ns"])
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"warmup": args.warmup, "repeat": args.repeat, "number": args.number},
+        "calibration_ns": round(statistics.fmean(calibration), 1),
+        "results": results,
+    }
+
+    regressions = []
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = check(report, baseline, args.threshold, run, args.confirm)
+        report["regressions"] = regressions
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
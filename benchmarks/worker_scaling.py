@@ -0,0 +1,150 @@
+"""
+Throughput scaling of the multi-process API server
+
+Starts apps/api/serve.py with 1..N workers against DATABASE_URL, drives it
+over real TCP from several client processes for a fixed duration, and
+reports RPS, latency percentiles and scaling efficiency relative to one
+worker. Workers only scale while the machine has idle cores for them and
+for the client processes.
+
+    python benchmarks/worker_scaling.py --workers 1 2 4 --duration 15 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+API_DIR = REPO_ROOT / "apps" / "api"
+AUTH_HEADERS = {"Authorization": "Bearer load-test"}
+PATHS = ["/api/v1/projects?page_size=20", "/healthz"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, budget: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SCORECARD_INTERVAL_SECONDS": "0",
+        "COST_FORECAST_INTERVAL_SECONDS": "0",
+        "AUDIT_COALESCE_WINDOW_SECONDS": "5",
+        # One client identity; measure capacity, not its rate limit
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--connection-budget", str(budget)],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # The first ready answer means one worker is up; the warmup covers the rest
+    deadline = time.monotonic() + 60
+    while True:
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            raise RuntimeError(f"Server with {workers} workers failed to start")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=2).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+
+def client_process(port: int, concurrency: int, duration: float, results: "multiprocessing.Queue") -> None:
+    async def run() -> Dict[str, Any]:
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", headers=AUTH_HEADERS, limits=limits, timeout=30
+        ) as client:
+            async def worker(offset: int) -> None:
+                nonlocal errors
+                i = offset
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(PATHS[i % len(PATHS)])
+                        errors += response.status_code >= 400
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+                    i += 1
+
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return {"latencies": latencies, "errors": errors}
+
+    results.put(asyncio.run(run()))
+
+
+def measure(port: int, clients: int, concurrency: int, duration: float) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    per_client = max(1, concurrency // clients)
+    processes = [
+        context.Process(target=client_process, args=(port, per_client, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(value for outcome in outcomes for value in outcome["latencies"])
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": sum(outcome["errors"] for outcome in outcomes),
+        "rps": round(count / duration, 1),
+        "p50_ms": round(latencies[count // 2] * 1000, 2) if count else None,
+        "p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 2) if count else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds while all workers come up")
+    parser.add_argument("--concurrency", type=int, default=64, help="Open requests across all clients")
+    parser.add_argument("--clients", type=int, default=2, help="Client processes generating load")
+    parser.add_argument("--connection-budget", type=int, default=80)
+    args = parser.parse_args()
+
+    runs = []
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(workers, port, args.connection_budget)
+        try:
+            measure(port, args.clients, args.concurrency, args.warmup)
+            run = {"workers": workers, **measure(port, args.clients, args.concurrency, args.duration)}
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        runs.append(run)
+
+    base_rps = runs[0]["rps"] / runs[0]["workers"]
+    for run in runs:
+        run["efficiency"] = round(run["rps"] / (base_rps * run["workers"]), 3) if base_rps else None
+    print(json.dumps({"cores": os.cpu_count(), "concurrency": args.concurrency, "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()